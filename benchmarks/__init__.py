@@ -0,0 +1,8 @@
+from batch_logistic_benchmark import *
+from catalog_features_benchmark import *
+from compressed_logistic_benchmark import *
+from feature_matrix_benchmark import *
+from model_memory_benchmark import *
+from online_update_benchmark import *
+from sparse_training_benchmark import *
+from warm_start_benchmark import *
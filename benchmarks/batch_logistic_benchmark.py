@@ -0,0 +1,48 @@
+import time
+import numpy as np
+from sklearn import linear_model
+from tests.synthetic_data import *
+
+def batch_logistic_benchmark(num_students=3000, num_courses=200, num_desired_courses=20):
+  """
+  Builds the training data of every situation for num_desired_courses courses x 7 student semesters on a
+  small synthetic dataset (a few hundred rows per problem, like the backtest, with the made up prereg data of
+  add_synthetic_prereg_data for the prereg situations 2 and 4), then fits the problems of each situation one
+  at a time with sklearn's liblinear (what make_logistic does) and all together with fit_batch_logistic.
+  Prints the times and the largest differences of the coefficients and of the probabilities.
+  Returns {situation: (sklearn seconds, batch seconds, largest probability difference)}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_desired_courses)
+  add_synthetic_prereg_data(courses, desired_courses, '0506FA', '1112FA')
+
+  problems = dict((situation, []) for situation in range(5))
+  for desired_course in desired_courses:
+    for current_semester in range(7):
+      current_students, past_students = get_current_and_past_students(students, '1011SP', current_semester, cohort_index)
+      train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', True, range(5), True)
+      for situation in range(5):
+        [x_train, y_train] = get_situation_features(train_base, situation)
+        if x_train.shape[0] > 0:
+          problems[situation].append((x_train, y_train))
+
+  print "Logistic regression fits, %d students and %d courses:" % (len(students), len(courses))
+  results = {}
+  for situation in range(5):
+    x_list = [x_train for x_train, y_train in problems[situation]]
+    y_list = [y_train for x_train, y_train in problems[situation]]
+    start = time.time()
+    sklearn_models = [linear_model.LogisticRegression(C=1e-1, solver='liblinear').fit(x_train, y_train) for x_train, y_train in zip(x_list, y_list)]
+    sklearn_seconds = time.time() - start
+    start = time.time()
+    batch_models = fit_batch_logistic(x_list, y_list, 1e-1)
+    batch_seconds = time.time() - start
+
+    coef_difference = 0
+    prob_difference = 0
+    for sklearn_model, batch_model, x_train in zip(sklearn_models, batch_models, x_list):
+      coef_difference = max(coef_difference, np.abs(sklearn_model.coef_ - batch_model.coef_).max(), np.abs(sklearn_model.intercept_ - batch_model.intercept_).max())
+      prob_difference = max(prob_difference, np.abs(sklearn_model.predict_proba(x_train) - batch_model.predict_proba(x_train)).max())
+    results[situation] = (sklearn_seconds, batch_seconds, prob_difference)
+    print "  situation %d, %4d problems of %3d columns: %6.2f s sklearn, %6.2f s batch (%.1fx), differences %.1e coefficients, %.1e probabilities" % (
+      situation, len(x_list), x_list[0].shape[1] if x_list else 0, sklearn_seconds, batch_seconds, sklearn_seconds / max(batch_seconds, 1e-9), coef_difference, prob_difference)
+  return results
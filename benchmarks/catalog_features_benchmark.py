@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from tests.synthetic_data import *
+
+def catalog_features_benchmark(num_students=5000, num_courses=300):
+  """
+  Builds the training and testing feature bases of every situation for every recently offered course of a
+  synthetic catalog x 7 student semesters, the way forecast_catalog needs them: once building every
+  course's bases from scratch, and once with the make_cohort_feature_base of every cohort shared by all
+  the courses. Prints the times and checks that the features are the same.
+  Returns (per course seconds, shared cohort seconds).
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses)
+  course_list = get_recently_offered_courses(courses, all_courses_list, '1112SP')
+  situations = range(5)
+
+  start = time.time()
+  per_course_bases = []
+  for current_semester in range(7):
+    for desired_course in course_list:
+      current_students, past_students = get_current_and_past_students(students, '1112FA', current_semester, cohort_index)
+      per_course_bases.append([make_student_feature_base(is_current_student, group, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0708FA', '1112FA', '1112SP', True, situations, True) for is_current_student, group in [(False, past_students), (True, current_students)]])
+  per_course_seconds = time.time() - start
+
+  start = time.time()
+  shared_bases = []
+  for current_semester in range(7):
+    current_students, past_students = get_current_and_past_students(students, '1112FA', current_semester, cohort_index)
+    cohorts = [(is_current_student, group, make_cohort_feature_base(is_current_student, group, enrollment_index, all_courses_list, current_semester, current_semester + 1, '0708FA', situations)) for is_current_student, group in [(False, past_students), (True, current_students)]]
+    for desired_course in course_list:
+      shared_bases.append([make_student_feature_base(is_current_student, group, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0708FA', '1112FA', '1112SP', True, situations, True, cohort_base) for is_current_student, group, cohort_base in cohorts])
+  shared_seconds = time.time() - start
+
+  same = True
+  for per_course_pair, shared_pair in zip(per_course_bases, shared_bases):
+    for per_course_base, shared_base in zip(per_course_pair, shared_pair):
+      same = same and np.array_equal(per_course_base['tail'], shared_base['tail']) and np.array_equal(per_course_base['y_values'], shared_base['y_values'])
+      same = same and (per_course_base['course_history'] != shared_base['course_history']).nnz == 0
+  print "Catalog feature bases, %d students, %d of %d courses offered recently x 7 student semesters:" % (len(students), len(course_list), len(all_courses_list))
+  print "  per course:    %6.2f s" % per_course_seconds
+  print "  shared cohort: %6.2f s (%.1fx), same features: %s" % (shared_seconds, per_course_seconds / max(shared_seconds, 1e-9), same)
+  return (per_course_seconds, shared_seconds)
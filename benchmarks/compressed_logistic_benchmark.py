@@ -0,0 +1,46 @@
+import time
+import numpy as np
+from sklearn import linear_model
+from tests.synthetic_data import *
+
+def compressed_logistic_benchmark(num_students=3000, num_courses=200, num_desired_courses=20):
+  """
+  Builds the training and testing data of the baseline, gender and prereg models (situations 0-2, with the
+  made up prereg data of add_synthetic_prereg_data) for num_desired_courses courses x 7 student semesters and
+  fits every problem with sklearn's liblinear and with fit_counted_liblinear on its distinct rows
+  (get_compressed_problem, what make_logistic does now). Prints the times and the largest difference of the
+  predicted enrollments, which should be identical up to rounding.
+  Returns {situation: (sklearn seconds, compressed seconds, largest enrollment difference)}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_desired_courses)
+  add_synthetic_prereg_data(courses, desired_courses, '0506FA', '1112FA')
+
+  problems = dict((situation, []) for situation in range(3))
+  for desired_course in desired_courses:
+    for current_semester in range(7):
+      current_students, past_students = get_current_and_past_students(students, '1011SP', current_semester, cohort_index)
+      train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', True, range(3), True)
+      test_base = make_student_feature_base(True, current_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', True, range(3), False)
+      for situation in range(3):
+        [x_train, y_train] = get_situation_features(train_base, situation)
+        [x_test, y_test] = get_situation_features(test_base, situation)
+        if x_train.shape[0] > 0 and x_test.shape[0] > 0:
+          problems[situation].append((x_train, y_train, x_test))
+
+  print "Compressed logistic regression fits, %d students and %d courses:" % (len(students), len(courses))
+  results = {}
+  for situation in range(3):
+    start = time.time()
+    sklearn_models = [linear_model.LogisticRegression(C=1e-1, solver='liblinear').fit(x_train, y_train) for x_train, y_train, x_test in problems[situation]]
+    sklearn_seconds = time.time() - start
+    start = time.time()
+    compressed_models = [fit_counted_liblinear(*get_compressed_problem(x_train, y_train) + [1e-1]) for x_train, y_train, x_test in problems[situation]]
+    compressed_seconds = time.time() - start
+
+    enrollment_difference = 0
+    for sklearn_model, compressed_model, (x_train, y_train, x_test) in zip(sklearn_models, compressed_models, problems[situation]):
+      enrollment_difference = max(enrollment_difference, abs(sum(predict_enrollment(sklearn_model, x_test)) - sum(predict_enrollment(compressed_model, x_test))))
+    results[situation] = (sklearn_seconds, compressed_seconds, enrollment_difference)
+    print "  situation %d, %4d problems: %6.3f s sklearn, %6.3f s compressed (%.1fx), largest difference of the predicted enrollments %.1e" % (
+      situation, len(problems[situation]), sklearn_seconds, compressed_seconds, sklearn_seconds / max(compressed_seconds, 1e-9), enrollment_difference)
+  return results
@@ -0,0 +1,60 @@
+import time
+import numpy as np
+from tests.synthetic_data import *
+
+def feature_matrix_benchmark(num_students=20000, num_courses=600, num_jobs=10):
+  """
+  Times make_student_feature_data (plus the conversion to an array that sklearn does on its result)
+  against make_student_feature_matrix for every situation, on the training and testing students of
+  num_jobs (course, student semester) jobs of a synthetic dataset, and checks that they give the same
+  features. Then times building all five situations of every job from one make_student_feature_base.
+  Returns {situation: (list based seconds, matrix seconds), 'shared base': (matrix seconds for all the
+  situations, shared base seconds)}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_jobs)
+
+  # the most popular courses (desired_courses), for a window in the middle of the synthetic data
+  starting_semester = '0506FA'
+  ending_semester = '1011SP'
+  predicting_for_semester = '1112FA'
+
+  print "Feature building, %d students and %d courses, %d jobs per situation:" % (len(students), len(courses), num_jobs)
+  results = {}
+  for situation in range(5):
+    list_seconds = 0
+    matrix_seconds = 0
+    for job_no, desired_course in enumerate(desired_courses):
+      current_semester = job_no % 7
+      current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+      for is_current_student, group in [(False, past_students), (True, current_students)]:
+        start = time.time()
+        [x_vectors, y_values] = make_student_feature_data(situation, is_current_student, group, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True)
+        x_array = np.array(x_vectors, float)
+        list_seconds += time.time() - start
+
+        start = time.time()
+        [x_matrix, y_array] = make_student_feature_matrix(situation, is_current_student, group, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True)
+        matrix_seconds += time.time() - start
+
+        if hasattr(x_matrix, 'toarray'):
+          x_matrix = x_matrix.toarray()
+        if list(y_array) != y_values or (y_values and not np.array_equal(x_matrix, x_array)):
+          raise AssertionError("make_student_feature_matrix differs from make_student_feature_data for %s, situation %d" % (desired_course, situation))
+
+    results[situation] = (list_seconds, matrix_seconds)
+    print "  situation %d: %6.2f s list based, %6.2f s matrix (%.1fx)" % (situation, list_seconds, matrix_seconds, list_seconds / max(matrix_seconds, 1e-9))
+
+  shared_base_seconds = 0
+  for job_no, desired_course in enumerate(desired_courses):
+    current_semester = job_no % 7
+    current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+    start = time.time()
+    for is_current_student, group in [(False, past_students), (True, current_students)]:
+      feature_base = make_student_feature_base(is_current_student, group, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True)
+      for situation in range(5):
+        get_situation_features(feature_base, situation)
+    shared_base_seconds += time.time() - start
+  all_situations_seconds = sum(results[situation][1] for situation in range(5))
+  results['shared base'] = (all_situations_seconds, shared_base_seconds)
+  print "  all situations: %6.2f s matrix per situation, %6.2f s from a shared base (%.1fx)" % (all_situations_seconds, shared_base_seconds, all_situations_seconds / max(shared_base_seconds, 1e-9))
+  return results
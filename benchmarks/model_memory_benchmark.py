@@ -0,0 +1,55 @@
+import sys
+from tests.synthetic_data import *
+
+class DictBackedObject:
+  """ Stand-in for the models as they were before they had __slots__ """
+  pass
+
+def get_slotted_size(obj):
+  """
+  Bytes used by obj itself (not the objects its attributes point to)
+  """
+  return sys.getsizeof(obj)
+
+def get_dict_backed_size(obj):
+  """
+  Bytes that obj itself would use if it kept its attributes in a __dict__, like the old-style models did
+  """
+  plain_obj = DictBackedObject()
+  for attribute in type(obj).__slots__:
+    setattr(plain_obj, attribute, getattr(obj, attribute))
+  return sys.getsizeof(plain_obj) + sys.getsizeof(plain_obj.__dict__)
+
+def get_model_objects(students, courses, professors):
+  """
+  Dict mapping each model class name to the list of all of its objects in the dataset
+  """
+  course_offerings = []
+  for course in courses.values():
+    course_offerings.extend(course.course_offerings.values())
+  return {'Student': students.values(), 'Course': courses.values(), 'Course_Offering': course_offerings,
+          'Professor': professors.values()}
+
+def model_memory_benchmark(num_students=20000, num_courses=600):
+  """
+  Builds a synthetic dataset and prints, for each model class, the bytes used by its objects with __slots__
+  against what the same objects would use with a __dict__ each. Returns {class name: (number of objects,
+  slotted bytes, dict backed bytes)}.
+  """
+  [students, courses, professors] = make_synthetic_dataset(num_students, num_courses)
+  model_objects = get_model_objects(students, courses, professors)
+  print "Model memory, %d students and %d courses:" % (len(students), len(courses))
+
+  results = {}
+  total_slotted_size = 0
+  total_dict_backed_size = 0
+  for class_name in ['Student', 'Course', 'Course_Offering', 'Professor']:
+    objects = model_objects[class_name]
+    slotted_size = sum(get_slotted_size(obj) for obj in objects)
+    dict_backed_size = sum(get_dict_backed_size(obj) for obj in objects)
+    results[class_name] = (len(objects), slotted_size, dict_backed_size)
+    total_slotted_size += slotted_size
+    total_dict_backed_size += dict_backed_size
+    print "  %-16s %7d objects: %6.2f MB with slots, %6.2f MB with a __dict__" % (class_name, len(objects), slotted_size / 1e6, dict_backed_size / 1e6)
+  print "  %-16s %7s          %6.2f MB with slots, %6.2f MB with a __dict__" % ('Total', '', total_slotted_size / 1e6, total_dict_backed_size / 1e6)
+  return results
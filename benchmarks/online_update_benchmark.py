@@ -0,0 +1,61 @@
+import time
+import numpy as np
+from sklearn import linear_model
+from tests.synthetic_data import *
+
+def online_update_benchmark(num_students=5000, num_courses=200, num_desired_courses=5, num_windows=6):
+  """
+  Runs num_windows consecutive backtest windows of a synthetic dataset for num_desired_courses courses x 7
+  student semesters and the baseline, gender and course history models (situations 0, 1 and 3), once
+  retraining every model from scratch with sklearn's liblinear (make_logistic) and once with the online
+  models of update_online_model, which are fitted in the first window and then only updated with the new
+  students of every window after it. Prints the training time of the windows after the first one, how far
+  the online predicted enrollments are from the retrained ones, and how far both are from the actual
+  enrollments. Returns {'retrain': (seconds, enrollment error), 'online': (seconds, enrollment error),
+  'difference': mean difference of the predicted enrollments}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_desired_courses)
+  first_window = semester_ordinal('0506FA')
+  situations = [0, 1, 3]
+
+  online_models = make_online_model_store()
+  retrain_seconds = 0.0
+  online_seconds = 0.0
+  retrain_errors = []
+  online_errors = []
+  differences = []
+  for window in range(num_windows):
+    starting_semester = semester_from_ordinal(first_window + window)
+    ending_semester = semester_from_ordinal(first_window + window + 8)
+    predicting_for_semester = semester_from_ordinal(first_window + window + 9)
+    for desired_course in desired_courses:
+      for current_semester in range(7):
+        current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+        train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True, situations, True)
+        test_base = make_student_feature_base(True, current_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True, situations, False)
+        for situation in situations:
+          [x_train, y_train] = get_situation_features(train_base, situation)
+          [x_test, y_test] = get_situation_features(test_base, situation)
+          if x_train.shape[0] == 0:
+            continue
+          start = time.time()
+          retrained = linear_model.LogisticRegression(C=1e-1, solver='liblinear').fit(x_train, y_train)
+          if window > 0:
+            retrain_seconds += time.time() - start
+          start = time.time()
+          online = update_online_model(online_models, get_online_model_key(desired_course, current_semester, situation, True, 1e-1), x_train, y_train, get_online_student_ids(enrollment_index, train_base['student_codes']))
+          if window > 0:
+            online_seconds += time.time() - start
+          if window > 0 and x_test.shape[0] > 0:
+            retrained_enrollment = sum(predict_enrollment(retrained, x_test))
+            online_enrollment = sum(predict_enrollment(online, x_test))
+            retrain_errors.append(abs(retrained_enrollment - y_test.sum()))
+            online_errors.append(abs(online_enrollment - y_test.sum()))
+            differences.append(abs(online_enrollment - retrained_enrollment))
+
+  results = {'retrain': (retrain_seconds, np.mean(retrain_errors)), 'online': (online_seconds, np.mean(online_errors)), 'difference': np.mean(differences)}
+  print "Online updates, %d students, %d courses x 7 student semesters x %d situations, %d windows:" % (len(students), num_desired_courses, len(situations), num_windows)
+  print "  retrain: %6.2f s training after the first window, mean enrollment error %.2f students" % results['retrain']
+  print "  online:  %6.2f s training after the first window, mean enrollment error %.2f students (%d updates of %d rows)" % (results['online'] + (online_models['updates'], online_models['update_rows']))
+  print "  mean difference of the online and retrained predicted enrollments %.2f students" % results['difference']
+  return results
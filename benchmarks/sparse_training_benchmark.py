@@ -0,0 +1,49 @@
+import time
+import numpy as np
+from sklearn import linear_model
+from tests.synthetic_data import *
+
+def sparse_training_benchmark(num_students=20000, num_courses=3000, num_jobs=5):
+  """
+  Builds the situation 3 (course history) training and testing data of num_jobs jobs on a synthetic catalog
+  of num_courses courses, and compares the dense and the sparse csr versions of it: the memory of the
+  feature matrices, the time to fit the logistic regression and the time for predict_proba, and how far the
+  predictions differ. Returns {'dense': (bytes, fit seconds, predict seconds), 'sparse': (...)}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_jobs)
+  # current students in their first semesters, so that the jobs have testing data
+  current_semesters = [job_no % 4 for job_no in range(num_jobs)]
+
+  results = {'dense': [0, 0, 0], 'sparse': [0, 0, 0]}
+  max_prediction_difference = 0
+  densities = []
+  for job_no, desired_course in enumerate(desired_courses):
+    current_semester = current_semesters[job_no]
+    current_students, past_students = get_current_and_past_students(students, '1011SP', current_semester, cohort_index)
+    train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', True, [3], True)
+    test_base = make_student_feature_base(True, current_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', True, [3], True)
+    [x_train, y_train] = get_situation_features(train_base, 3, max_sparse_density=1)
+    [x_test, y_test] = get_situation_features(test_base, 3, max_sparse_density=1)
+    if x_test.shape[0] == 0:
+      continue
+    densities.append(get_density(x_train))
+
+    predictions = {}
+    for matrix_format, convert in [('dense', lambda x: x.toarray()), ('sparse', lambda x: x)]:
+      x_train_converted = convert(x_train)
+      x_test_converted = convert(x_test)
+      results[matrix_format][0] += get_data_nbytes(x_train_converted) + get_data_nbytes(x_test_converted)
+      start = time.time()
+      logistic = linear_model.LogisticRegression(C=1e-1, solver='liblinear')
+      logistic.fit(x_train_converted, y_train)
+      results[matrix_format][1] += time.time() - start
+      start = time.time()
+      predictions[matrix_format] = predict_enrollment(logistic, x_test_converted)
+      results[matrix_format][2] += time.time() - start
+    max_prediction_difference = max([max_prediction_difference] + list(np.abs(np.subtract(predictions['dense'], predictions['sparse']))))
+
+  print "Course history features, %d students and %d courses, %d jobs (mean density %.4f):" % (len(students), len(courses), num_jobs, np.mean(densities))
+  for matrix_format in ['dense', 'sparse']:
+    print "  %-6s %8.1f MB, %6.2f s fit, %6.3f s predict" % (matrix_format, results[matrix_format][0] / 1e6, results[matrix_format][1], results[matrix_format][2])
+  print "  largest difference in the predicted probabilities: %g" % max_prediction_difference
+  return {matrix_format: tuple(results[matrix_format]) for matrix_format in results}
@@ -0,0 +1,53 @@
+import numpy as np
+from tests.synthetic_data import *
+
+def warm_start_benchmark(num_students=5000, num_courses=200, num_desired_courses=5, num_windows=6):
+  """
+  Fits the training data of the situations that are warm started (0-2, with up to MAX_EXACT_NEWTON_COEFS
+  coefficients, and the made up prereg data of add_synthetic_prereg_data) of num_desired_courses courses x 7
+  student semesters for num_windows consecutive backtest windows of a synthetic dataset, once with every
+  window starting from zero and once starting every window from the coefficients of the window before
+  (fit_warm_started_logistic). The course history models are fitted from zero with make_logistic either way.
+  Prints the Newton iterations and fitting time of both, and the largest difference of the probabilities.
+  Returns {'cold': (iterations, seconds), 'warm': (iterations, seconds), 'difference': largest difference}.
+  """
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students, num_courses, num_desired_courses)
+  first_window = semester_ordinal('0506FA')
+  add_synthetic_prereg_data(courses, desired_courses, '0506FA', semester_from_ordinal(first_window + num_windows + 8))
+
+  all_warm_starts = {'cold': make_warm_starts(), 'warm': make_warm_starts()}
+  max_difference = 0
+  for window in range(num_windows):
+    starting_semester = semester_from_ordinal(first_window + window)
+    ending_semester = semester_from_ordinal(first_window + window + 8)
+    predicting_for_semester = semester_from_ordinal(first_window + window + 9)
+    problems = dict((situation, ([], [], [])) for situation in range(3))
+    for desired_course in desired_courses:
+      for current_semester in range(7):
+        current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+        train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, True, range(3), True)
+        for situation in range(3):
+          [x_train, y_train] = get_situation_features(train_base, situation)
+          if x_train.shape[0] > 0:
+            problems[situation][0].append(get_warm_start_key(desired_course, current_semester, situation))
+            problems[situation][1].append(x_train)
+            problems[situation][2].append(y_train)
+
+    # the cold fits keep no coefficients from one window to the next
+    all_warm_starts['cold']['coefs'] = {}
+    for situation in range(3):
+      [keys, x_list, y_list] = problems[situation]
+      cold_models = fit_warm_started_logistic(all_warm_starts['cold'], keys, x_list, y_list)
+      warm_models = fit_warm_started_logistic(all_warm_starts['warm'], keys, x_list, y_list)
+      for cold_model, warm_model, x_train in zip(cold_models, warm_models, x_list):
+        max_difference = max(max_difference, np.abs(cold_model.predict_proba(x_train) - warm_model.predict_proba(x_train)).max())
+
+  print "Warm starts, %d students, %d courses x 7 student semesters x 3 situations, %d windows:" % (len(students), num_desired_courses, num_windows)
+  results = {'difference': max_difference}
+  for name in ['cold', 'warm']:
+    warm_starts = all_warm_starts[name]
+    results[name] = (warm_starts['warm_iterations'] + warm_starts['cold_iterations'], warm_starts['fit_seconds'])
+    print "  %s: %5d Newton iterations (%d fits started warm), %6.2f s fitting" % (name, results[name][0], warm_starts['warm_fits'], results[name][1])
+  print "  %.0f%% fewer iterations, %.0f%% less time, largest difference in the probabilities %.1e" % (
+    100 * (1 - float(results['warm'][0]) / max(results['cold'][0], 1)), 100 * (1 - results['warm'][1] / max(results['cold'][1], 1e-9)), max_difference)
+  return results
@@ -1,5 +1,20 @@
 from analyze_predictions import *
+from batch_logistic import *
+from cohort_index import *
+from enrollment_distribution import *
+from enrollment_index import *
 from make_train_test_data import *
+from match_prereg_data import *
 from parse_course_data import *
+from parse_course_columns import *
+from pickle_files import *
 from predict import *
-from store_simulation_data import * 
\ No newline at end of file
+from shared_dataset import *
+from snapshot_cache import *
+from stream_course_data import *
+from store_simulation_data import *
+from train_test_cache import *
+from warm_start import *
+from c_selection import *
+from online_models import *
+from model_store import *
\ No newline at end of file
@@ -0,0 +1,464 @@
+import numpy as np
+import scipy.sparse
+from scipy.special import expit
+from sklearn import linear_model
+
+# above this many coefficients per problem (features plus intercept) the Newton steps are found with
+# conjugate gradients on Hessian-vector products instead of with the full Hessian of every problem
+MAX_EXACT_NEWTON_COEFS = 8
+# fit_compressed_logistic fits the problems with at most this many distinct rows on the distinct rows only
+MAX_COMPRESSED_ROWS = 64
+
+class BatchLogistic(object):
+  """
+  One fitted problem of fit_batch_logistic. It has the parts of sklearn's LogisticRegression that the rest
+  of the code uses (coef_, intercept_, classes_, n_iter_, decision_function, predict_proba and predict), so
+  it can go anywhere a fitted LogisticRegression goes, e.g. predict_enrollment.
+  """
+
+  def __init__(self, coef, intercept, n_iter):
+    self.coef_ = coef.reshape(1, -1)
+    self.intercept_ = np.array([intercept])
+    self.classes_ = np.array([0, 1])
+    self.n_iter_ = np.array([n_iter])
+
+  def decision_function(self, x_test):
+    if scipy.sparse.issparse(x_test):
+      return x_test.dot(self.coef_[0]) + self.intercept_[0]
+    return np.dot(np.asarray(x_test, float).reshape(-1, self.coef_.shape[1]), self.coef_[0]) + self.intercept_[0]
+
+  def predict_proba(self, x_test):
+    prob = expit(self.decision_function(x_test))
+    return np.column_stack([1 - prob, prob])
+
+  def predict(self, x_test):
+    return (self.decision_function(x_test) > 0).astype(int)
+
+def make_batch_design(x_list, fit_intercept):
+  """
+  Stacks the design matrices of x_list (lists of feature vectors, numpy arrays or scipy sparse matrices,
+  all with the same number of columns) into one design for fit_batch_logistic. The coefficients of all the
+  problems are one flat vector, problem p has the coefficients p * num_coefs to (p + 1) * num_coefs, and
+  the design is a dict of
+    num_problems, num_coefs: the number of problems and of coefficients of every problem (the features,
+      plus the intercept with fit_intercept, which is a column of ones like liblinear's intercept_scaling = 1)
+    row_problems: the problem of every row
+    problem_rows: (problems x rows) csr matrix with a one for every row of every problem
+    dense_rows: (rows x num_coefs) the rows, if there are at most MAX_EXACT_NEWTON_COEFS coefficients
+    matvec: function of the coefficients, returns the margin (x . w + b) of every row
+    rmatvec: function of a value for every row, returns the sum of value * x of every problem's rows
+  """
+  num_features = None
+  blocks = []
+  for x_train in x_list:
+    if not scipy.sparse.issparse(x_train):
+      x_train = np.asarray(x_train, float)
+      if x_train.ndim < 2:
+        # an empty list
+        x_train = x_train.reshape(0, num_features or 0)
+    if x_train.shape[0] == 0:
+      continue
+    if num_features is None:
+      num_features = x_train.shape[1]
+    elif x_train.shape[1] != num_features:
+      raise ValueError("fit_batch_logistic needs problems with the same columns, got %d and %d" % (num_features, x_train.shape[1]))
+    blocks.append(x_train)
+  num_features = num_features or 0
+  num_coefs = num_features + bool(fit_intercept)
+  num_problems = len(x_list)
+  row_problems = np.repeat(np.arange(num_problems), [np.shape(x_train)[0] if np.ndim(x_train) == 2 or scipy.sparse.issparse(x_train) else 0 for x_train in x_list])
+  num_rows = len(row_problems)
+
+  if any(scipy.sparse.issparse(block) for block in blocks):
+    rows = scipy.sparse.vstack(blocks + [scipy.sparse.csr_matrix((0, num_features))], 'csr')
+  else:
+    rows = np.vstack(blocks + [np.zeros((0, num_features))])
+  if fit_intercept:
+    if scipy.sparse.issparse(rows):
+      rows = scipy.sparse.hstack([rows, np.ones((num_rows, 1))], 'csr')
+    else:
+      rows = np.hstack([rows, np.ones((num_rows, 1))])
+
+  design = {'num_problems': num_problems, 'num_coefs': num_coefs, 'row_problems': row_problems,
+            'problem_rows': scipy.sparse.csr_matrix((np.ones(num_rows), (row_problems, np.arange(num_rows))), shape=(num_problems, num_rows))}
+  if num_coefs <= MAX_EXACT_NEWTON_COEFS:
+    # the rows of all the problems line up, so the products are over the dense rows
+    dense_rows = rows.toarray() if scipy.sparse.issparse(rows) else rows
+    design['dense_rows'] = dense_rows
+    design['matvec'] = lambda coefs: np.einsum('ij,ij->i', dense_rows, coefs.reshape(num_problems, num_coefs)[row_problems])
+    design['rmatvec'] = lambda row_values: design['problem_rows'].dot(dense_rows * row_values[:, np.newaxis]).ravel()
+  else:
+    # block diagonal: the columns of every row moved to the coefficients of its problem
+    rows = scipy.sparse.csr_matrix(rows)
+    row_lengths = np.diff(rows.indptr)
+    block_matrix = scipy.sparse.csr_matrix((rows.data, rows.indices + np.repeat(row_problems * num_coefs, row_lengths), rows.indptr),
+                                           shape=(num_rows, num_problems * num_coefs))
+    block_matrix_t = block_matrix.T.tocsr()
+    design['matvec'] = block_matrix.dot
+    design['rmatvec'] = block_matrix_t.dot
+  return design
+
+def fit_batch_logistic(x_list, y_list, c_value=1e-1, sample_weights=None, fit_intercept=True, penalize_intercept=True, tol=1e-8, max_iter=100, initial_coefs=None):
+  """
+  Fits one L2 regularized logistic regression per problem, for all of the problems at once: problem p has
+  the features x_list[p] and the labels y_list[p] (0 or 1), and minimizes
+    0.5 * |w|^2 + c_value * sum over its rows of sample_weight * log(1 + exp(-y * (w . x + b)))
+  which is what make_logistic fits (sklearn's liblinear solver): with penalize_intercept the intercept b is
+  in the penalty too, like liblinear does, without it the intercept isn't penalized (like sklearn's other
+  solvers).
+  All the problems take Newton steps together: the rows of all the problems are stacked into one block
+  diagonal matrix, so the gradients and Hessian-vector products of every problem come from a couple of
+  sparse matrix products per step instead of a Python loop over the problems. Problems with up to
+  MAX_EXACT_NEWTON_COEFS coefficients solve their full Hessians (batched np.linalg.solve), bigger ones use
+  conjugate gradients. Every problem has its own step size and stops on its own once the norm of its
+  gradient is at most tol (relative to the gradient at zero).
+  x_list: list of design matrices (lists of feature vectors, numpy arrays or scipy sparse matrices) with
+    the same number of columns
+  c_value: the C of all the problems, or a list with the C of every problem
+  sample_weights: (optional) list of the row weights of every problem
+  initial_coefs: (optional) (problems x coefficients) starting point, e.g. the coefficients of a similar
+    earlier fit, the coefficients are [coef..., intercept] like the coefs of the return value
+  return values:
+    models: list of a fitted BatchLogistic for every problem
+  """
+  design = make_batch_design(x_list, fit_intercept)
+  num_problems = design['num_problems']
+  num_coefs = design['num_coefs']
+  row_problems = design['row_problems']
+  # liblinear's labels are -1 and 1
+  labels = np.concatenate([np.asarray(y_train, float).ravel() for y_train in y_list] + [np.zeros(0)]) * 2 - 1
+  if sample_weights is None:
+    weights = np.ones(len(labels))
+  else:
+    weights = np.concatenate([np.asarray(sample_weight, float).ravel() for sample_weight in sample_weights] + [np.zeros(0)])
+  # one C for all the problems, or one per problem
+  row_weights = np.broadcast_to(np.asarray(c_value, float), (num_problems,))[row_problems] * weights
+
+  # the penalty of every coefficient, 0 for an unpenalized intercept
+  penalty = np.ones((num_problems, num_coefs))
+  if fit_intercept and not penalize_intercept:
+    penalty[:, -1] = 0
+  penalty = penalty.ravel()
+
+  def problem_sums(vector):
+    return vector.reshape(num_problems, num_coefs).sum(1)
+
+  def get_objective(coefs, margins):
+    losses = np.bincount(row_problems, row_weights * np.logaddexp(0, -labels * margins), minlength=num_problems)
+    return losses + 0.5 * problem_sums(penalty * coefs * coefs)
+
+  coefs = np.zeros(num_problems * num_coefs)
+  if initial_coefs is not None:
+    coefs = np.array(initial_coefs, float).ravel()
+  problem_iterations = np.zeros(num_problems, np.int64)
+  # stop relative to the gradient at zero, which doesn't depend on the starting point
+  initial_gradient_norms = np.sqrt(problem_sums(design['rmatvec'](row_weights * -0.5 * labels) ** 2))
+  active = np.ones(num_problems, bool)
+  margins = design['matvec'](coefs)
+  objective = get_objective(coefs, margins)
+  for iteration in range(max_iter):
+    probabilities = expit(labels * margins)
+    gradient = penalty * coefs + design['rmatvec'](row_weights * (probabilities - 1) * labels)
+    active &= np.sqrt(problem_sums(gradient ** 2)) > tol * np.maximum(initial_gradient_norms, 1e-12)
+    if not active.any():
+      break
+    problem_iterations += active
+    hessian_weights = row_weights * probabilities * (1 - probabilities)
+
+    if 'dense_rows' in design:
+      direction = get_exact_newton_direction(design, hessian_weights, penalty, gradient)
+    else:
+      direction = get_conjugate_gradient_direction(design, hessian_weights, penalty, gradient, active)
+    direction.reshape(num_problems, num_coefs)[~active] = 0
+
+    # backtracking line search of every problem, the margins along the direction only take one product
+    direction_margins = design['matvec'](direction)
+    slope = problem_sums(gradient * direction)
+    step_sizes = np.ones(num_problems)
+    # close to the optimum the decrease is below the rounding error of the objective, and the full Newton
+    # step is taken without a search
+    searching = active & (-slope > 1e-12 * np.abs(objective))
+    for halving in range(30):
+      new_objective = get_objective(coefs + np.repeat(step_sizes, num_coefs) * direction, margins + step_sizes[row_problems] * direction_margins)
+      searching &= new_objective > objective + 1e-4 * step_sizes * slope
+      if not searching.any():
+        break
+      step_sizes[searching] *= 0.5
+    step_sizes[searching] = 0
+    objective = np.where(searching, objective, new_objective)
+    coefs = coefs + np.repeat(step_sizes, num_coefs) * direction
+    margins = margins + step_sizes[row_problems] * direction_margins
+    active &= step_sizes > 0
+
+  coefs = coefs.reshape(num_problems, num_coefs)
+  models = []
+  for problem in range(num_problems):
+    if fit_intercept:
+      models.append(BatchLogistic(coefs[problem, :-1], coefs[problem, -1], problem_iterations[problem]))
+    else:
+      models.append(BatchLogistic(coefs[problem], 0.0, problem_iterations[problem]))
+  return models
+
+def get_exact_newton_direction(design, hessian_weights, penalty, gradient):
+  """
+  Newton direction of every problem from its full (coefficients x coefficients) Hessian, the Hessians of all
+  the problems are summed up from the outer products of the rows in one product
+  """
+  num_problems = design['num_problems']
+  num_coefs = design['num_coefs']
+  if 'outer_products' not in design:
+    dense_rows = design['dense_rows']
+    design['outer_products'] = (dense_rows[:, :, np.newaxis] * dense_rows[:, np.newaxis, :]).reshape(-1, num_coefs * num_coefs)
+  problem_rows = design['problem_rows']
+  weighted_rows = scipy.sparse.csr_matrix((hessian_weights, problem_rows.indices, problem_rows.indptr), shape=problem_rows.shape)
+  hessians = weighted_rows.dot(design['outer_products']).reshape(num_problems, num_coefs, num_coefs)
+  hessians += penalty.reshape(num_problems, 1, num_coefs) * np.eye(num_coefs)
+  # an unpenalized intercept of a problem with no rows (or with all of its weight on one class) would
+  # make the Hessian singular
+  hessians += 1e-12 * np.eye(num_coefs)
+  return -np.linalg.solve(hessians, gradient.reshape(num_problems, num_coefs, 1)).ravel()
+
+def get_conjugate_gradient_direction(design, hessian_weights, penalty, gradient, active, max_cg_iter=50):
+  """
+  Truncated Newton direction of every problem from conjugate gradients on the Hessian-vector products,
+  with a separate step size and stopping point for every problem (the Hessian is block diagonal, so the
+  problems are still independent)
+  """
+  num_problems = design['num_problems']
+  num_coefs = design['num_coefs']
+
+  def hessian_product(vector):
+    return penalty * vector + design['rmatvec'](hessian_weights * design['matvec'](vector.ravel())).reshape(num_problems, num_coefs)
+
+  # everything is (problems x coefficients), so that the per problem sums and scalings are along the rows
+  penalty = penalty.reshape(num_problems, num_coefs)
+  direction = np.zeros((num_problems, num_coefs))
+  residual = -gradient.reshape(num_problems, num_coefs)
+  search = residual.copy()
+  residual_norms = (residual * residual).sum(1)
+  # stop when the residual is small next to the gradient, like liblinear's trust region Newton method
+  stop_norms = (0.1 ** 2) * residual_norms
+  solving = active & (residual_norms > 0)
+  for cg_iteration in range(max_cg_iter):
+    if not solving.any():
+      break
+    product = hessian_product(search)
+    curvature = (search * product).sum(1)
+    step = np.where(solving & (curvature > 0), residual_norms / np.where(curvature > 0, curvature, 1), 0)[:, np.newaxis]
+    direction += step * search
+    residual -= step * product
+    new_residual_norms = (residual * residual).sum(1)
+    solving &= (curvature > 0) & (new_residual_norms > stop_norms)
+    beta = np.where(solving, new_residual_norms / np.where(residual_norms > 0, residual_norms, 1), 0)[:, np.newaxis]
+    search = residual + beta * search
+    residual_norms = new_residual_norms
+  return direction.ravel()
+
+def get_compressed_problem(x_train, y_train, max_unique_rows=MAX_COMPRESSED_ROWS):
+  """
+  The distinct (feature vector, label) rows of a problem and how many times each one comes up (its
+  contingency counts), or None if the problem has more than MAX_EXACT_NEWTON_COEFS coefficients or more
+  than max_unique_rows distinct rows. The logistic loss of a problem is a sum over its rows, so fitting the
+  distinct rows weighted by their counts has exactly the same optimum as fitting all of the rows.
+  return values:
+    [x_unique, y_unique, counts] or None
+  """
+  num_features = np.shape(x_train)[1] if np.ndim(x_train) == 2 or scipy.sparse.issparse(x_train) else 0
+  if num_features + 1 > MAX_EXACT_NEWTON_COEFS or np.shape(x_train)[0] == 0:
+    return None
+  if scipy.sparse.issparse(x_train):
+    x_train = x_train.toarray()
+  rows = np.ascontiguousarray(np.column_stack([np.asarray(x_train, float), np.asarray(y_train, float).ravel()]))
+  # every row as one opaque value, np.unique of those is much faster than np.unique(rows, axis=0)
+  row_keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+  unique_keys, first_rows, counts = np.unique(row_keys, return_index=True, return_counts=True)
+  if len(unique_keys) > max_unique_rows:
+    return None
+  return [rows[first_rows, :-1], rows[first_rows, -1], counts]
+
+def check_training_classes(y_train):
+  """
+  Raises the ValueError of sklearn's LogisticRegression if the labels y_train don't have both classes, so
+  that every solver refuses the problems that make_logistic can't fit
+  """
+  classes = np.unique(np.asarray(y_train).ravel())
+  if len(classes) < 2:
+    raise ValueError("This solver needs samples of at least 2 classes in the data, but the data contains only one class: %r" % (classes[0] if len(classes) else None))
+
+def fit_counted_liblinear(x_unique, y_unique, counts, c_value=1e-1, tol=1e-4):
+  """
+  sklearn's LogisticRegression (liblinear) fitted on the distinct rows of a problem weighted by their counts
+  (see get_compressed_problem), which is the fit of make_logistic on all of the rows, to the rounding error.
+  liblinear stops once the norm of the gradient is at most tol * max(min(positives, negatives), 1) / rows
+  of the gradient at zero, so the tol of the distinct rows is scaled for them to stop where all of the rows
+  would have: the gradients are the same, only the rows and the class counts differ.
+  Like LogisticRegression it raises a ValueError if y_unique has a single class.
+  return values:
+    logistic: a fitted LogisticRegression
+  """
+  y_unique = np.asarray(y_unique, float)
+  counts = np.asarray(counts, float)
+  positives = counts[y_unique == 1].sum()
+  unique_positives = (y_unique == 1).sum()
+  all_rows_tol = tol * max(min(positives, counts.sum() - positives), 1) / counts.sum()
+  unique_rows_tol = all_rows_tol * len(y_unique) / max(min(unique_positives, len(y_unique) - unique_positives), 1)
+  logistic = linear_model.LogisticRegression(C=c_value, solver='liblinear', tol=unique_rows_tol)
+  logistic.fit(x_unique, y_unique.astype(int), sample_weight=counts)
+  return logistic
+
+def fit_compressed_logistic(x_list, y_list, c_value=1e-1, max_unique_rows=MAX_COMPRESSED_ROWS, initial_coefs=None):
+  """
+  fit_batch_logistic of the problems of x_list and y_list, but every problem with few distinct rows (like
+  the baseline, gender and prereg models, see get_compressed_problem) is fitted on its distinct rows
+  weighted by their counts, which takes a handful of rows instead of every student. The other problems
+  are fitted on all of their rows. The fits are the same either way, to the tolerance of fit_batch_logistic.
+  c_value: the C of all the problems, or a list with the C of every problem
+  initial_coefs: (optional) the starting point of fit_batch_logistic
+  return values:
+    models: list of a fitted BatchLogistic for every problem
+  """
+  c_values = list(np.broadcast_to(np.asarray(c_value, float), (len(x_list),)))
+  if initial_coefs is not None:
+    initial_coefs = np.asarray(initial_coefs, float)
+  compressed_problems = [get_compressed_problem(x_train, y_train, max_unique_rows) for x_train, y_train in zip(x_list, y_list)]
+  compressed = [problem for problem in range(len(x_list)) if compressed_problems[problem] is not None]
+  uncompressed = [problem for problem in range(len(x_list)) if compressed_problems[problem] is None]
+
+  models = [None] * len(x_list)
+  if compressed:
+    compressed_models = fit_batch_logistic([compressed_problems[problem][0] for problem in compressed], [compressed_problems[problem][1] for problem in compressed],
+                                           [c_values[problem] for problem in compressed], sample_weights=[compressed_problems[problem][2] for problem in compressed],
+                                           initial_coefs=None if initial_coefs is None else initial_coefs[compressed])
+    for problem, logistic in zip(compressed, compressed_models):
+      models[problem] = logistic
+  if uncompressed:
+    uncompressed_models = fit_batch_logistic([x_list[problem] for problem in uncompressed], [y_list[problem] for problem in uncompressed], [c_values[problem] for problem in uncompressed],
+                                             initial_coefs=None if initial_coefs is None else initial_coefs[uncompressed])
+    for problem, logistic in zip(uncompressed, uncompressed_models):
+      models[problem] = logistic
+  return models
+
+def fit_shared_design_logistic(x_shared, y_matrix, weight_matrix, c_value=1e-1, problem_columns=None, problem_column_rows=None, column_masks=None, tol=1e-6, max_iter=100):
+  """
+  Fits one L2 regularized logistic regression per problem, like fit_batch_logistic, for problems that all
+  have the same rows x_shared (e.g. the course history design of one cohort, which doesn't depend on the
+  course being predicted) and only differ by their labels, their row weights and a few columns:
+    y_matrix: (rows x problems) labels (0 or 1) of every row for every problem
+    weight_matrix: (rows x problems) weight of every row in every problem, 0 for the rows a problem leaves out
+    problem_columns: (optional) (problems x k) values of k columns of every problem that are the same for
+      every row (e.g. the prereg data of the course), multiplied by problem_column_rows (rows, by default
+      all ones) so that they can be left at 0 for some rows (e.g. the dummy students). These columns come
+      after the columns of x_shared.
+    column_masks: (optional) (problems x columns of x_shared) True for the columns a problem doesn't have
+      (e.g. the course's own course history column), their coefficients stay at 0, which is the same fit
+      as without the column
+  The margins of all the problems come from one product of x_shared with the (columns x problems) matrix
+  of the coefficients, instead of one product per problem, so the products cost as much as the design
+  times the number of problems without ever building a design per problem. The Newton steps are found
+  with conjugate gradients (get_conjugate_gradient_direction), every problem stops on its own once the norm
+  of its gradient is at most tol (relative to the gradient at zero), the default tol gets the predictions
+  about as close to the optimum as make_logistic's liblinear. The intercept is penalized, like liblinear
+  does.
+  c_value: the C of all the problems, or a list with the C of every problem
+  return values:
+    models: list of a fitted BatchLogistic for every problem, with the coefficients of the columns of
+      x_shared followed by those of problem_columns
+  """
+  num_rows, num_shared = x_shared.shape
+  num_problems = np.shape(y_matrix)[1]
+  if problem_columns is None:
+    problem_columns = np.zeros((num_problems, 0))
+  problem_columns = np.asarray(problem_columns, float)
+  if problem_column_rows is None:
+    problem_column_rows = np.ones(num_rows)
+  num_coefs = num_shared + problem_columns.shape[1] + 1
+  coef_mask = np.ones((num_problems, num_coefs))
+  if column_masks is not None:
+    coef_mask[:, :num_shared] = ~np.asarray(column_masks, bool)
+
+  # liblinear's labels are -1 and 1
+  labels = np.asarray(y_matrix, float) * 2 - 1
+  row_weights = np.asarray(weight_matrix, float) * np.broadcast_to(np.asarray(c_value, float), (num_problems,))
+  x_shared_t = x_shared.T.tocsr() if scipy.sparse.issparse(x_shared) else np.asarray(x_shared, float).T
+
+  def matvec(coefs):
+    # (rows x problems) margins of the (problems x coefficients) coefficients
+    coefs = coefs.reshape(num_problems, num_coefs)
+    shift = (problem_columns * coefs[:, num_shared:-1]).sum(1)
+    return np.asarray(x_shared.dot(coefs[:, :num_shared].T)) + problem_column_rows[:, np.newaxis] * shift + coefs[:, -1]
+
+  def rmatvec(row_values):
+    # (problems x coefficients) sums of row_values * x of every problem
+    row_values = row_values.reshape(num_rows, num_problems)
+    products = np.empty((num_problems, num_coefs))
+    products[:, :num_shared] = np.asarray(x_shared_t.dot(row_values)).T
+    products[:, num_shared:-1] = problem_columns * problem_column_rows.dot(row_values)[:, np.newaxis]
+    products[:, -1] = row_values.sum(0)
+    return (coef_mask * products).ravel()
+
+  design = {'num_problems': num_problems, 'num_coefs': num_coefs, 'matvec': lambda coefs: matvec(coefs).ravel(), 'rmatvec': rmatvec}
+  labels = labels.ravel()
+  row_weights = row_weights.ravel()
+  penalty = np.ones(num_problems * num_coefs)
+
+  def get_objective(coefs, margins):
+    losses = (row_weights * np.logaddexp(0, -labels * margins)).reshape(num_rows, num_problems).sum(0)
+    return losses + 0.5 * (coefs * coefs).reshape(num_problems, num_coefs).sum(1)
+
+  def problem_sums(vector):
+    return vector.reshape(num_problems, num_coefs).sum(1)
+
+  coefs = np.zeros(num_problems * num_coefs)
+  problem_iterations = np.zeros(num_problems, np.int64)
+  initial_gradient_norms = np.sqrt(problem_sums(rmatvec(row_weights * -0.5 * labels) ** 2))
+  active = np.ones(num_problems, bool)
+  margins = design['matvec'](coefs)
+  objective = get_objective(coefs, margins)
+  for iteration in range(max_iter):
+    probabilities = expit(labels * margins)
+    gradient = penalty * coefs + rmatvec(row_weights * (probabilities - 1) * labels)
+    active &= np.sqrt(problem_sums(gradient ** 2)) > tol * np.maximum(initial_gradient_norms, 1e-12)
+    if not active.any():
+      break
+    problem_iterations += active
+    hessian_weights = row_weights * probabilities * (1 - probabilities)
+    direction = get_conjugate_gradient_direction(design, hessian_weights, penalty, gradient, active)
+    direction.reshape(num_problems, num_coefs)[~active] = 0
+
+    # backtracking line search of every problem, like fit_batch_logistic
+    direction_margins = design['matvec'](direction)
+    slope = problem_sums(gradient * direction)
+    step_sizes = np.ones(num_problems)
+    searching = active & (-slope > 1e-12 * np.abs(objective))
+    for halving in range(30):
+      new_objective = get_objective(coefs + np.repeat(step_sizes, num_coefs) * direction, margins + np.tile(step_sizes, num_rows) * direction_margins)
+      searching &= new_objective > objective + 1e-4 * step_sizes * slope
+      if not searching.any():
+        break
+      step_sizes[searching] *= 0.5
+    step_sizes[searching] = 0
+    objective = np.where(searching, objective, new_objective)
+    coefs = coefs + np.repeat(step_sizes, num_coefs) * direction
+    margins = margins + np.tile(step_sizes, num_rows) * direction_margins
+    active &= step_sizes > 0
+
+  coefs = coefs.reshape(num_problems, num_coefs)
+  return [BatchLogistic(coefs[problem, :-1], coefs[problem, -1], problem_iterations[problem]) for problem in range(num_problems)]
+
+def get_shared_design_probabilities(models, x_shared, problem_columns=None, problem_column_rows=None):
+  """
+  The (rows x problems) probabilities of the models of fit_shared_design_logistic for the rows x_shared
+  (with the problem_columns and problem_column_rows of those rows, see fit_shared_design_logistic), from
+  one product for all of the problems
+  """
+  num_rows, num_shared = x_shared.shape
+  if not models:
+    return np.zeros((num_rows, 0))
+  coefs = np.vstack([np.append(logistic.coef_[0], logistic.intercept_) for logistic in models])
+  margins = np.asarray(x_shared.dot(coefs[:, :num_shared].T)) + coefs[:, -1]
+  if problem_columns is not None:
+    if problem_column_rows is None:
+      problem_column_rows = np.ones(num_rows)
+    shift = (np.asarray(problem_columns, float).reshape(len(models), -1) * coefs[:, num_shared:-1]).sum(1)
+    margins += problem_column_rows[:, np.newaxis] * shift
+  return expit(margins)
@@ -0,0 +1,93 @@
+import numpy as np
+from batch_logistic import *
+from pickle_files import *
+
+# the C of the models before there was any C selection
+DEFAULT_C_VALUE = 1e-1
+# the C values tried by hand in results/c_value_choosing.xlsx
+C_VALUE_CANDIDATES = [1e-3, 1e-2, 1e-1, 1e0, 1e1, 1e2, 1e3, 1e4, 1e5]
+
+def fit_regularization_path(x_list, y_list, c_values=C_VALUE_CANDIDATES):
+  """
+  fit_batch_logistic of every problem of x_list and y_list for every C in c_values. The C values are fitted
+  from the smallest to the biggest, each one starting from the coefficients of the one before, which are
+  close (the coefficients only grow a bit from one C to the next).
+  return values:
+    path: list with the list of fitted BatchLogistic of every problem for every C of c_values (in the
+      order of c_values)
+  """
+  path = [None] * len(c_values)
+  initial_coefs = None
+  for c_no in sorted(range(len(c_values)), key=lambda c_no: c_values[c_no]):
+    models = fit_batch_logistic(x_list, y_list, c_values[c_no], initial_coefs=initial_coefs)
+    initial_coefs = [np.append(model.coef_[0], model.intercept_) for model in models]
+    path[c_no] = models
+  return path
+
+def get_log_loss(logistic, x_test, y_test):
+  """
+  Sum of the log loss of the predicted probabilities of x_test, for the labels y_test (0 or 1)
+  """
+  if np.shape(x_test)[0] == 0:
+    return 0.0
+  probabilities = np.clip(logistic.predict_proba(x_test)[:, 1], 1e-15, 1 - 1e-15)
+  y_test = np.asarray(y_test, float).ravel()
+  return -np.sum(y_test * np.log(probabilities) + (1 - y_test) * np.log(1 - probabilities))
+
+def get_path_scores(x_list, y_list, validation_x_list, validation_y_list, c_values=C_VALUE_CANDIDATES):
+  """
+  Fits the regularization path of the problems of x_list and y_list and scores every C by the log loss on
+  the validation data of every problem (validation_x_list and validation_y_list), added up over the problems.
+  Every problem should be validated on students that come after the ones it is trained on, like the
+  training and testing data of a backtest window.
+  return values:
+    scores: array with the total validation log loss of every C of c_values (lower is better)
+  """
+  scores = np.zeros(len(c_values))
+  path = fit_regularization_path(x_list, y_list, c_values)
+  for c_no, models in enumerate(path):
+    for logistic, x_test, y_test in zip(models, validation_x_list, validation_y_list):
+      scores[c_no] += get_log_loss(logistic, x_test, y_test)
+  return scores
+
+def make_c_store(filepath=None):
+  """
+  Returns the store of the chosen C values, loaded from filepath if there is one (see save_c_store), as a
+  dict with:
+    filepath: where save_c_store writes it
+    c_values: dict mapping (desired_course, situation) to the chosen C
+    scores: dict mapping (desired_course, situation) to the validation scores of C_VALUE_CANDIDATES
+  """
+  c_store = None if filepath is None else load_pickle(filepath)
+  if c_store is not None:
+    c_store['filepath'] = filepath
+    return c_store
+  return {'filepath': filepath, 'c_values': {}, 'scores': {}}
+
+def save_c_store(c_store):
+  """
+  Writes c_store to its filepath (if it has one)
+  """
+  if c_store['filepath'] is not None:
+    save_pickle_atomically(c_store, c_store['filepath'])
+
+def get_c_value(c_store, desired_course, situation):
+  """
+  The C chosen for the model of situation for desired_course, DEFAULT_C_VALUE if there is no c_store or
+  no C was chosen for it
+  """
+  if c_store is None:
+    return DEFAULT_C_VALUE
+  return c_store['c_values'].get((desired_course, situation), DEFAULT_C_VALUE)
+
+def store_c_scores(c_store, desired_course, situation, scores, c_values=C_VALUE_CANDIDATES):
+  """
+  Stores the validation scores of c_values for the model of situation for desired_course, and the C with
+  the best (lowest) score as its chosen C. Without scores (no data to choose on) the chosen C is
+  DEFAULT_C_VALUE.
+  """
+  c_store['scores'][(desired_course, situation)] = scores
+  if scores is None:
+    c_store['c_values'][(desired_course, situation)] = DEFAULT_C_VALUE
+  else:
+    c_store['c_values'][(desired_course, situation)] = c_values[int(np.argmin(scores))]
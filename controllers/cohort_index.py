@@ -0,0 +1,109 @@
+import numpy as np
+from enrollment_index import *
+
+def make_cohort_index(students, enrollment_index=None):
+    """
+    Builds an index for get_current_and_past_students so that it doesn't have to scan every student and
+    every course offering on each call. The index is a dict:
+        students: the students dict it was built for
+        student_ids: list of student ids, by student code (from the enrollment index)
+        current_student_codes: dict mapping (semester ordinal, student semester) to the sorted codes of the
+            students that took a course in that semester in that student semester
+        past_order: student codes sorted by the semester ordinal of the first course they took
+        past_first_ordinals: semester ordinal of the first course taken by each student in past_order
+        results: the results of the queries so far, keyed by (semester, student semester)
+    enrollment_index: the make_enrollment_index of students, built here if it isn't given
+    """
+    if enrollment_index is None:
+        courses = {}
+        for student in students.values():
+            for semester_course_offerings in student.list_of_course_offerings:
+                for course_offering in semester_course_offerings:
+                    courses[course_offering.course.course_number] = course_offering.course
+        enrollment_index = make_enrollment_index(students, courses)
+    return make_cohort_index_from_arrays(students, enrollment_index['student_ids'], get_cohort_arrays(enrollment_index))
+
+def get_cohort_arrays(enrollment_index):
+    """
+    The arrays make_cohort_index is built from, as a dict:
+        cohort_keys: the (semester ordinal * 8 + student semester) keys that have any enrollment, sorted
+        cohort_starts: where the students of each key start in cohort_student_codes (they end where the
+            next key starts)
+        cohort_student_codes: the codes of the students of every key, sorted within each key
+        past_order, past_first_ordinals: like in make_cohort_index
+    """
+    indptr = enrollment_index['enrollment_indptr']
+    enrollment_semesters = enrollment_index['enrollment_semesters'].astype(np.int64)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    entry_students = rows // 8
+    entry_student_sems = rows % 8
+    num_students = len(enrollment_index['student_ids'])
+
+    # the (semester, student semester, student) triples that have any enrollment, sorted by student within
+    # each (semester, student semester)
+    triples = np.unique((enrollment_semesters * 8 + entry_student_sems) * num_students + entry_students)
+    keys, student_codes = np.divmod(triples, num_students)
+    unique_keys, key_starts = np.unique(keys, return_index=True)
+
+    first_ordinals = np.full(num_students, np.iinfo(np.int64).max, np.int64)
+    np.minimum.at(first_ordinals, entry_students, enrollment_semesters)
+    past_order = np.argsort(first_ordinals, kind='mergesort')
+
+    return {
+        'cohort_keys': unique_keys,
+        'cohort_starts': key_starts,
+        'cohort_student_codes': student_codes,
+        'past_order': past_order,
+        'past_first_ordinals': first_ordinals[past_order]
+    }
+
+def make_cohort_index_from_arrays(students, student_ids, cohort_arrays):
+    """
+    make_cohort_index from get_cohort_arrays, the student codes of the index are views of cohort_arrays (so
+    they can be memory mapped arrays)
+    """
+    key_ends = np.append(cohort_arrays['cohort_starts'][1:], len(cohort_arrays['cohort_student_codes']))
+    current_student_codes = {}
+    for key, start, end in zip(cohort_arrays['cohort_keys'], cohort_arrays['cohort_starts'], key_ends):
+        current_student_codes[divmod(int(key), 8)] = cohort_arrays['cohort_student_codes'][start:end]
+
+    return {
+        'students': students,
+        'student_ids': student_ids,
+        'current_student_codes': current_student_codes,
+        'past_order': cohort_arrays['past_order'],
+        'past_first_ordinals': cohort_arrays['past_first_ordinals'],
+        'results': {}
+    }
+
+def query_cohort_index(cohort_index, semester, current_semester):
+    """
+    get_current_and_past_students from the cohort index, in time proportional to the size of the result.
+    Queries with the same arguments return the same dicts, which must not be changed.
+    """
+    query = (semester, current_semester)
+    if query not in cohort_index['results']:
+        ordinal = semester_ordinal(semester)
+        students = cohort_index['students']
+        student_ids = cohort_index['student_ids']
+
+        current_codes = cohort_index['current_student_codes'].get((ordinal, current_semester), np.zeros(0, np.int64))
+        num_past_students = np.searchsorted(cohort_index['past_first_ordinals'], ordinal)
+        past_codes = np.sort(cohort_index['past_order'][:num_past_students])
+
+        if hasattr(students, 'subset'):
+            # the students of an attached shared dataset (see attach_dataset), which are only made when
+            # they are looked up
+            current_students = students.subset(current_codes)
+            past_students = students.subset(past_codes)
+        else:
+            # the dicts are filled in the iteration order of students, like a scan over students would
+            current_students = {}
+            for student_code in current_codes:
+                current_students[student_ids[student_code]] = students[student_ids[student_code]]
+            past_students = {}
+            for student_code in past_codes:
+                past_students[student_ids[student_code]] = students[student_ids[student_code]]
+
+        cohort_index['results'][query] = (current_students, past_students)
+    return cohort_index['results'][query]
@@ -0,0 +1,95 @@
+import numpy as np
+
+# the quantiles of the enrollment that get_enrollment_quantiles gives by default
+ENROLLMENT_QUANTILES = [0.05, 0.5, 0.95]
+# the distributions are worked out up to this many standard deviations (plus TAIL_STUDENTS) above the mean,
+# the probability of anything above that is far below the rounding error of the rest
+TAIL_STANDARD_DEVIATIONS = 10
+TAIL_STUDENTS = 10
+# the probabilities up to this are the rounding error of the sums of the distributions
+ROUNDING_PROBABILITY = 1e-12
+
+def get_enrollment_distributions(probability_lists, max_enrollment=None):
+  """
+  The distribution of the enrollment of every course, from the probabilities of its students taking it (the
+  predict_enrollment of every student, e.g. of every student semester of the course). The students are
+  independent, so the enrollment is a sum of independent Bernoulli variables, which has a Poisson binomial
+  distribution. Its probabilities come from adding one student at a time:
+    P(k students after student i) = P(k after i - 1) * (1 - p_i) + P(k - 1 after i - 1) * p_i
+  for all of the courses at once, one student of every course per step, so the whole catalog takes as many
+  numpy operations as the course with the most students has students.
+  probability_lists: list with, for every course, a list of arrays of probabilities that are all combined
+    (e.g. one per student semester)
+  max_enrollment: (optional) the largest enrollment worked out on its own, the last column is the
+    probability of max_enrollment or more students. By default it is one past TAIL_STANDARD_DEVIATIONS
+    standard deviations plus TAIL_STUDENTS students above the largest mean (or past the most students of a
+    course), so that the last column is all but 0 (or exactly 0).
+  return values:
+    pmfs: (number of courses x max_enrollment + 1) numpy array, pmfs[i, k] is the probability that k
+      students take course i (k or more in the last column), so the mean of every row is the sum of its
+      probabilities (the forecast enrollment), up to what is in the last column
+  """
+  course_probabilities = [np.concatenate([np.ravel(np.asarray(probabilities, float)) for probabilities in probability_list] + [np.zeros(0)]) for probability_list in probability_lists]
+  num_courses = len(course_probabilities)
+  num_students = np.array([len(probabilities) for probabilities in course_probabilities], np.int64)
+  max_students = int(num_students.max()) if num_courses else 0
+  if max_enrollment is None:
+    means = np.array([probabilities.sum() for probabilities in course_probabilities])
+    standard_deviations = np.sqrt([(probabilities * (1 - probabilities)).sum() for probabilities in course_probabilities])
+    tail = np.minimum(num_students, np.ceil(means + TAIL_STANDARD_DEVIATIONS * standard_deviations + TAIL_STUDENTS))
+    max_enrollment = int(tail.max()) + 1 if num_courses else 0
+
+  # one row per student, the courses with fewer students are padded with students who never take it. The
+  # courses are along the rows (and the enrollments down the columns) so that every step works on whole
+  # contiguous rows.
+  taking_probabilities = np.zeros((max_students, num_courses))
+  for course, probabilities in enumerate(course_probabilities):
+    taking_probabilities[:len(probabilities), course] = probabilities
+  not_taking_probabilities = 1 - taking_probabilities
+
+  pmfs = np.zeros((max_enrollment + 1, num_courses))
+  pmfs[0] = 1
+  taking = np.empty_like(pmfs)
+  for student in range(max_students):
+    # after i students there are at most i of them, the rows above that are still 0
+    width = min(student + 1, max_enrollment) + 1
+    np.multiply(pmfs[:width], taking_probabilities[student], out=taking[:width])
+    np.multiply(pmfs[:width], not_taking_probabilities[student], out=pmfs[:width])
+    pmfs[1:width] += taking[:width - 1]
+    # the last row is max_enrollment or more, those students stay there whether they take it or not
+    if width == max_enrollment + 1:
+      pmfs[-1] += taking[width - 1]
+  pmfs = np.ascontiguousarray(pmfs.T)
+  return pmfs
+
+def get_enrollment_quantiles(pmfs, quantiles=ENROLLMENT_QUANTILES):
+  """
+  (number of courses x number of quantiles) numpy array of the quantiles of the enrollment distributions
+  pmfs (get_enrollment_distributions): the smallest enrollment k with P(enrollment <= k) >= q of every q
+  in quantiles. It is NaN for the quantiles in the last column of pmfs (max_enrollment or more students),
+  which are somewhere past max_enrollment: get_enrollment_distributions needs a larger max_enrollment for them.
+  """
+  # the last column is left out, the quantiles that get to it aren't known
+  cdfs = np.cumsum(pmfs[:, :-1], axis=1)
+  # the rounding error of the sums mustn't push a quantile past the enrollment it is at
+  enrollment_quantiles = np.array([(cdfs < q - ROUNDING_PROBABILITY).sum(axis=1) for q in quantiles], float).T.reshape(len(pmfs), len(quantiles))
+  enrollment_quantiles[enrollment_quantiles == pmfs.shape[1] - 1] = np.nan
+  return enrollment_quantiles
+
+def get_exceedance_probabilities(pmfs, capacities):
+  """
+  P(enrollment > capacity) of every course, from its enrollment distribution in pmfs
+  (get_enrollment_distributions) and its capacity in capacities (e.g. of its room or sections)
+  return values:
+    numpy array of the probability of every course. The capacities at or above the last column of pmfs
+    (max_enrollment or more students) go over it with at most the probability of the last column: that is
+    given where it is within the rounding error (e.g. with the default max_enrollment), and NaN where it
+    isn't, those need get_enrollment_distributions with a larger max_enrollment.
+  """
+  tails = np.cumsum(pmfs[:, ::-1], axis=1)[:, ::-1]
+  capacities = np.asarray(capacities, np.int64)
+  above = capacities + 1
+  exceedances = tails[np.arange(len(pmfs)), np.minimum(np.maximum(above, 0), pmfs.shape[1] - 1)]
+  in_tail = above >= pmfs.shape[1]
+  exceedances[in_tail & (pmfs[:, -1] > ROUNDING_PROBABILITY)] = np.nan
+  return exceedances
@@ -0,0 +1,269 @@
+import numpy as np
+import scipy.sparse
+from models import *
+
+def make_enrollment_index(students, courses):
+    """
+    Builds an index of the enrollments of students (dict mapping student id to Student) in courses (dict
+    mapping course number to Course) made of integer arrays, so that the features and labels for any
+    (course, current_semester, ending_semester) come from a few slicing and masking operations instead of
+    a walk over every student's list_of_course_offerings.
+    Students and courses are given integer codes in the iteration order of the dicts.
+    The index is a dict:
+        student_ids: list of student ids, by student code
+        student_codes: dict mapping student id to student code
+        course_numbers: list of course numbers, by course code
+        course_codes: dict mapping course number to course code
+        course_totals: total_number_of_students of every course, by course code
+        first_semester_ordinals, final_semesters: first_semester_ordinal and final_semester of every student
+        is_female: whether 'F' is in the gender of every student
+        major_names: list of all the majors in the major histories
+        major_history: (number of students x 8) major code (index into major_names) of every student in
+            every student semester, -1 where the student has no major history
+        enrollment_indptr: CSR row pointers with one row per student per student semester (row = student
+            code * 8 + student semester), so the enrollments of a row are the entries between
+            enrollment_indptr[row] and enrollment_indptr[row + 1]
+        enrollment_courses: course code of every enrollment entry
+        enrollment_semesters: semester_ordinal of every enrollment entry
+    The entries of a row are in the same order as the student's list_of_course_offerings.
+    """
+    student_ids = list(students)
+    course_numbers = list(courses)
+    course_codes = {course_no: code for code, course_no in enumerate(course_numbers)}
+    major_codes = {}
+
+    num_students = len(student_ids)
+    first_semester_ordinals = np.zeros(num_students, np.int32)
+    final_semesters = np.zeros(num_students, np.int32)
+    is_female = np.zeros(num_students, bool)
+    major_history = np.full((num_students, 8), -1, np.int32)
+    row_lengths = np.zeros(num_students * 8, np.int64)
+    enrollment_courses = []
+    enrollment_semesters = []
+
+    for student_code, stud_id in enumerate(student_ids):
+        index_student(students[stud_id], student_code, course_codes, major_codes, first_semester_ordinals, final_semesters,
+                      is_female, major_history, row_lengths, enrollment_courses, enrollment_semesters)
+
+    enrollment_indptr = np.zeros(num_students * 8 + 1, np.int64)
+    np.cumsum(row_lengths, out=enrollment_indptr[1:])
+    major_names = get_major_names(major_codes)
+
+    return {
+        'student_ids': student_ids,
+        'student_codes': {stud_id: code for code, stud_id in enumerate(student_ids)},
+        'course_numbers': course_numbers,
+        'course_codes': course_codes,
+        'course_totals': np.array([courses[course_no].total_number_of_students for course_no in course_numbers], np.int64),
+        'first_semester_ordinals': first_semester_ordinals,
+        'final_semesters': final_semesters,
+        'is_female': is_female,
+        'major_names': major_names,
+        'major_history': major_history,
+        'enrollment_indptr': enrollment_indptr,
+        'enrollment_courses': np.array(enrollment_courses, np.int32),
+        'enrollment_semesters': np.array(enrollment_semesters, np.int32)
+    }
+
+def index_student(student, student_code, course_codes, major_codes, first_semester_ordinals, final_semesters, is_female, major_history, row_lengths, enrollment_courses, enrollment_semesters):
+    """
+    Fills in the entries of student (with the code student_code) in the arrays of make_enrollment_index, and
+    appends its enrollments to the lists enrollment_courses and enrollment_semesters. The majors that aren't
+    in major_codes yet are added to it.
+    """
+    first_semester_ordinals[student_code] = student.first_semester_ordinal
+    final_semesters[student_code] = student.final_semester
+    is_female[student_code] = 'F' in student.gender
+    major_history[student_code] = -1
+    for student_sem, major in student.major_history.items():
+        if 0 <= student_sem < 8:
+            major_history[student_code, student_sem] = major_codes.setdefault(major, len(major_codes))
+    for student_sem, semester_course_offerings in enumerate(student.list_of_course_offerings):
+        row_lengths[student_code * 8 + student_sem] = len(semester_course_offerings)
+        for course_offering in semester_course_offerings:
+            enrollment_courses.append(course_codes[course_offering.course.course_number])
+            enrollment_semesters.append(course_offering.semester_ordinal)
+
+def get_major_names(major_codes):
+    major_names = [None] * len(major_codes)
+    for major, code in major_codes.items():
+        major_names[code] = major
+    return major_names
+
+def update_enrollment_index(enrollment_index, students, courses, affected_students):
+    """
+    The make_enrollment_index of students and courses after add_course_data merged new rows into them, from
+    the index of before: only the students of the new rows (affected_students, what add_course_data returns)
+    are indexed again, the enrollments of the others are copied over as they are. The new students and
+    courses get the codes after the old ones, so the codes of the old students and courses stay the same.
+    Returns the new index, enrollment_index isn't changed.
+    """
+    student_ids = enrollment_index['student_ids'] + [stud_id for stud_id in affected_students if stud_id not in enrollment_index['student_codes']]
+    course_numbers = enrollment_index['course_numbers'] + [course_no for course_no in courses if course_no not in enrollment_index['course_codes']]
+    student_codes = {stud_id: code for code, stud_id in enumerate(student_ids)}
+    course_codes = {course_no: code for code, course_no in enumerate(course_numbers)}
+    major_codes = {major: code for code, major in enumerate(enrollment_index['major_names'])}
+
+    num_old_students = len(enrollment_index['student_ids'])
+    num_students = len(student_ids)
+    num_new_students = num_students - num_old_students
+    first_semester_ordinals = np.append(enrollment_index['first_semester_ordinals'], np.zeros(num_new_students, np.int32))
+    final_semesters = np.append(enrollment_index['final_semesters'], np.zeros(num_new_students, np.int32))
+    is_female = np.append(enrollment_index['is_female'], np.zeros(num_new_students, bool))
+    major_history = np.vstack([enrollment_index['major_history'], np.full((num_new_students, 8), -1, np.int32)])
+    row_lengths = np.append(np.diff(enrollment_index['enrollment_indptr']), np.zeros(num_new_students * 8, np.int64))
+
+    new_courses = []
+    new_semesters = []
+    new_row_lengths = np.zeros(num_students * 8, np.int64)
+    affected_codes = np.array(sorted(student_codes[stud_id] for stud_id in affected_students), np.int64)
+    for student_code in affected_codes:
+        index_student(students[student_ids[student_code]], student_code, course_codes, major_codes, first_semester_ordinals, final_semesters,
+                      is_female, major_history, new_row_lengths, new_courses, new_semesters)
+
+    # the old entries of the students that weren't affected, and the new entries of the ones that were, put
+    # in row order (the entries of a row all come from the same side, in their order)
+    is_affected_row = np.zeros(num_students * 8, bool)
+    is_affected_row[(affected_codes[:, np.newaxis] * 8 + np.arange(8)).ravel()] = True
+    old_indptr = enrollment_index['enrollment_indptr']
+    old_rows = np.repeat(np.arange(num_old_students * 8), np.diff(old_indptr))
+    kept = ~is_affected_row[old_rows]
+    new_rows = np.repeat(np.flatnonzero(is_affected_row), new_row_lengths[is_affected_row])
+    order = np.argsort(np.concatenate([old_rows[kept], new_rows]), kind='mergesort')
+    row_lengths[is_affected_row] = new_row_lengths[is_affected_row]
+    enrollment_indptr = np.zeros(num_students * 8 + 1, np.int64)
+    np.cumsum(row_lengths, out=enrollment_indptr[1:])
+
+    return {
+        'student_ids': student_ids,
+        'student_codes': student_codes,
+        'course_numbers': course_numbers,
+        'course_codes': course_codes,
+        'course_totals': np.array([courses[course_no].total_number_of_students for course_no in course_numbers], np.int64),
+        'first_semester_ordinals': first_semester_ordinals,
+        'final_semesters': final_semesters,
+        'is_female': is_female,
+        'major_names': get_major_names(major_codes),
+        'major_history': major_history,
+        'enrollment_indptr': enrollment_indptr,
+        'enrollment_courses': np.concatenate([enrollment_index['enrollment_courses'][kept], np.array(new_courses, np.int32)])[order],
+        'enrollment_semesters': np.concatenate([enrollment_index['enrollment_semesters'][kept], np.array(new_semesters, np.int32)])[order]
+    }
+
+def get_student_enrollments(enrollment_index, student_codes):
+    """
+    Gathers the enrollment entries of the students with the given codes, in the order the students are
+    given in and then by student semester and list order (the order make_student_feature_data walks them)
+    return values:
+        entries: positions of the entries in enrollment_courses and enrollment_semesters
+        entry_students: position in student_codes of the student of every entry
+        entry_student_sems: student semester of every entry
+    """
+    student_codes = np.asarray(student_codes, np.int64)
+    rows = (student_codes[:, np.newaxis] * 8 + np.arange(8)).ravel()
+    indptr = enrollment_index['enrollment_indptr']
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    row_positions = np.repeat(np.arange(len(rows)), lengths)
+    # position of every entry within its row, added to the start of its row
+    entry_offsets = np.arange(len(row_positions)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    entries = starts[row_positions] + entry_offsets
+    return entries, row_positions // 8, row_positions % 8
+
+def get_course_history_matrix(enrollment_index, student_codes, desired_course_code, current_semester, desired_semester, ending_semester_ordinal, min_total_students=100, student_enrollments=None):
+    """
+    Course history bits of the students with the given codes, as a sparse (number of students x number of
+    courses) matrix with columns by course code. A course is set for a student if the last time the student
+    took it (in the order make_student_feature_data walks the enrollments) it was not
+        - after ending_semester_ordinal
+        - in a course with fewer than min_total_students students ever
+        - the desired course in the desired semester
+        - after current_semester
+    student_enrollments: (optional) get_student_enrollments of student_codes, if it was already computed
+    """
+    if student_enrollments is None:
+        student_enrollments = get_student_enrollments(enrollment_index, student_codes)
+    entries, entry_students, entry_student_sems = student_enrollments
+    entry_courses = enrollment_index['enrollment_courses'][entries]
+    num_courses = len(enrollment_index['course_numbers'])
+
+    # only the last enrollment in each course counts, find it by looking for the first one in reverse order
+    keys = entry_students.astype(np.int64) * num_courses + entry_courses
+    unique_keys, reversed_positions = np.unique(keys[::-1], return_index=True)
+    last_entries = len(keys) - 1 - reversed_positions
+
+    last_courses = entry_courses[last_entries]
+    last_student_sems = entry_student_sems[last_entries]
+    is_set = ((enrollment_index['enrollment_semesters'][entries[last_entries]] <= ending_semester_ordinal) &
+              (enrollment_index['course_totals'][last_courses] >= min_total_students) &
+              ~((last_courses == desired_course_code) & (last_student_sems == desired_semester)) &
+              (last_student_sems <= current_semester))
+
+    return scipy.sparse.csr_matrix((np.ones(np.count_nonzero(is_set)), (entry_students[last_entries][is_set], last_courses[is_set])),
+                                   shape=(len(student_codes), num_courses))
+
+def get_enrollment_labels(enrollment_index, student_codes, desired_course_code, current_semester, desired_semester, ending_semester_ordinal, is_current_student, student_enrollments=None):
+    """
+    Labels and enrollment based drops of the students with the given codes, like make_student_feature_data
+    return values:
+        y_values: 1 where the student took the desired course in the desired semester, else 0
+        drop_students: True where the student
+            - took the desired course in a student semester up to current_semester (but not desired_semester)
+            - is not a current student and was in a student semester before desired_semester in
+              ending_semester_ordinal
+    student_enrollments: (optional) get_student_enrollments of student_codes, if it was already computed
+    """
+    if student_enrollments is None:
+        student_enrollments = get_student_enrollments(enrollment_index, student_codes)
+    entries, entry_students, entry_student_sems = student_enrollments
+    is_desired_course = enrollment_index['enrollment_courses'][entries] == desired_course_code
+    num_students = len(student_codes)
+
+    took_desired = is_desired_course & (entry_student_sems == desired_semester)
+    y_values = np.bincount(entry_students[took_desired], minlength=num_students) > 0
+
+    took_already = is_desired_course & (entry_student_sems != desired_semester) & (entry_student_sems <= current_semester)
+    drop_students = np.bincount(entry_students[took_already], minlength=num_students) > 0
+    if not is_current_student:
+        not_far_enough = ((enrollment_index['enrollment_semesters'][entries] == ending_semester_ordinal) &
+                          (entry_student_sems < desired_semester))
+        drop_students |= np.bincount(entry_students[not_far_enough], minlength=num_students) > 0
+
+    return y_values.astype(np.int64), drop_students
+
+def get_enrollment_label_matrix(enrollment_index, student_codes, desired_course_codes, current_semester, desired_semester, ending_semester_ordinal, is_current_student, student_enrollments=None):
+    """
+    get_enrollment_labels of the students with the given codes for many desired courses at once (all
+    different, -1 for a course that isn't in the index), from one pass over their enrollments
+    return values:
+        y_values: (number of students x number of desired courses) numpy array of the labels
+        drop_students: (number of students x number of desired courses) numpy array, True where the
+            student is dropped for the course
+    student_enrollments: (optional) get_student_enrollments of student_codes, if it was already computed
+    """
+    if student_enrollments is None:
+        student_enrollments = get_student_enrollments(enrollment_index, student_codes)
+    entries, entry_students, entry_student_sems = student_enrollments
+    num_students = len(student_codes)
+    num_problems = len(desired_course_codes)
+
+    # the desired course number (column) of the course of every entry, -1 if it isn't a desired course
+    problem_of_course = np.full(len(enrollment_index['course_numbers']), -1, np.int64)
+    desired_course_codes = np.asarray(desired_course_codes, np.int64).reshape(-1)
+    problem_of_course[desired_course_codes[desired_course_codes >= 0]] = np.flatnonzero(desired_course_codes >= 0)
+    entry_problems = problem_of_course[enrollment_index['enrollment_courses'][entries]]
+    is_desired_course = entry_problems >= 0
+
+    y_values = np.zeros((num_students, num_problems), np.int64)
+    took_desired = is_desired_course & (entry_student_sems == desired_semester)
+    y_values[entry_students[took_desired], entry_problems[took_desired]] = 1
+
+    drop_students = np.zeros((num_students, num_problems), bool)
+    took_already = is_desired_course & (entry_student_sems != desired_semester) & (entry_student_sems <= current_semester)
+    drop_students[entry_students[took_already], entry_problems[took_already]] = True
+    if not is_current_student:
+        not_far_enough = ((enrollment_index['enrollment_semesters'][entries] == ending_semester_ordinal) &
+                          (entry_student_sems < desired_semester))
+        drop_students |= (np.bincount(entry_students[not_far_enough], minlength=num_students) > 0)[:, np.newaxis]
+
+    return y_values, drop_students
@@ -1,32 +1,73 @@
+from cohort_index import *
 from parse_course_data import *
 import numpy as np
+import scipy.sparse
 
-def get_current_and_past_students(students, semester, current_semester):
+# columns of the majors in the feature vectors of situations 3 and 4
+MAJOR_DICT = {'Undeclared': 0, 'Mechanical Engineering': 1, "Electr'l & Computer Engr": 2, 'Engineering': 3}
+
+def get_enrollment_semester_range(students):
+    """
+    return the semester ordinals of the first and the last semester that any student was enrolled in
+    """
+    first_ordinal = None
+    last_ordinal = None
+    for student in students.values():
+        for semester in student.semesters_present:
+            ordinal = semester_ordinal(semester)
+            if first_ordinal is None or ordinal < first_ordinal:
+                first_ordinal = ordinal
+            if last_ordinal is None or ordinal > last_ordinal:
+                last_ordinal = ordinal
+    return first_ordinal, last_ordinal
+
+# a course that hasn't been offered in this many semesters before the one we're predicting for is taken to be
+# out of the catalog
+RECENT_OFFERING_SEMESTERS = 4
+
+def get_recently_offered_courses(courses, all_courses_list, predicting_for_semester, max_semesters_since_offered=RECENT_OFFERING_SEMESTERS):
+    """
+    return the course numbers of all_courses_list (in its order) of the courses that were offered in one of
+    the max_semesters_since_offered semesters before predicting_for_semester, or that already have an
+    offering (with its prereg data) in predicting_for_semester
+    """
+    predicting_ordinal = semester_ordinal(predicting_for_semester)
+    course_list = []
+    for course_no, course_title in all_courses_list:
+        offering_ordinals = [semester_ordinal(semester) for semester in courses[course_no].course_offerings]
+        if [ordinal for ordinal in offering_ordinals if predicting_ordinal - max_semesters_since_offered <= ordinal <= predicting_ordinal]:
+            course_list.append(course_no)
+    return course_list
+
+def get_current_and_past_students(students, semester, current_semester, cohort_index=None):
     """
     return list of students who are enrolled that semester
     and students who were enrolled previous to that semester
+    cohort_index: (optional) make_cohort_index of students, answers the same question without scanning
+      every student (and returns the same dicts for the same arguments)
     """
+    if cohort_index is not None:
+        return query_cohort_index(cohort_index, semester, current_semester)
+
     # note that students who are away during semester will be considered past students
-    # even if they are enrolled in later semesters
+    # even if they are enrolled in later semesters, and so will current students who were enrolled
+    # previous to that semester
+    ordinal = semester_ordinal(semester)
     current_students = [{} for i in range(8)]
     non_current_students = {} #students who are not enrolled in given semester
-    past_students = {} #students who are not current but were enrolled previously
+    past_students = {} #students who were enrolled previously
     for s_id, student in students.items():
         # find all current students
         for student_semester, semester_course_offerings in enumerate(student.list_of_course_offerings):
             for c in semester_course_offerings:
-                if c.semester == semester:
+                if c.semester_ordinal == ordinal:
                     current_students[student_semester][s_id] = student
                     break
 
-        if student in current_students:
-            continue
-            
-        # find all past students if not current
+        # find all past students
         for student_semester, semester_course_offerings in enumerate(student.list_of_course_offerings):
             for c in semester_course_offerings:
-                if c.semester < semester:
-                    # Kludge warning! This relies on a lexicographic string comparison
+                if c.semester_ordinal < ordinal:
                     past_students[s_id] = student
                     break
 
@@ -61,7 +102,9 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
   # if ending semester is not set, end semester is infinity
   # this could probably be made better
   if ending_semester is None:
-    ending_semester = '9999'
+    ending_semester = END_SEMESTER
+  starting_semester_ordinal = semester_ordinal(starting_semester)
+  ending_semester_ordinal = semester_ordinal(ending_semester)
 
   # list of course numbers
   course_list = []
@@ -70,10 +113,7 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
 
   # dict mapping course numbers to index in course_list
   course_dict = {course_list[i]: i for i in range(len(course_list))}
-  major_dict = {'Undeclared': 0, 'Mechanical Engineering': 1, "Electr'l & Computer Engr": 2, 'Engineering': 3}
-  
-  # dict mapping year semsester to number of semesters since olin's inception
-  semesters = make_semesters_dict(2002, 2014)
+  major_dict = MAJOR_DICT
 
   all_x_vectors = []
   all_y_values = []
@@ -85,7 +125,7 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
       if not is_current_student: 
         continue
 
-    if semesters[student.first_semester] < semesters[starting_semester]:
+    if student.first_semester_ordinal < starting_semester_ordinal:
       # if the student started at Olin before the input starting_semester, discard student
       continue
 
@@ -188,7 +228,7 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
 
         # student did not reach desired_semester as of end_semester
         if not is_current_student:
-          if course_offering.semester == ending_semester:
+          if course_offering.semester_ordinal == ending_semester_ordinal:
             if student_sem < desired_semester:
               drop_student = True
 
@@ -199,7 +239,7 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
 
         if situation == 3 or situation == 4: 
           # don't include courses from "the future"
-          if course_offering.semester > ending_semester:
+          if course_offering.semester_ordinal > ending_semester_ordinal:
             x_vector[course_dict[course_no]] = 0
 
           # don't include courses that have had less than 100 students enrolled in them (ever)
@@ -230,6 +270,280 @@ def make_student_feature_data(situation, is_current_student, students, all_cours
 
   return [all_x_vectors, all_y_values]
 
+def get_prereg_feature(all_courses_dict, desired_course, desired_semester, predicting_for_semester):
+  """ The prereg features of make_student_feature_data, which are the same for every student
+      return values:
+        [adjusted prereg enrollment, prereg data presence flag, whether every student is dropped]
+  """
+  # the 'year' the student is in, to extract their prereg data
+  prereg_index = min(desired_semester // 2, 3)
+
+  desired_course_object = all_courses_dict[desired_course]
+  if predicting_for_semester not in desired_course_object.course_offerings:
+    return [0, 0, False]
+
+  raw_enrollment = desired_course_object.course_offerings[predicting_for_semester].prereg_predicted_enrollment[prereg_index]
+  if raw_enrollment == -1:
+    # Drop the students if prereg data doesn't exist for the semester we're interested in
+    return [0, 1, True]
+  raw_enrollment = float(raw_enrollment)
+  class_size = 86 # assuming a class size of 86 people
+  if int(raw_enrollment) == 0:
+    raw_enrollment = 0.01
+  return [log((raw_enrollment/class_size)/(1-(raw_enrollment/class_size))), 0, False]
+
+# the course history situations stay sparse (csr) up to this fraction of nonzero features, and are made dense
+# above it: past that point a dense array is smaller (csr needs 12 bytes per nonzero, dense 8 per feature)
+# and the solver isn't any faster on the sparse version
+MAX_SPARSE_DENSITY = 0.25
+
+def get_density(x_matrix):
+  """ Fraction of nonzero entries of a numpy array or scipy sparse matrix """
+  if x_matrix.shape[0] * x_matrix.shape[1] == 0:
+    return 0.0
+  if scipy.sparse.issparse(x_matrix):
+    return float(x_matrix.nnz) / (x_matrix.shape[0] * x_matrix.shape[1])
+  return float(np.count_nonzero(x_matrix)) / x_matrix.size
+
+# columns of the feature base tail: the majors, the gender, the prereg data and fa/sp (and the dummy feature
+# when there is one), in the order situation 4 has them after the course history
+TAIL_GENDER_COLUMN = len(MAJOR_DICT)
+TAIL_PREREG_COLUMN = len(MAJOR_DICT) + 1
+TAIL_SPRING_COLUMN = len(MAJOR_DICT) + 3
+# the tail columns of situations 0-2 and 4, as slices so that the features of situations 0-2 are views of the
+# tail (situation 3 is the tail without the prereg data columns)
+SITUATION_TAIL_COLUMNS = {
+  0: slice(TAIL_SPRING_COLUMN + 1, None),                                           # (dummy)
+  1: slice(TAIL_GENDER_COLUMN, None, TAIL_SPRING_COLUMN + 1 - TAIL_GENDER_COLUMN),  # gender, (dummy)
+  2: slice(TAIL_PREREG_COLUMN, None),                                               # prereg data, presence, fa/sp, (dummy)
+  4: slice(None)                                                                    # everything
+}
+
+def make_cohort_feature_base(is_current_student, students, enrollment_index, courses, current_semester, desired_semester, starting_semester, situations=range(5)):
+  """ The part of make_student_feature_base that doesn't depend on the desired course: the students that
+      are kept, their majors and their enrollments. It is the same for every course of a cohort, so a
+      forecast of many courses builds it once and passes it to make_student_feature_base for each of them.
+      return values:
+        dict with
+          student_codes: numpy array of the enrollment index codes of the kept students
+          major_columns: numpy array of the major column of every kept student (None if situations has
+            neither 3 nor 4)
+          student_enrollments: get_student_enrollments of student_codes
+          course_columns: numpy array mapping the course codes of enrollment_index to the columns of courses
+            (-1 for the courses that aren't in it, None if situations has neither 3 nor 4)
+  """
+  student_codes = np.array(map(enrollment_index['student_codes'].__getitem__, students), np.int64)
+
+  # student level drops
+  keep = enrollment_index['first_semester_ordinals'][student_codes] >= semester_ordinal(starting_semester)
+  if not is_current_student:
+    keep &= enrollment_index['final_semesters'][student_codes] >= desired_semester
+  student_codes = student_codes[keep]
+  num_students = len(student_codes)
+
+  major_columns = None
+  course_columns = None
+  if 3 in situations or 4 in situations:
+    # major of every student for the current semester, a KeyError for a missing or unknown major like
+    # make_student_feature_data
+    major_codes = enrollment_index['major_history'][student_codes, current_semester]
+    if num_students and major_codes.min() < 0:
+      raise KeyError(current_semester)
+    major_columns = np.array([MAJOR_DICT.get(major, -1) for major in enrollment_index['major_names']], np.int64)[major_codes]
+    if num_students and major_columns.min() < 0:
+      raise KeyError(enrollment_index['major_names'][major_codes[major_columns.argmin()]])
+    course_dict = {courses[i][0]: i for i in range(len(courses))}
+    course_columns = np.array([course_dict.get(course_no, -1) for course_no in enrollment_index['course_numbers']], np.int64)
+
+  return {'student_codes': student_codes, 'major_columns': major_columns, 'course_columns': course_columns,
+          'student_enrollments': get_student_enrollments(enrollment_index, student_codes)}
+
+def make_student_feature_base(is_current_student, students, enrollment_index, all_courses_dict, courses, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, situations=range(5), add_dummy_students=False, cohort_base=None):
+  """ Builds the features of all the situations for one set of students at once, with array operations on
+      enrollment_index (the make_enrollment_index of all the students) instead of one list per student.
+      get_situation_features then gives the features of each situation, the same as
+      make_student_feature_data (same columns, same students dropped, students in the iteration order of
+      the students dict).
+      parameters:
+        situations: the situations the base is for, the major columns are only filled in (and unknown
+          majors only raise a KeyError) for situations 3 and 4, and the prereg data only for 2 and 4
+        add_dummy_students: add the two dummy students of add_dummy_student to the end of the base
+        cohort_base: (optional) make_cohort_feature_base of the same students, semesters and situations, so
+          that only the features of the desired course are built here
+      return values:
+        dict with
+          course_history: scipy sparse csr matrix of the course history bits, one column per course in
+            courses (None if situations has neither 3 nor 4)
+          tail: numpy array of the other features, in the order of situation 4
+          y_values: numpy array of the labels
+          prereg_dropped: True if situations 2 and 4 drop every student (no prereg data for the semester)
+          student_codes: numpy array of the enrollment index code of the student of every row (the dummy
+            students are the rows after them)
+  """
+  if ending_semester is None:
+    ending_semester = END_SEMESTER
+  ending_semester_ordinal = semester_ordinal(ending_semester)
+  if cohort_base is None:
+    cohort_base = make_cohort_feature_base(is_current_student, students, enrollment_index, courses, current_semester, desired_semester, starting_semester, situations)
+  student_codes = cohort_base['student_codes']
+  major_columns = cohort_base['major_columns']
+  student_enrollments = cohort_base['student_enrollments']
+  with_course_history = 3 in situations or 4 in situations
+
+  # the prereg feature is the same for every student, so it is only worked out once
+  [prereg_value, prereg_presence, prereg_dropped] = [0, 0, False]
+  if 2 in situations or 4 in situations:
+    [prereg_value, prereg_presence, prereg_dropped] = get_prereg_feature(all_courses_dict, desired_course, desired_semester, predicting_for_semester)
+    if prereg_dropped and set(situations) <= set([2, 4]):
+      # nothing left to build
+      student_codes = student_codes[:0]
+      if with_course_history:
+        major_columns = major_columns[:0]
+      student_enrollments = get_student_enrollments(enrollment_index, student_codes)
+
+  desired_course_code = enrollment_index['course_codes'].get(desired_course, -1)
+  y_values, drop_students = get_enrollment_labels(enrollment_index, student_codes, desired_course_code, current_semester, desired_semester, ending_semester_ordinal, is_current_student, student_enrollments)
+  y_values = y_values[~drop_students]
+  student_codes = student_codes[~drop_students]
+  num_students = len(student_codes)
+
+  add_dummy_students = add_dummy_students and num_students > 0
+  num_rows = num_students + 2 * add_dummy_students
+  tail = np.zeros((num_rows, TAIL_SPRING_COLUMN + 1 + add_dummy_data))
+  if with_course_history:
+    tail[np.arange(num_students), major_columns[~drop_students]] = 1
+  tail[:num_students, TAIL_GENDER_COLUMN] = enrollment_index['is_female'][student_codes]
+  tail[:num_students, TAIL_PREREG_COLUMN] = prereg_value
+  tail[:num_students, TAIL_PREREG_COLUMN + 1] = prereg_presence
+  tail[:num_students, TAIL_SPRING_COLUMN] = desired_semester % 2
+  if add_dummy_students:
+    tail[num_students:, -1] = 1   # set the dummy feature to 1
+    y_values = np.append(y_values, [1, 0])
+
+  course_history = None
+  if with_course_history:
+    # take the dropped students out of the enrollments too, so they don't have to be gathered again
+    [entries, entry_students, entry_student_sems] = student_enrollments
+    kept_entries = ~drop_students[entry_students]
+    student_enrollments = [entries[kept_entries], (np.cumsum(~drop_students) - 1)[entry_students[kept_entries]], entry_student_sems[kept_entries]]
+    course_history = get_course_history_matrix(enrollment_index, student_codes, desired_course_code, current_semester, desired_semester, ending_semester_ordinal, student_enrollments=student_enrollments).tocoo()
+
+    # move the columns from the course codes of the index to the order of courses
+    course_columns = cohort_base['course_columns'][course_history.col]
+    if len(course_columns) and course_columns.min() < 0:
+      raise KeyError(enrollment_index['course_numbers'][course_history.col[course_columns.argmin()]])
+    course_history = scipy.sparse.csr_matrix((course_history.data, (course_history.row, course_columns)), shape=(num_rows, len(courses)))
+
+  return {'course_history': course_history, 'tail': tail, 'y_values': y_values, 'prereg_dropped': prereg_dropped, 'student_codes': student_codes}
+
+def make_shared_design(is_current_student, cohort_base, enrollment_index, all_courses_dict, courses, desired_courses, current_semester, desired_semester, ending_semester, predicting_for_semester, add_dummy_data, situation):
+  """ The features of situation 3 or 4 of a cohort for many desired courses at once, as one design shared by
+      all of them (see fit_shared_design_logistic). The course history of a student only depends on the
+      desired course through its own column, and that column is always 0 for the students that are kept
+      (the students that took the course before the desired semester are dropped, and the later courses
+      aren't in the history), so the rows are built once for the cohort. What changes from course to course
+      are the labels, the dropped students (left out with a weight of 0), the course's own column (masked)
+      and the prereg data of situation 4 (columns that are the same for all of a course's students).
+      The features and labels of every course are those of make_student_feature_base with the dummy
+      students if add_dummy_data is set, up to the order of the rows and columns.
+      parameters:
+        cohort_base: make_cohort_feature_base of the students, for situation 3 or 4
+        desired_courses: the course numbers of the courses, all different
+        desired_semester: must be after current_semester
+      return values:
+        dict with
+          x_shared: scipy sparse csr matrix of the rows, the course history (one column per course in
+            courses), the majors, the gender, fa/sp and the dummy feature (the columns of situation 3)
+          y_matrix, weight_matrix, column_masks, problem_columns, problem_column_rows: the parameters of
+            fit_shared_design_logistic, problem_columns are the prereg data columns for situation 4 and
+            None for situation 3
+          has_students: True for the courses that have any students (the others don't get a model)
+  """
+  if desired_semester <= current_semester:
+    raise ValueError("make_shared_design needs a desired semester after the current semester, got %d and %d" % (desired_semester, current_semester))
+  if ending_semester is None:
+    ending_semester = END_SEMESTER
+  ending_semester_ordinal = semester_ordinal(ending_semester)
+  student_codes = cohort_base['student_codes']
+  num_students = len(student_codes)
+  num_problems = len(desired_courses)
+
+  desired_course_codes = [enrollment_index['course_codes'].get(desired_course, -1) for desired_course in desired_courses]
+  y_values, drop_students = get_enrollment_label_matrix(enrollment_index, student_codes, desired_course_codes, current_semester, desired_semester, ending_semester_ordinal, is_current_student, cohort_base['student_enrollments'])
+  kept = ~drop_students
+
+  problem_columns = None
+  if situation == 4:
+    prereg_features = np.array([get_prereg_feature(all_courses_dict, desired_course, desired_semester, predicting_for_semester) for desired_course in desired_courses], float).reshape(num_problems, 3)
+    problem_columns = prereg_features[:, :2]
+    kept[:, prereg_features[:, 2] > 0] = False
+  has_students = kept.any(axis=0)
+
+  # the course history without a desired course, which is the same as with any of them (see above)
+  course_history = get_course_history_matrix(enrollment_index, student_codes, -1, current_semester, desired_semester, ending_semester_ordinal, student_enrollments=cohort_base['student_enrollments']).tocoo()
+  course_columns = cohort_base['course_columns'][course_history.col]
+  if len(course_columns) and course_columns.min() < 0:
+    raise KeyError(enrollment_index['course_numbers'][course_history.col[course_columns.argmin()]])
+  num_rows = num_students + 2 * add_dummy_data
+  course_history = scipy.sparse.csr_matrix((course_history.data, (course_history.row, course_columns)), shape=(num_rows, len(courses)))
+
+  # the tail of situation 3: the majors, the gender, fa/sp and the dummy feature
+  tail = np.zeros((num_rows, TAIL_GENDER_COLUMN + 2 + add_dummy_data))
+  tail[np.arange(num_students), cohort_base['major_columns']] = 1
+  tail[:num_students, TAIL_GENDER_COLUMN] = enrollment_index['is_female'][student_codes]
+  tail[:num_students, TAIL_GENDER_COLUMN + 1] = desired_semester % 2
+  y_matrix = y_values
+  weight_matrix = kept.astype(float)
+  if add_dummy_data:
+    tail[num_students:, -1] = 1   # set the dummy feature to 1
+    # the dummy students are only added to the courses that have students
+    y_matrix = np.vstack([y_matrix, np.ones((1, num_problems), np.int64), np.zeros((1, num_problems), np.int64)])
+    weight_matrix = np.vstack([weight_matrix, np.tile(has_students.astype(float), (2, 1))])
+
+  course_dict = {courses[i][0]: i for i in range(len(courses))}
+  column_masks = np.zeros((num_problems, len(courses) + tail.shape[1]), bool)
+  for problem, desired_course in enumerate(desired_courses):
+    if desired_course in course_dict:
+      column_masks[problem, course_dict[desired_course]] = True
+
+  return {'x_shared': scipy.sparse.hstack([course_history, scipy.sparse.csr_matrix(tail)], format='csr'), 'y_matrix': y_matrix,
+          'weight_matrix': weight_matrix, 'column_masks': column_masks, 'problem_columns': problem_columns,
+          'problem_column_rows': (np.arange(num_rows) < num_students).astype(float), 'has_students': has_students}
+
+def get_situation_features(feature_base, situation, max_sparse_density=MAX_SPARSE_DENSITY):
+  """ The [x_matrix, y_values] of one situation from a make_student_feature_base. For situations 0-2
+      x_matrix is a view of the base's numpy array. For situations 3 and 4 it is a scipy sparse csr matrix
+      (most of the course history bits are 0), unless more than max_sparse_density of it is nonzero, then
+      it's a numpy array.
+  """
+  tail = feature_base['tail']
+  y_values = feature_base['y_values']
+  if (situation == 2 or situation == 4) and feature_base['prereg_dropped']:
+    tail = tail[:0]
+    y_values = y_values[:0]
+
+  if situation == 3:
+    x_matrix = np.delete(tail, [TAIL_PREREG_COLUMN, TAIL_PREREG_COLUMN + 1], axis=1)
+  else:
+    x_matrix = tail[:, SITUATION_TAIL_COLUMNS[situation]]
+  if situation == 3 or situation == 4:
+    course_history = feature_base['course_history'][:len(tail)]
+    x_matrix = scipy.sparse.hstack([course_history, scipy.sparse.csr_matrix(x_matrix)], format='csr')
+    if get_density(x_matrix) > max_sparse_density:
+      x_matrix = x_matrix.toarray()
+  return [x_matrix, y_values]
+
+def make_student_feature_matrix(situation, is_current_student, students, enrollment_index, all_courses_dict, courses, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data):
+  """ Vectorized version of make_student_feature_data for a single situation, see
+      make_student_feature_base and get_situation_features
+      return values:
+        x_matrix: numpy array (situations 0-2) or scipy sparse csr matrix (situations 3 and 4, if they're
+          sparse enough), one row per student
+        y_values: numpy array of the labels
+  """
+  feature_base = make_student_feature_base(is_current_student, students, enrollment_index, all_courses_dict, courses, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, [situation])
+  return get_situation_features(feature_base, situation)
+
 
 def make_random_training_data(x_vector, y_vector, test_size):
   """ Takes as input all of the x values in a list and the y values in a list and then designates
@@ -0,0 +1,86 @@
+import hashlib
+import os
+from pickle_files import *
+
+def make_substring_index(strings):
+    """
+    Builds an index for finding which of the strings (a dict mapping each string to the list of values it
+    stands for) are substrings of some text, without testing every string against the text. The index is a
+    trie: nested dicts keyed by character, where the values of a string are stored under the None key of the
+    node that the string ends at.
+    """
+    trie = {}
+    for string, values in strings.items():
+        node = trie
+        for char in string:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).extend(values)
+    return trie
+
+def find_substrings(substring_index, text):
+    """
+    Returns the set of values of every indexed string that appears in text. Gives the same matches as testing
+    (string in text) for every indexed string, but only walks down the trie from each position in the text
+    for as long as some indexed string still matches.
+    """
+    matches = set()
+    # an empty string is part of every text
+    if None in substring_index:
+        matches.update(substring_index[None])
+    for i in range(len(text)):
+        node = substring_index
+        for char in text[i:]:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                matches.update(node[None])
+    return matches
+
+def make_prereg_match_index(courses):
+    """
+    Index over the course numbers and titles of courses (dict mapping course number to Course) that
+    enter_prereg_data uses to match the prereg survey column titles to courses
+    """
+    strings = {}
+    for course_no in courses:
+        strings.setdefault(course_no, []).append(course_no)
+        strings.setdefault(courses[course_no].title, []).append(course_no)
+    return make_substring_index(strings)
+
+def get_catalog_fingerprint(courses):
+    """
+    Hex digest of the course numbers and titles in courses, the resolved prereg matches are only valid for
+    the catalog they were made with
+    """
+    sha = hashlib.sha1()
+    for course_no in sorted(courses):
+        sha.update(course_no + '\0' + courses[course_no].title + '\0')
+    return sha.hexdigest()
+
+def match_prereg_columns(courses, column_titles, match_cache_filepath=None):
+    """
+    Resolves every prereg survey column title to the list of course numbers it matches: a course matches a
+    column title if its course number or its title is part of the column title.
+    If match_cache_filepath is set, the resolved matches are stored there and reused on later runs (for as
+    long as the course numbers and titles don't change), so only new column titles get matched.
+    return values:
+        dict mapping each column title to the sorted list of course numbers it matches
+    """
+    catalog_fingerprint = get_catalog_fingerprint(courses)
+    matches = {}
+    if match_cache_filepath is not None:
+        [cached_fingerprint, cached_matches] = load_pickle(match_cache_filepath, [None, {}])
+        if cached_fingerprint == catalog_fingerprint:
+            matches = cached_matches
+
+    new_column_titles = [column_title for column_title in set(column_titles) if column_title not in matches]
+    if new_column_titles:
+        match_index = make_prereg_match_index(courses)
+        for column_title in new_column_titles:
+            matches[column_title] = sorted(find_substrings(match_index, column_title))
+
+        if match_cache_filepath is not None:
+            save_pickle_atomically([catalog_fingerprint, matches], match_cache_filepath)
+
+    return matches
@@ -0,0 +1,195 @@
+import glob
+import hashlib
+import os
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse
+from batch_logistic import *
+from pickle_files import *
+
+# Bump this whenever the models change in a way that makes the stored coefficients wrong
+MODEL_STORE_VERSION = 2
+
+def make_model_store(store_dir=None, max_bytes=None, max_disk_bytes=None):
+  """
+  Returns an empty content addressed store of fitted models, as a dict with the entries, the limits and the
+  counters:
+    hits, misses: model lookups that found / didn't find the model
+    disk_hits: the hits that had to be loaded from store_dir
+    prediction_hits, prediction_misses: the same for the predicted enrollments
+    evictions: entries dropped from memory to stay within max_bytes
+  Every entry is the coefficients of one fitted model (and the predicted enrollments made with it), under
+  the get_model_key of its training data and hyperparameters, so the same fit on the same data is only
+  ever done once, whatever backtest or forecast asks for it.
+  store_dir: (optional) every entry is also written to a file in this directory, where later runs (and the
+    other worker processes) find it
+  max_bytes: (optional) limit on the total size of the entries in memory, the least recently used entries
+    are dropped from memory first (they stay in store_dir)
+  max_disk_bytes: (optional) limit on the total size of the files in store_dir, see prune_model_store
+  """
+  return {'entries': OrderedDict(), 'entry_bytes': {}, 'total_bytes': 0, 'store_dir': store_dir,
+          'max_bytes': max_bytes, 'max_disk_bytes': max_disk_bytes, 'hits': 0, 'misses': 0, 'disk_hits': 0,
+          'prediction_hits': 0, 'prediction_misses': 0, 'evictions': 0}
+
+def get_data_fingerprint(data):
+  """
+  Hex digest of the contents of a feature matrix or label vector (list, numpy array or scipy sparse matrix)
+  """
+  sha = hashlib.sha1()
+  if scipy.sparse.issparse(data):
+    data = data.tocsr()
+    sha.update(repr(('csr', data.shape)))
+    for part in [data.indptr, data.indices, data.data]:
+      sha.update(np.ascontiguousarray(part, np.float64 if part is data.data else np.int64).tostring())
+  else:
+    data = np.ascontiguousarray(data, np.float64)
+    sha.update(repr(('dense', data.shape)))
+    sha.update(data.tostring())
+  return sha.hexdigest()
+
+def get_model_key(x_train, y_train, situation, c_value, solver):
+  """
+  The key of the model fitted on x_train and y_train for situation with the given C and solver (the
+  solvers agree only to their tolerances, so each one has its own models)
+  """
+  return hashlib.sha1(repr((MODEL_STORE_VERSION, situation, float(c_value), solver, get_data_fingerprint(x_train), get_data_fingerprint(y_train)))).hexdigest()
+
+def get_model_filepath(store, key):
+  return os.path.join(store['store_dir'], 'model_' + key + '.pickle')
+
+def get_entry_nbytes(entry):
+  return entry['coef'].nbytes + 64 * (1 + len(entry['predictions']))
+
+def write_model_entry(store, key, entry):
+  save_pickle_atomically(entry, get_model_filepath(store, key))
+
+def keep_model_entry(store, key, entry):
+  """
+  Puts entry in memory as the most recently used one, evicting the least recently used entries if the
+  store is over max_bytes
+  """
+  entries = store['entries']
+  if key in entries:
+    store['total_bytes'] -= store['entry_bytes'][key]
+    del entries[key]
+  entries[key] = entry
+  store['entry_bytes'][key] = get_entry_nbytes(entry)
+  store['total_bytes'] += store['entry_bytes'][key]
+  while entries and store['max_bytes'] is not None and store['total_bytes'] > store['max_bytes']:
+    evicted_key, evicted_entry = entries.popitem(last=False)
+    store['total_bytes'] -= store['entry_bytes'].pop(evicted_key)
+    store['evictions'] += 1
+
+def get_model_entry(store, key):
+  """
+  The entry of key from memory or from store_dir, or None if there isn't one
+  """
+  entries = store['entries']
+  if key in entries:
+    entry = entries.pop(key)
+    entries[key] = entry
+    return entry
+  if store['store_dir'] is not None:
+    model_filepath = get_model_filepath(store, key)
+    entry = load_pickle(model_filepath)
+    if entry is not None:
+      # the least recently used files are the first to go in prune_model_store
+      os.utime(model_filepath, None)
+      store['disk_hits'] += 1
+      keep_model_entry(store, key, entry)
+      return entry
+  return None
+
+def lookup_model(store, key):
+  """
+  Returns the model stored for key (see get_model_key) as a BatchLogistic, or None if there isn't one
+  """
+  entry = get_model_entry(store, key)
+  if entry is None:
+    store['misses'] += 1
+    return None
+  store['hits'] += 1
+  return BatchLogistic(entry['coef'], entry['intercept'], 0)
+
+def store_model(store, key, logistic):
+  """
+  Stores the coefficients of the fitted model logistic (a LogisticRegression or BatchLogistic) for key
+  """
+  entry = {'coef': np.array(logistic.coef_[0], float), 'intercept': float(logistic.intercept_[0]), 'predictions': {}}
+  keep_model_entry(store, key, entry)
+  if store['store_dir'] is not None:
+    write_model_entry(store, key, entry)
+
+def get_stored_model(store, x_train, y_train, situation, c_value, solver, fit):
+  """
+  The model for x_train, y_train, situation, c_value and solver from store, or fit() (which is then stored)
+  if it isn't there
+  return values:
+    [logistic, key]
+  """
+  key = get_model_key(x_train, y_train, situation, c_value, solver)
+  logistic = lookup_model(store, key)
+  if logistic is None:
+    logistic = fit()
+    store_model(store, key, logistic)
+  return [logistic, key]
+
+def get_stored_prediction(store, key, logistic, x_test, predict):
+  """
+  The predicted enrollment of the model of key (see get_stored_model) for the students x_test from store,
+  or predict(logistic, x_test) (which is then stored with the model) if it isn't there
+  """
+  entry = get_model_entry(store, key)
+  test_fingerprint = get_data_fingerprint(x_test)
+  if entry is not None and test_fingerprint in entry['predictions']:
+    store['prediction_hits'] += 1
+    return entry['predictions'][test_fingerprint]
+  store['prediction_misses'] += 1
+  predicted_enrollment = predict(logistic, x_test)
+  if entry is not None:
+    entry['predictions'][test_fingerprint] = predicted_enrollment
+    keep_model_entry(store, key, entry)
+    if store['store_dir'] is not None:
+      write_model_entry(store, key, entry)
+  return predicted_enrollment
+
+def bulk_load_model_store(store):
+  """
+  Loads every model file of store_dir into memory (the most recently used first, up to max_bytes) in one
+  go, for runs that will ask for most of them anyway, like the rerun of an unchanged backtest
+  return values:
+    number of entries loaded
+  """
+  if store['store_dir'] is None:
+    return 0
+  model_filepaths = sorted(glob.glob(os.path.join(store['store_dir'], 'model_*.pickle')), key=os.path.getmtime)
+  num_loaded = 0
+  # oldest first, so the most recently used entries are the ones still in memory at the end
+  for model_filepath in model_filepaths:
+    key = os.path.basename(model_filepath)[len('model_'):-len('.pickle')]
+    entry = load_pickle(model_filepath)
+    if entry is None:
+      continue
+    keep_model_entry(store, key, entry)
+    num_loaded += 1
+  return num_loaded
+
+def prune_model_store(store):
+  """
+  Removes the least recently used model files of store_dir until they take at most max_disk_bytes
+  return values:
+    number of files removed
+  """
+  if store['store_dir'] is None or store['max_disk_bytes'] is None:
+    return 0
+  model_filepaths = sorted(glob.glob(os.path.join(store['store_dir'], 'model_*.pickle')), key=os.path.getmtime)
+  file_bytes = [os.path.getsize(model_filepath) for model_filepath in model_filepaths]
+  total_bytes = sum(file_bytes)
+  num_removed = 0
+  for model_filepath, nbytes in zip(model_filepaths, file_bytes):
+    if total_bytes <= store['max_disk_bytes']:
+      break
+    os.remove(model_filepath)
+    total_bytes -= nbytes
+    num_removed += 1
+  return num_removed
@@ -0,0 +1,100 @@
+import time
+import numpy as np
+from sklearn import linear_model
+from c_selection import *
+from pickle_files import *
+
+# passes over the new students of an update (every partial_fit call is one pass)
+ONLINE_UPDATE_EPOCHS = 1
+# epochs of the first fit of a model on all of its rows, it stops before that once the loss stops improving
+ONLINE_FIT_MAX_EPOCHS = 1000
+
+def make_online_model_store(filepath=None):
+  """
+  Returns the store of the online models, loaded from filepath if there is one (see
+  save_online_model_store), as a dict with
+    filepath: where save_online_model_store writes it
+    models: dict mapping get_online_model_key to the state of the model, a dict of
+      model: the SGDClassifier (logistic loss) fitted so far
+      student_ids: sorted numpy array of the ids of the students it has been trained on (not their enrollment
+        index codes, which change when the index is built again)
+      num_rows: the number of rows it has been trained on (with the dummy students)
+    full_fits, updates: number of models fitted from scratch / updated with new students
+    update_rows: number of rows of the updates
+    fit_seconds: the time spent fitting and updating
+  """
+  online_models = None if filepath is None else load_pickle(filepath)
+  if online_models is not None:
+    online_models['filepath'] = filepath
+    return online_models
+  return {'filepath': filepath, 'models': {}, 'full_fits': 0, 'updates': 0, 'update_rows': 0, 'fit_seconds': 0.0}
+
+def save_online_model_store(online_models):
+  """
+  Writes online_models to its filepath (if it has one)
+  """
+  if online_models['filepath'] is not None:
+    save_pickle_atomically(online_models, online_models['filepath'])
+
+def get_online_model_key(desired_course, current_semester, situation, add_dummy_data, c_value):
+  # the models of different dummy data or C have different training data or regularization
+  return (desired_course, current_semester, situation, bool(add_dummy_data), float(c_value))
+
+def get_online_student_ids(enrollment_index, student_codes):
+  """
+  numpy array of the student ids of student_codes (e.g. the student_codes of a make_student_feature_base),
+  which the online models keep track of their students by
+  """
+  # only look up the students of the codes, a numpy array of all the student ids would be built every call
+  student_ids = enrollment_index['student_ids']
+  return np.array([student_ids[code] for code in np.asarray(student_codes, np.int64).tolist()], dtype=str)
+
+def get_online_alpha(c_value, num_rows):
+  """
+  The SGDClassifier alpha of the same L2 regularization as the C of make_logistic: liblinear minimizes
+  0.5 * |w|^2 + C * (sum of the losses), SGD minimizes alpha / 2 * |w|^2 + (mean of the losses)
+  """
+  return 1.0 / (c_value * max(num_rows, 1))
+
+def update_online_model(online_models, key, x_train, y_train, student_ids, c_value=DEFAULT_C_VALUE):
+  """
+  The online model of key (see get_online_model_key) for the training data x_train and y_train of a
+  make_student_feature_base whose students have the ids student_ids (get_online_student_ids of its
+  student codes, its rows after those are the dummy students). If the store has no model for key, one is
+  fitted on all of the rows. Otherwise only the rows of the students it hasn't been trained on yet (the
+  students of the semesters that came in since) are applied to it, with ONLINE_UPDATE_EPOCHS passes of
+  partial_fit, so an update costs about as much as the new students and not the whole history. The models
+  are updated in place in online_models.
+  This is not the model that make_logistic fits on x_train. The students that left the window are never
+  taken out, and SGD only approximates the optimum. In online_update_benchmark the predicted enrollments are
+  about 6 students from those of the retrained models, and the updates are only a little faster than
+  retraining with liblinear.
+  return values:
+    model: the SGDClassifier, or None if there is no model yet and nothing to fit it on
+  """
+  state = online_models['models'].get(key)
+  start = time.time()
+  if state is None:
+    if np.shape(x_train)[0] == 0:
+      return None
+    model = linear_model.SGDClassifier(loss='log', alpha=get_online_alpha(c_value, np.shape(x_train)[0]), max_iter=ONLINE_FIT_MAX_EPOCHS, tol=1e-4, random_state=0)
+    model.fit(x_train, y_train)
+    online_models['models'][key] = {'model': model, 'student_ids': np.unique(student_ids), 'num_rows': np.shape(x_train)[0]}
+    online_models['full_fits'] += 1
+  else:
+    model = state['model']
+    is_new = np.zeros(np.shape(x_train)[0], bool)
+    is_new[:len(student_ids)] = ~np.in1d(student_ids, state['student_ids'], assume_unique=True)
+    if is_new.any():
+      x_new = x_train[np.flatnonzero(is_new)]
+      y_new = np.asarray(y_train)[is_new]
+      state['num_rows'] += len(y_new)
+      state['student_ids'] = np.sort(np.concatenate([state['student_ids'], student_ids[is_new[:len(student_ids)]]]))
+      # set_params would check every parameter of the model again
+      model.alpha = get_online_alpha(c_value, state['num_rows'])
+      for epoch in range(ONLINE_UPDATE_EPOCHS):
+        model.partial_fit(x_new, y_new)
+      online_models['updates'] += 1
+      online_models['update_rows'] += len(y_new)
+  online_models['fit_seconds'] += time.time() - start
+  return model
@@ -0,0 +1,224 @@
+import csv
+import gc
+import numpy as np
+from models import *
+from parse_course_data import *
+
+# Column headings of the course data, in the order get_course_data expects them
+COURSE_DATA_COLUMNS = [
+    'academic_status',          # 'Academic Status Code'
+    'grad_year',                # 'Degree Grant Year'
+    'stud_id',                  # 'Student ID Number'
+    'course_semester',          # 'AcadYr_Session'
+    'gender',                   # 'Gender Code'
+    'student_semester_str',     # 'Session Classification Code'
+    'major',                    # 'Session Major 1 Description'
+    'concentration',            # 'Concentration 1 Description'
+    'course_number',            # 'Course Work Course Number'
+    'section_no',               # 'Section Number'
+    'course_title',             # 'Course Work Course Title'
+    'section_title',            # 'Section Title (Actual)'
+    'professor_name'            # 'Faculty Full Name (Last, First)'
+]
+
+
+def intern_column(values):
+    """
+    Interns a column of strings into integer codes. Codes are handed out in order of first appearance, so
+    a lower code always means the value showed up earlier in the column.
+    return values:
+        codes: (numpy array) one integer code per value
+        table: (list) table[code] is the string that the code stands for
+    """
+    # setdefault only stores the index of the first row with each value, and hands that index back for
+    # every later row with the same value
+    first_index = {}
+    first_indices = np.array(map(first_index.setdefault, values, xrange(len(values))), np.int64)
+    is_first = first_indices == np.arange(len(values))
+    codes = (np.cumsum(is_first) - 1)[first_indices]
+    return codes, [values[i] for i in np.flatnonzero(is_first)]
+
+
+def intern_stripped_column(values):
+    """
+    Same as intern_column, but strips whitespace off of every value. The stripping is done once per distinct
+    value instead of once per row.
+    """
+    raw_codes, raw_table = intern_column(values)
+    remap, table = intern_column([value.strip() for value in raw_table])
+    return remap[raw_codes], table
+
+
+def get_course_columns(filename):
+    """
+    Reads the course data in bulk and returns a dictionary mapping every column name in COURSE_DATA_COLUMNS
+    to a (codes, table) tuple from intern_stripped_column. The header row is dropped. The file is assumed
+    to have the same format as for get_course_data.
+    """
+    with open(filename, 'rU') as f:
+        raw_columns = zip(*csv.reader(f))
+    if not raw_columns:
+        # an empty file has no columns at all
+        raw_columns = [()] * len(COURSE_DATA_COLUMNS)
+
+    columns = {}
+    for i, name in enumerate(COURSE_DATA_COLUMNS):
+        columns[name] = intern_stripped_column(raw_columns[i])
+    del raw_columns
+
+    # Get rid of the header row with column titles
+    status_codes, status_table = columns['academic_status']
+    if 'Academic Status Code' in status_table:
+        is_data_row = status_codes != status_table.index('Academic Status Code')
+        for name in COURSE_DATA_COLUMNS:
+            codes, table = columns[name]
+            columns[name] = (codes[is_data_row], table)
+
+    return columns
+
+
+def get_course_data_columnar(filename):
+    """
+    Columnar version of get_course_data: returns the same [students, courses, professors] list, but instead
+    of cleaning the data row by row, it interns every column into integer codes, runs normalize_course and
+    get_student_semester_no once per distinct value and applies the results to all rows with array lookups.
+    Enrollment counts, course totals and professor sets are aggregated with numpy as well, so the only
+    per-row python work left is adding the course offerings to each student.
+    """
+    # the garbage collector keeps rescanning the millions of strings we're holding on to while they're being
+    # read in, and none of them are garbage, so turn it off until we're done
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_course_data(get_course_columns(filename))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def build_course_data(columns):
+    """
+    Builds the [students, courses, professors] list that get_course_data returns from the interned columns
+    that get_course_columns returns.
+    """
+    student_codes, student_table = columns['stud_id']
+    semester_codes, semester_table = columns['course_semester']
+    professor_codes, professor_table = columns['professor_name']
+    number_codes, number_table = columns['course_number']
+    title_codes, title_table = columns['course_title']
+    section_codes, section_table = columns['section_title']
+    class_codes, class_table = columns['student_semester_str']
+    major_codes, major_table = columns['major']
+    num_semesters = len(semester_table)
+    num_professors = len(professor_table)
+
+    """ Normalize every distinct (course number, course title, section title) once """
+
+    raw_course_keys = (number_codes * len(title_table) + title_codes) * len(section_table) + section_codes
+    unique_keys, key_codes = np.unique(raw_course_keys, return_inverse=True)
+
+    # flat table of all of the normalized entries, entries_start/entries_count tell which part of the
+    # flat table belongs to which distinct key
+    flat_numbers = []
+    flat_titles = []
+    flat_sections = []
+    entries_start = np.zeros(len(unique_keys), np.int64)
+    entries_count = np.zeros(len(unique_keys), np.int64)
+    for k, raw_key in enumerate(unique_keys):
+        raw_key, section_code = divmod(raw_key, len(section_table))
+        number_code, title_code = divmod(raw_key, len(title_table))
+        normalized_courses = normalize_course(number_table[number_code], title_table[title_code], section_table[section_code])
+        entries_start[k] = len(flat_numbers)
+        entries_count[k] = len(normalized_courses)
+        for course_number, course_title, section_title in normalized_courses:
+            flat_numbers.append(course_number)
+            flat_titles.append(course_title)
+            flat_sections.append(section_title)
+    flat_course_codes, course_table = intern_column(flat_numbers)
+
+    # student semester number (0 to 7) for every (class code, course semester) combination
+    semester_no_lookup = np.zeros((len(class_table), num_semesters), np.int64)
+    for i, student_semester_str in enumerate(class_table):
+        for j, course_semester in enumerate(semester_table):
+            semester_no_lookup[i, j] = get_student_semester_no(student_semester_str, course_semester)
+
+    """ Expand the rows we keep into one entry per normalized course """
+
+    rows = np.flatnonzero(entries_count[key_codes] > 0)
+    row_keys = key_codes[rows]
+    row_num_entries = entries_count[row_keys]
+    row_entries_start = np.cumsum(row_num_entries) - row_num_entries
+    entry_rows = np.repeat(rows, row_num_entries)
+    entry_flat_index = entries_start[np.repeat(row_keys, row_num_entries)] + np.arange(len(entry_rows)) - np.repeat(row_entries_start, row_num_entries)
+    entry_courses = flat_course_codes[entry_flat_index]
+    entry_semesters = semester_codes[entry_rows]
+
+    """ Courses, course offerings and professors """
+
+    students = {}       # key = id, value = Student
+    courses = {}        # key = course_number, value = Course
+    professors = {}     # key = name, value = Professor
+
+    # the title and section title of a course come from the first entry that used its course number
+    course_list = [None] * len(course_table)
+    course_totals = np.bincount(entry_courses, minlength=len(course_table))
+    unique_courses, first_entries = np.unique(entry_courses, return_index=True)
+    for course_code, first_entry in zip(unique_courses, first_entries):
+        flat_index = entry_flat_index[first_entry]
+        course = Course(flat_titles[flat_index], flat_sections[flat_index], course_table[course_code], int(course_totals[course_code]))
+        courses[course.course_number] = course
+        course_list[course_code] = course
+
+    unique_offerings, entry_offerings, offering_enrollments = np.unique(entry_courses * num_semesters + entry_semesters, return_inverse=True, return_counts=True)
+    offering_list = []
+    for offering_key, enrollment in zip(unique_offerings, offering_enrollments):
+        course_code, semester_code = divmod(offering_key, num_semesters)
+        course_offering = course_list[course_code].add_course_offering(semester_table[semester_code])
+        course_offering.enrollment = int(enrollment)
+        offering_list.append(course_offering)
+
+    for professor_code in np.unique(professor_codes[rows]):
+        professors[professor_table[professor_code]] = Professor(professor_table[professor_code])
+    for teaching_key in np.unique(entry_offerings * num_professors + professor_codes[entry_rows]):
+        offering_code, professor_code = divmod(teaching_key, num_professors)
+        offering_list[offering_code].add_professor(professors[professor_table[professor_code]])
+
+    """ Students """
+
+    row_students = student_codes[rows]
+    row_semesters = semester_codes[rows]
+    row_semester_nos = semester_no_lookup[class_codes[rows], row_semesters]
+    # like get_course_data, a row with more than one normalized course only adds the last one to the student
+    row_offerings = entry_offerings[row_entries_start + row_num_entries - 1]
+
+    unique_students, first_rows = np.unique(row_students, return_index=True)
+    student_list = [None] * len(student_table)
+    for student_code, first_row in zip(unique_students, rows[first_rows]):
+        attributes = [columns[name][1][columns[name][0][first_row]] for name in ['stud_id', 'gender', 'grad_year', 'major', 'academic_status', 'concentration']]
+        new_student = Student(*attributes)
+        students[new_student.ID] = new_student
+        student_list[student_code] = new_student
+
+    for student_code, student_semester_no, offering_code in zip(row_students.tolist(), row_semester_nos.tolist(), row_offerings.tolist()):
+        student_list[student_code].list_of_course_offerings[student_semester_no].append(offering_list[offering_code])
+
+    # semesters present, in the order the student first showed up in them
+    unique_pairs, first_rows = np.unique(row_students * num_semesters + row_semesters, return_index=True)
+    for pair in unique_pairs[np.argsort(first_rows)]:
+        student_code, semester_code = divmod(pair, num_semesters)
+        student_list[student_code].semesters_present.append(semester_table[semester_code])
+
+    # the major history keeps the major of the last row for each student semester
+    reversed_pairs = (row_students * 8 + row_semester_nos)[::-1]
+    unique_pairs, last_rows = np.unique(reversed_pairs, return_index=True)
+    last_rows = rows[len(rows) - 1 - last_rows]
+    for pair, last_row in zip(unique_pairs, last_rows):
+        student_code, student_semester_no = divmod(pair, 8)
+        student_list[student_code].major_history[int(student_semester_no)] = major_table[major_codes[last_row]]
+
+    for s in students:
+        students[s].set_first_semester(students[s].semesters_present)
+        students[s].set_final_semester()
+        students[s].set_major_history()
+
+    return [students, courses, professors]
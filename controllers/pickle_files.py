@@ -0,0 +1,39 @@
+import cPickle
+import errno
+import os
+
+def make_parent_dir(filepath):
+  """
+  Creates the directory of filepath if it doesn't exist yet, another process may be creating it at the same time
+  """
+  parent_dir = os.path.dirname(filepath)
+  if parent_dir and not os.path.isdir(parent_dir):
+    try:
+      os.makedirs(parent_dir)
+    except OSError as e:
+      if e.errno != errno.EEXIST:
+        raise
+
+def save_pickle_atomically(data, filepath):
+  """
+  Pickles data to filepath (and creates its directory). It is written to a temporary file of this process
+  first, which is then renamed over filepath, so a crash never leaves a half written file behind and two
+  processes saving the same file never write into the same temporary file.
+  """
+  make_parent_dir(filepath)
+  temp_filepath = filepath + '.%d.tmp' % os.getpid()
+  with open(temp_filepath, 'wb') as f:
+    cPickle.dump(data, f, cPickle.HIGHEST_PROTOCOL)
+  os.rename(temp_filepath, filepath)
+
+def load_pickle(filepath, default=None):
+  """
+  The unpickled contents of filepath, or default if there is no such file or it was cut off
+  """
+  if not os.path.exists(filepath):
+    return default
+  try:
+    with open(filepath, 'rb') as f:
+      return cPickle.load(f)
+  except (EOFError, cPickle.UnpicklingError):
+    return default
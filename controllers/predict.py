@@ -15,7 +15,8 @@ def test_logistic_binary(logistic, x_test, y_test):
 def predict_enrollment(logistic, x_test):
   """
   for a given course, find the probabilities of taking that course
+  x_test can be a list of feature vectors, a numpy array or a scipy sparse matrix
   """
   prob = logistic.predict_proba(x_test)
 
-  return [(1-p[0]) for p in prob]
+  return list(1 - prob[:, 0])
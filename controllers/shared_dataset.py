@@ -0,0 +1,278 @@
+import collections
+import cPickle
+import os
+import shutil
+import numpy as np
+from models import *
+from cohort_index import *
+from enrollment_index import *
+
+# Bump this whenever the layout of the published arrays changes
+SHARED_DATASET_VERSION = 1
+
+# the arrays of the enrollment index that are published as they are
+ENROLLMENT_INDEX_ARRAYS = ['course_totals', 'first_semester_ordinals', 'final_semesters', 'is_female',
+                           'major_history', 'enrollment_indptr', 'enrollment_courses', 'enrollment_semesters']
+
+def get_string_array(values):
+    """ Fixed width byte string array of a list of strings (None becomes '') """
+    return np.array([value if value is not None else '' for value in values], np.string_)
+
+def publish_dataset(dataset_dir, students, courses, enrollment_index=None, cohort_index_arrays=None):
+    """
+    Writes students (dict mapping student id to Student) and courses (dict mapping course number to Course)
+    to dataset_dir as flat typed arrays, one .npy file per array, so that other processes can attach to them
+    with attach_dataset instead of parsing the data again or unpickling the object graph.
+    Everything is written to a temporary directory first and then renamed, so a dataset_dir that exists is
+    always complete. If dataset_dir already exists it is left alone (use a new directory for new data, e.g.
+    one named after hash_input_files).
+    enrollment_index: (optional) make_enrollment_index of students and courses, built here if it isn't given
+    cohort_index_arrays: (optional) get_cohort_arrays of enrollment_index, built here if it isn't given
+    The arrays are:
+        everything in ENROLLMENT_INDEX_ARRAYS and get_cohort_arrays
+        student_ids, course_numbers, major_names: the string tables of the enrollment index
+        student_genders, student_graduating_classes, student_majors, student_concentrations,
+            student_academic_statuses, student_first_semesters: the Student attributes, by student code
+        present_indptr, present_semesters: semester ordinals of the semesters_present of every student
+        course_titles, course_section_titles: by course code
+        offering_indptr: the offerings of course code c are offering_indptr[c] to offering_indptr[c + 1]
+        offering_semesters, offering_enrollments, offering_prereg: semester ordinal, enrollment and
+            prereg_predicted_enrollment of every offering
+        offering_professor_indptr, offering_professors, professor_names: the professors of every offering
+    """
+    if os.path.isdir(dataset_dir):
+        return
+    if enrollment_index is None:
+        enrollment_index = make_enrollment_index(students, courses)
+    if cohort_index_arrays is None:
+        cohort_index_arrays = get_cohort_arrays(enrollment_index)
+
+    arrays = {}
+    for name in ENROLLMENT_INDEX_ARRAYS:
+        arrays[name] = enrollment_index[name]
+    arrays.update(cohort_index_arrays)
+
+    student_list = [students[stud_id] for stud_id in enrollment_index['student_ids']]
+    arrays['student_ids'] = get_string_array(enrollment_index['student_ids'])
+    arrays['major_names'] = get_string_array(enrollment_index['major_names'])
+    for name, attribute in [('student_genders', 'gender'), ('student_graduating_classes', 'graduating_class'),
+                            ('student_majors', 'major'), ('student_concentrations', 'concentration'),
+                            ('student_academic_statuses', 'academic_status'), ('student_first_semesters', 'first_semester')]:
+        arrays[name] = get_string_array([getattr(student, attribute) for student in student_list])
+    arrays['present_indptr'] = np.cumsum([0] + [len(student.semesters_present) for student in student_list]).astype(np.int64)
+    arrays['present_semesters'] = np.array([semester_ordinal(semester) for student in student_list for semester in student.semesters_present], np.int32)
+
+    course_list = [courses[course_no] for course_no in enrollment_index['course_numbers']]
+    arrays['course_numbers'] = get_string_array(enrollment_index['course_numbers'])
+    arrays['course_titles'] = get_string_array([course.title for course in course_list])
+    arrays['course_section_titles'] = get_string_array([course.section_title for course in course_list])
+
+    offering_list = [course_offering for course in course_list for course_offering in course.course_offerings.values()]
+    professor_codes = {}
+    offering_professors = [[professor_codes.setdefault(professor.name, len(professor_codes)) for professor in course_offering.professors] for course_offering in offering_list]
+    professor_names = [None] * len(professor_codes)
+    for name, code in professor_codes.items():
+        professor_names[code] = name
+    arrays['offering_indptr'] = np.cumsum([0] + [len(course.course_offerings) for course in course_list]).astype(np.int64)
+    arrays['offering_semesters'] = np.array([course_offering.semester_ordinal for course_offering in offering_list], np.int32)
+    arrays['offering_enrollments'] = np.array([course_offering.enrollment for course_offering in offering_list], np.int64)
+    arrays['offering_prereg'] = np.array([map(float, course_offering.prereg_predicted_enrollment) for course_offering in offering_list], np.float64).reshape(len(offering_list), 4)
+    arrays['offering_professor_indptr'] = np.cumsum([0] + map(len, offering_professors)).astype(np.int64)
+    arrays['offering_professors'] = np.array([code for codes in offering_professors for code in codes], np.int32)
+    arrays['professor_names'] = get_string_array(professor_names)
+
+    parent_dir = os.path.dirname(os.path.abspath(dataset_dir))
+    if not os.path.isdir(parent_dir):
+        os.makedirs(parent_dir)
+    temp_dir = dataset_dir.rstrip(os.sep) + '.tmp%d' % os.getpid()
+    if os.path.isdir(temp_dir):
+        shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_dir, name + '.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(temp_dir, 'manifest.pickle'), 'wb') as f:
+        cPickle.dump({'version': SHARED_DATASET_VERSION, 'arrays': sorted(arrays)}, f, cPickle.HIGHEST_PROTOCOL)
+    try:
+        os.rename(temp_dir, dataset_dir)
+    except OSError:
+        # another process published it first
+        shutil.rmtree(temp_dir)
+
+class SharedModels(collections.Mapping):
+    """
+    Read only dict of model objects (Students or Courses) that are made from the arrays of an attached
+    dataset the first time they are looked up, and kept after that. Iterates in code order, which is the
+    iteration order of the dict the dataset was published from.
+    names: the array of the keys (student ids or course numbers), by code
+    make_model: function making the model object of a code
+    codes: (optional) sorted codes of the models in this dict, if it only has some of them (see subset)
+    """
+
+    def __init__(self, names, make_model, codes=None, shared=None):
+        self._names = names
+        self._codes = codes
+        # the code of every name and the models made so far, shared with the subsets
+        self._shared = shared if shared is not None else {'make_model': make_model, 'name_codes': None, 'models': {}}
+
+    def get_code(self, key):
+        if self._shared['name_codes'] is None:
+            self._shared['name_codes'] = {name: code for code, name in enumerate(self._names.tolist())}
+        code = self._shared['name_codes'][key]
+        if self._codes is not None:
+            position = np.searchsorted(self._codes, code)
+            if position == len(self._codes) or self._codes[position] != code:
+                raise KeyError(key)
+        return code
+
+    def subset(self, codes):
+        """ SharedModels with only the models of codes (sorted), without making any of them """
+        return SharedModels(self._names, None, codes, self._shared)
+
+    def __getitem__(self, key):
+        models = self._shared['models']
+        if key not in models:
+            models[key] = self._shared['make_model'](self.get_code(key))
+        elif self._codes is not None:
+            self.get_code(key)
+        return models[key]
+
+    def __contains__(self, key):
+        try:
+            self.get_code(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        if self._codes is None:
+            return iter(self._names.tolist())
+        # in the order of a dict filled with the models in code order, which is what query_cohort_index
+        # gives for a dict of students
+        return iter(dict.fromkeys(self._names[self._codes].tolist()))
+
+    def __len__(self):
+        if self._codes is None:
+            return len(self._names)
+        return len(self._codes)
+
+def attach_dataset(dataset_dir):
+    """
+    Attaches to a dataset written by publish_dataset. The arrays are memory mapped read only, so attaching
+    takes the same few milliseconds whatever the size of the data, and the pages are shared with every other
+    process that attaches to the same files. Returns a dict with
+        arrays: dict of the memory mapped arrays
+        students, courses: SharedModels of the Students and Courses, made on first use
+        professors: dict mapping professor name to the Professor of the courses made so far
+    and get_shared_enrollment_index, get_shared_cohort_index and get_shared_all_courses_list give the rest
+    of what initialize_input_data returns.
+    Raises IOError if dataset_dir isn't a dataset of this SHARED_DATASET_VERSION.
+    """
+    manifest_filepath = os.path.join(dataset_dir, 'manifest.pickle')
+    with open(manifest_filepath, 'rb') as f:
+        manifest = cPickle.load(f)
+    if manifest['version'] != SHARED_DATASET_VERSION:
+        raise IOError("%s is a version %d shared dataset, not version %d" % (dataset_dir, manifest['version'], SHARED_DATASET_VERSION))
+
+    arrays = {}
+    for name in manifest['arrays']:
+        # plain array views of the memory maps, np.memmap slices are much slower to make
+        arrays[name] = np.load(os.path.join(dataset_dir, name + '.npy'), mmap_mode='r').view(np.ndarray)
+    dataset = {'arrays': arrays, 'tables': {}, 'professors': {}, 'offerings': None, 'enrollment_index': None, 'cohort_index': None}
+    dataset['students'] = SharedModels(arrays['student_ids'], lambda student_code: make_shared_student(dataset, student_code))
+    dataset['courses'] = SharedModels(arrays['course_numbers'], lambda course_code: make_shared_course(dataset, course_code))
+    return dataset
+
+def make_shared_course(dataset, course_code):
+    """ The Course with course_code, with all of its offerings, made from the arrays of dataset """
+    arrays = dataset['arrays']
+    course = Course(str(arrays['course_titles'][course_code]), str(arrays['course_section_titles'][course_code]),
+                    str(arrays['course_numbers'][course_code]), int(arrays['course_totals'][course_code]))
+    professor_indptr = arrays['offering_professor_indptr']
+    for offering in range(arrays['offering_indptr'][course_code], arrays['offering_indptr'][course_code + 1]):
+        course_offering = course.add_course_offering(semester_from_ordinal(int(arrays['offering_semesters'][offering])))
+        course_offering.enrollment = int(arrays['offering_enrollments'][offering])
+        # the prereg counts are floats in the parsed data (parse_prereg_file), and so in the array
+        course_offering.prereg_predicted_enrollment = arrays['offering_prereg'][offering].tolist()
+        for professor_code in arrays['offering_professors'][professor_indptr[offering]:professor_indptr[offering + 1]]:
+            name = str(arrays['professor_names'][professor_code])
+            if name not in dataset['professors']:
+                dataset['professors'][name] = Professor(name)
+            course_offering.add_professor(dataset['professors'][name])
+    return course
+
+def make_shared_student(dataset, student_code):
+    """
+    The Student with student_code made from the arrays of dataset. Its course offerings are the ones of
+    dataset['courses'] (see get_shared_offerings).
+    """
+    arrays = dataset['arrays']
+    [stud_id, gender, graduating_class, major, concentration, academic_status, first_semester] = [
+        get_shared_table(dataset, name)[student_code] for name in ['student_ids', 'student_genders', 'student_graduating_classes', 'student_majors',
+                                                                   'student_concentrations', 'student_academic_statuses', 'student_first_semesters']]
+    student = Student(stud_id, gender, graduating_class, major, concentration, academic_status)
+    student.first_semester = first_semester
+    student.first_semester_ordinal = get_shared_table(dataset, 'first_semester_ordinals')[student_code]
+    student.final_semester = get_shared_table(dataset, 'final_semesters')[student_code]
+    major_names = get_shared_table(dataset, 'major_names')
+    for student_sem, major_code in enumerate(get_shared_table(dataset, 'major_history')[student_code]):
+        if major_code >= 0:
+            student.major_history[student_sem] = major_names[major_code]
+    present_indptr = arrays['present_indptr']
+    student.semesters_present = map(semester_from_ordinal, arrays['present_semesters'][present_indptr[student_code]:present_indptr[student_code + 1]].tolist())
+
+    # all the enrollments of the student at once, split into the student semesters by the row pointers
+    indptr = arrays['enrollment_indptr'][student_code * 8:student_code * 8 + 9].tolist()
+    course_codes = arrays['enrollment_courses'][indptr[0]:indptr[8]].tolist()
+    ordinals = arrays['enrollment_semesters'][indptr[0]:indptr[8]].tolist()
+    offerings = get_shared_offerings(dataset)
+    for student_sem in range(8):
+        student.list_of_course_offerings[student_sem] = [offerings[course_code, ordinal] for course_code, ordinal in
+                                                         zip(course_codes[indptr[student_sem] - indptr[0]:indptr[student_sem + 1] - indptr[0]],
+                                                             ordinals[indptr[student_sem] - indptr[0]:indptr[student_sem + 1] - indptr[0]])]
+    return student
+
+def get_shared_table(dataset, name):
+    """
+    The array called name of dataset as a list (of python strings and ints), made on first use. Looking up
+    single elements of a list is much faster than of an array.
+    """
+    if name not in dataset['tables']:
+        dataset['tables'][name] = dataset['arrays'][name].tolist()
+    return dataset['tables'][name]
+
+def get_shared_offerings(dataset):
+    """
+    Dict mapping (course code, semester ordinal) to the Course_Offering of every offering of the dataset.
+    Makes every course the first time, there are far fewer courses than students.
+    """
+    if dataset['offerings'] is None:
+        offerings = {}
+        for course_code, course_no in enumerate(get_shared_enrollment_index(dataset)['course_numbers']):
+            for course_offering in dataset['courses'][course_no].course_offerings.values():
+                offerings[course_code, course_offering.semester_ordinal] = course_offering
+        dataset['offerings'] = offerings
+    return dataset['offerings']
+
+def get_shared_enrollment_index(dataset):
+    """ The make_enrollment_index of the attached dataset, with the memory mapped arrays in it """
+    if dataset['enrollment_index'] is None:
+        arrays = dataset['arrays']
+        enrollment_index = {name: arrays[name] for name in ENROLLMENT_INDEX_ARRAYS}
+        enrollment_index['student_ids'] = arrays['student_ids'].tolist()
+        enrollment_index['student_codes'] = {stud_id: code for code, stud_id in enumerate(enrollment_index['student_ids'])}
+        enrollment_index['course_numbers'] = arrays['course_numbers'].tolist()
+        enrollment_index['course_codes'] = {course_no: code for code, course_no in enumerate(enrollment_index['course_numbers'])}
+        enrollment_index['major_names'] = arrays['major_names'].tolist()
+        dataset['enrollment_index'] = enrollment_index
+    return dataset['enrollment_index']
+
+def get_shared_cohort_index(dataset):
+    """ The make_cohort_index of the attached dataset, on its lazily made students """
+    if dataset['cohort_index'] is None:
+        dataset['cohort_index'] = make_cohort_index_from_arrays(dataset['students'], get_shared_enrollment_index(dataset)['student_ids'], dataset['arrays'])
+    return dataset['cohort_index']
+
+def get_shared_all_courses_list(dataset):
+    """ The all_courses_list of initialize_input_data, [course number, title] by course code """
+    arrays = dataset['arrays']
+    return [[course_no, title] for course_no, title in zip(arrays['course_numbers'].tolist(), arrays['course_titles'].tolist())]
@@ -0,0 +1,91 @@
+import gc
+import glob
+import hashlib
+import os
+from models import *
+from pickle_files import *
+
+# Bump this whenever the parsing code or the models change in a way that makes old snapshots wrong
+SNAPSHOT_VERSION = 4
+# the model classes pickled in a snapshot, their attributes go into the hash too
+SNAPSHOT_MODEL_CLASSES = [Student, Course, Course_Offering, Professor]
+
+def get_snapshot_layout():
+  """
+  The attributes of the SNAPSHOT_MODEL_CLASSES, so that a snapshot of models with other attributes gives a
+  different hash (and isn't loaded) even if SNAPSHOT_VERSION wasn't bumped
+  """
+  return repr([(model_class.__name__, model_class.__slots__) for model_class in SNAPSHOT_MODEL_CLASSES])
+
+def get_added_prereg_filepaths(added_prereg_filepaths):
+  """
+  The sorted prereg survey files matched by each path (or glob) of added_prereg_filepaths, [] for a None
+  """
+  return [sorted(glob.glob(prereg_filepath)) if prereg_filepath is not None else [] for prereg_filepath in added_prereg_filepaths]
+
+def get_base_prereg_filepaths(prereg_data_filepath, added_prereg_filepaths=[]):
+  """
+  The sorted prereg survey files matched by prereg_data_filepath that aren't one of the added_prereg_filepaths,
+  which are the surveys that came in with the added course data files. So a new survey can be dropped in
+  with the others without changing the base data. prereg_data_filepath can be a list of the files too.
+  """
+  if isinstance(prereg_data_filepath, basestring):
+    prereg_filepaths = glob.glob(prereg_data_filepath)
+  else:
+    prereg_filepaths = prereg_data_filepath
+  added_filepaths = set(os.path.abspath(filepath) for filepaths in get_added_prereg_filepaths(added_prereg_filepaths) for filepath in filepaths)
+  return [filepath for filepath in sorted(prereg_filepaths) if os.path.abspath(filepath) not in added_filepaths]
+
+def hash_input_files(enrollment_history_filepath, prereg_data_filepath, added_enrollment_filepaths=[], added_prereg_filepaths=[]):
+  """
+  Returns a hex digest of the contents (and names, since the prereg semester comes from the filename) of
+  the enrollment history csv, of the prereg survey files of get_base_prereg_filepaths and of the course
+  data files added to them with add_course_data, each followed by the survey files added with it (in the
+  order they were added). Any change to one of those files gives a different digest.
+  added_prereg_filepaths: one prereg survey path (or glob, or None) per added course data file, missing
+    ones are None
+  """
+  added_prereg_filepaths = list(added_prereg_filepaths) + [None] * (len(added_enrollment_filepaths) - len(added_prereg_filepaths))
+  filepaths = [enrollment_history_filepath] + get_base_prereg_filepaths(prereg_data_filepath, added_prereg_filepaths)
+  for added_filepath, prereg_filepaths in zip(added_enrollment_filepaths, get_added_prereg_filepaths(added_prereg_filepaths)):
+    filepaths += [added_filepath] + prereg_filepaths
+
+  sha = hashlib.sha1()
+  sha.update(str(SNAPSHOT_VERSION))
+  sha.update(get_snapshot_layout())
+  for filepath in filepaths:
+    sha.update(os.path.basename(filepath))
+    with open(filepath, 'rb') as f:
+      for chunk in iter(lambda: f.read(1 << 20), ''):
+        sha.update(chunk)
+  return sha.hexdigest()
+
+def get_snapshot_filepath(snapshot_dir, input_hash):
+  return os.path.join(snapshot_dir, 'input_data_' + input_hash + '.pickle')
+
+def load_snapshot(snapshot_dir, input_hash):
+  """
+  Returns the dataset stored for input_hash in snapshot_dir, or None if there isn't one
+  """
+  # the object graph is all new objects with no garbage in it, so the garbage collector would only slow
+  # the unpickling down
+  gc_was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    # None for a snapshot that was cut off while being written too, it is just rebuilt
+    return load_pickle(get_snapshot_filepath(snapshot_dir, input_hash))
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+
+def save_snapshot(snapshot_dir, input_hash, dataset):
+  """
+  Stores dataset (anything picklable, usually a dict of the students, courses, professors and
+  all_courses_list) for input_hash and removes the snapshots of any older input files
+  """
+  snapshot_filepath = get_snapshot_filepath(snapshot_dir, input_hash)
+  save_pickle_atomically(dataset, snapshot_filepath)
+
+  for old_snapshot_filepath in glob.glob(get_snapshot_filepath(snapshot_dir, '*')):
+    if old_snapshot_filepath != snapshot_filepath:
+      os.remove(old_snapshot_filepath)
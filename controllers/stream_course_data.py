@@ -0,0 +1,172 @@
+import csv
+import resource
+from array import array
+from itertools import islice
+from models import *
+from parse_course_data import *
+
+# exports bigger than this are parsed with stream_course_data by load_input_dataset, get_course_data_columnar
+# holds all of the rows of the file in memory while it interns them
+MAX_IN_MEMORY_EXPORT_BYTES = 1 << 30
+
+def read_course_rows(filename):
+    """
+    Generator over the stripped rows of a course data file (in the format described in get_course_data),
+    without the header row. Only one row is held in memory at a time.
+    """
+    with open(filename,'rU') as f:
+        for row in csv.reader(f):
+            row = [value.strip() for value in row]
+            # Get rid of the header row with column titles
+            if row[0] == 'Academic Status Code':
+                continue
+            yield row
+
+def clean_course_rows(rows):
+    """
+    Generator that cleans the rows from read_course_rows and yields (row, student_semester_no,
+    normalized_courses) for each row that we include in our model. normalize_course is only run once per
+    distinct (course number, course title, section title).
+    """
+    normalized_course_cache = {}
+    for row in rows:
+        course_key = (row[8], row[10], row[11])
+        if course_key not in normalized_course_cache:
+            normalized_course_cache[course_key] = normalize_course(*course_key)
+        normalized_courses = normalized_course_cache[course_key]
+        if not normalized_courses:
+            continue
+        yield row, get_student_semester_no(row[5], row[3]), normalized_courses
+
+def chunk_rows(rows, chunk_size):
+    """
+    Generator that groups rows into lists of (at most) chunk_size rows
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def make_empty_course_aggregates():
+    """
+    The aggregates that stream_course_data folds the rows into:
+        courses: course number -> [course title, section title, total number of students]
+        offering_codes: (course number, semester) -> offering code (index into offerings)
+        offerings: list of [course number, semester, enrollment, set of professor names]
+        students: student id -> [gender, graduating class, major, academic status, concentration (all from
+            the student's first row), semesters present (list), major history (dict, student semester ->
+            major), course history (array of offering_code * 8 + student semester, one per row, or None
+            without keep_course_history)]
+        professors: set of professor names
+        num_rows: number of rows that were folded in
+    Apart from the course histories (4 bytes per row, only with keep_course_history), everything in here grows
+    with the number of distinct students, courses, semesters and professors, never with the number of rows.
+    """
+    return {'courses': {}, 'offering_codes': {}, 'offerings': [], 'students': {}, 'professors': set(), 'num_rows': 0}
+
+def fold_course_rows(aggregates, cleaned_rows, keep_course_history=False):
+    """
+    Folds cleaned rows (from clean_course_rows) into aggregates
+    """
+    courses = aggregates['courses']
+    offering_codes = aggregates['offering_codes']
+    offerings = aggregates['offerings']
+    students = aggregates['students']
+    for row, student_semester_no, normalized_courses in cleaned_rows:
+        # intern the strings we hold on to so that every row doesn't keep its own copy around
+        stud_id = row[2]
+        course_semester = intern(row[3])
+        major = intern(row[6])
+        professor_name = intern(row[12])
+
+        for course_number, course_title, section_title in normalized_courses:
+            if course_number not in courses:
+                courses[course_number] = [course_title, section_title, 0]
+            courses[course_number][2] += 1
+
+            offering_key = (course_number, course_semester)
+            if offering_key not in offering_codes:
+                offering_codes[offering_key] = len(offerings)
+                offerings.append([course_number, course_semester, 0, set()])
+            offering = offerings[offering_codes[offering_key]]
+            offering[2] += 1
+            offering[3].add(professor_name)
+        aggregates['professors'].add(professor_name)
+
+        if stud_id not in students:
+            students[stud_id] = [intern(row[4]), intern(row[1]), major, intern(row[0]), intern(row[7]), [], {}, array('i') if keep_course_history else None]
+        student = students[stud_id]
+        if course_semester not in student[5]:
+            student[5].append(course_semester)
+        student[6][student_semester_no] = major
+        # like get_course_data, a row with more than one normalized course only counts the last one for the student
+        if keep_course_history:
+            student[7].append(offering_codes[offering_key] * 8 + student_semester_no)
+
+        aggregates['num_rows'] += 1
+
+def get_peak_memory_mb():
+    """
+    Peak resident memory of this process so far, in megabytes
+    """
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def stream_course_data(filename, chunk_size=10000, keep_course_history=False):
+    """
+    Streaming version of get_course_data for exports that are too big to keep every row in memory: the file
+    is read through a generator pipeline in chunks of chunk_size rows, and every chunk is folded into the
+    aggregates described in make_empty_course_aggregates before the next one is read. Set
+    keep_course_history to also keep the course history of every student, which make_models_from_aggregates
+    needs.
+    Memory is bounded by the aggregates and one chunk of rows, plus 4 bytes per row with keep_course_history.
+    The peak memory of the process at the end is stored in aggregates['peak_memory_mb'].
+    """
+    aggregates = make_empty_course_aggregates()
+    for chunk in chunk_rows(clean_course_rows(read_course_rows(filename)), chunk_size):
+        fold_course_rows(aggregates, chunk, keep_course_history)
+
+    aggregates['peak_memory_mb'] = get_peak_memory_mb()
+    return aggregates
+
+def make_models_from_aggregates(aggregates):
+    """
+    Builds the [students, courses, professors] list that get_course_data returns from the aggregates of
+    stream_course_data (which must have been run with keep_course_history=True).
+    """
+    if aggregates['students'] and next(aggregates['students'].itervalues())[7] is None:
+        raise ValueError("make_models_from_aggregates needs the aggregates of stream_course_data with keep_course_history=True")
+    students = {}
+    courses = {}
+    professors = {}
+
+    for professor_name in aggregates['professors']:
+        professors[professor_name] = Professor(professor_name)
+
+    for course_number, [course_title, section_title, total_number_of_students] in aggregates['courses'].items():
+        courses[course_number] = Course(course_title, section_title, course_number, total_number_of_students)
+
+    offering_list = []
+    for course_number, course_semester, enrollment, professor_names in aggregates['offerings']:
+        course_offering = courses[course_number].add_course_offering(course_semester)
+        course_offering.enrollment = enrollment
+        for professor_name in professor_names:
+            course_offering.add_professor(professors[professor_name])
+        offering_list.append(course_offering)
+
+    for stud_id, [gender, graduating_class, major, academic_status, concentration, semesters_present, major_history, course_history] in aggregates['students'].items():
+        student = Student(stud_id, gender, graduating_class, major, academic_status, concentration)
+        for code in course_history:
+            student.add_course_offering(offering_list[code // 8], code % 8)
+        student.semesters_present = list(semesters_present)
+        student.major_history = dict(major_history)
+        students[stud_id] = student
+
+    for s in students:
+        students[s].set_first_semester(students[s].semesters_present)
+        students[s].set_final_semester()
+        students[s].set_major_history()
+
+    return [students, courses, professors]
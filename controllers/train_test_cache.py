@@ -0,0 +1,104 @@
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+import scipy.sparse
+from pickle_files import *
+
+# Bump this whenever the feature building changes, so that spilled train/test data from older code isn't used
+TRAIN_TEST_CACHE_VERSION = 2
+
+def make_train_test_cache(max_entries=None, max_bytes=None, spill_dir=None, namespace=''):
+  """
+  Returns an empty least recently used cache for train/test data ([x_train, y_train, x_test, y_test]), as a
+  dict with the entries, the limits and the counters:
+    hits, misses: lookups that found / didn't find the data
+    spill_hits: the hits that had to be loaded from spill_dir
+    evictions: entries dropped from memory to stay within the limits
+  max_entries, max_bytes: (optional) limits on the number of entries and on their total size in memory, the
+    least recently used entries are evicted first
+  spill_dir: (optional) evicted entries are written to this directory and loaded back from there when they're
+    needed again. Since the files stay there, later runs get them too (use flush_train_test_cache at the end
+    of a run to write the entries that are still in memory).
+  namespace: identifies the data the features come from (e.g. hash_input_files of the input files), so that
+    the spilled entries of different data are kept apart
+  """
+  return {'entries': OrderedDict(), 'entry_bytes': {}, 'total_bytes': 0, 'max_entries': max_entries,
+          'max_bytes': max_bytes, 'spill_dir': spill_dir, 'namespace': namespace, 'hits': 0, 'misses': 0,
+          'spill_hits': 0, 'evictions': 0}
+
+def get_train_test_key(situation, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data):
+  return (situation, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, bool(add_dummy_data))
+
+def get_data_nbytes(data):
+  """
+  Approximate size in bytes of a feature matrix or label vector (numpy array, scipy sparse matrix or list)
+  """
+  if scipy.sparse.issparse(data):
+    return data.data.nbytes + data.indices.nbytes + data.indptr.nbytes
+  if hasattr(data, 'nbytes'):
+    return data.nbytes
+  if data and isinstance(data[0], list):
+    return sys.getsizeof(data) + sum(sys.getsizeof(row) for row in data)
+  return sys.getsizeof(data)
+
+def get_spill_filepath(cache, key):
+  key_hash = hashlib.sha1(repr((TRAIN_TEST_CACHE_VERSION, cache['namespace'], key))).hexdigest()
+  return os.path.join(cache['spill_dir'], 'train_test_' + key_hash + '.pickle')
+
+def spill_train_test(cache, key, train_test_data):
+  spill_filepath = get_spill_filepath(cache, key)
+  if not os.path.exists(spill_filepath):
+    save_pickle_atomically(train_test_data, spill_filepath)
+
+def lookup_train_test(cache, key):
+  """
+  Returns the train/test data stored for key (see get_train_test_key), or None if there isn't any
+  """
+  entries = cache['entries']
+  if key in entries:
+    # move it to the most recently used end
+    train_test_data = entries.pop(key)
+    entries[key] = train_test_data
+    cache['hits'] += 1
+    return train_test_data
+
+  if cache['spill_dir'] is not None:
+    train_test_data = load_pickle(get_spill_filepath(cache, key))
+    if train_test_data is not None:
+      cache['hits'] += 1
+      cache['spill_hits'] += 1
+      store_train_test(cache, key, train_test_data)
+      return train_test_data
+
+  cache['misses'] += 1
+  return None
+
+def store_train_test(cache, key, train_test_data):
+  """
+  Stores train_test_data for key, evicting the least recently used entries if the cache is over its limits
+  """
+  entries = cache['entries']
+  if key in entries:
+    cache['total_bytes'] -= cache['entry_bytes'][key]
+    del entries[key]
+  entries[key] = train_test_data
+  cache['entry_bytes'][key] = sum(get_data_nbytes(data) for data in train_test_data)
+  cache['total_bytes'] += cache['entry_bytes'][key]
+
+  while entries and ((cache['max_entries'] is not None and len(entries) > cache['max_entries']) or
+                     (cache['max_bytes'] is not None and cache['total_bytes'] > cache['max_bytes'])):
+    evicted_key, evicted_data = entries.popitem(last=False)
+    cache['total_bytes'] -= cache['entry_bytes'].pop(evicted_key)
+    cache['evictions'] += 1
+    if cache['spill_dir'] is not None:
+      spill_train_test(cache, evicted_key, evicted_data)
+
+def flush_train_test_cache(cache):
+  """
+  Writes the entries still in memory to spill_dir, so that the next run finds all of them
+  """
+  if cache['spill_dir'] is None:
+    return
+  for key, train_test_data in cache['entries'].items():
+    spill_train_test(cache, key, train_test_data)
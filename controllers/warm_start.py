@@ -0,0 +1,53 @@
+import time
+import numpy as np
+from batch_logistic import *
+
+def make_warm_starts():
+  """
+  Returns an empty store of fitted coefficients to start later fits from, as a dict with the coefficients
+  by get_warm_start_key and the counters:
+    warm_fits, cold_fits: fits that did / didn't have coefficients to start from
+    warm_iterations, cold_iterations: the Newton iterations of those fits
+    fit_seconds: the time spent fitting
+  The backtest fits the same (course, student semester, situation) for every window, and consecutive windows
+  only differ by a semester of students, so the coefficients of one window are a good start for the next.
+  """
+  return {'coefs': {}, 'warm_fits': 0, 'cold_fits': 0, 'warm_iterations': 0, 'cold_iterations': 0, 'fit_seconds': 0.0}
+
+def get_warm_start_key(desired_course, current_semester, situation):
+  return (desired_course, current_semester, situation)
+
+def fit_warm_started_logistic(warm_starts, keys, x_list, y_list, c_value=1e-1):
+  """
+  fit_compressed_logistic of the problems of x_list and y_list, starting every problem from the coefficients
+  stored in warm_starts for its key (from keys) if there are any, and storing the new coefficients there
+  afterwards. The result is the same as a fit from zero, to the tolerance of fit_batch_logistic.
+  The warm starts only pay off for the problems with few columns (up to MAX_EXACT_NEWTON_COEFS
+  coefficients), liblinear from zero is faster than the batched solver on the course history models.
+  return values:
+    models: list of a fitted BatchLogistic for every problem
+  """
+  # features plus the intercept (an empty list of feature vectors has no columns)
+  num_coefs = 1 + max([np.shape(x_train)[1] for x_train in x_list if len(np.shape(x_train)) == 2] + [0])
+  initial_coefs = np.zeros((len(x_list), num_coefs))
+  is_warm = np.zeros(len(x_list), bool)
+  for problem, key in enumerate(keys):
+    coefs = warm_starts['coefs'].get(key)
+    # the columns can change between windows if the course list does
+    if coefs is not None and len(coefs) == initial_coefs.shape[1]:
+      initial_coefs[problem] = coefs
+      is_warm[problem] = True
+
+  start = time.time()
+  models = fit_compressed_logistic(x_list, y_list, c_value, initial_coefs=initial_coefs)
+  warm_starts['fit_seconds'] += time.time() - start
+
+  for problem, (key, model) in enumerate(zip(keys, models)):
+    warm_starts['coefs'][key] = np.append(model.coef_[0], model.intercept_)
+    if is_warm[problem]:
+      warm_starts['warm_fits'] += 1
+      warm_starts['warm_iterations'] += model.n_iter_[0]
+    else:
+      warm_starts['cold_fits'] += 1
+      warm_starts['cold_iterations'] += model.n_iter_[0]
+  return models
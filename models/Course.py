@@ -1,7 +1,9 @@
 from Course_Offering import *
 
-class Course: 
-  
+class Course(object):
+
+  __slots__ = ('title', 'section_title', 'course_number', 'course_offerings', 'total_number_of_students')
+
   def __init__(self, title, section_title, course_number, total_number_of_students = 0):
     self.title = title
     self.section_title = section_title
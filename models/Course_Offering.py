@@ -1,23 +1,24 @@
-from sets import Set;
+from Semester import *
+
+class Course_Offering(object):
+
+  # slots instead of a __dict__ per course offering, there is one for every course in every semester
+  __slots__ = ('course', 'enrollment', 'prereg_predicted_enrollment', 'professors', 'semester',
+               'semester_ordinal')
 
-class Course_Offering: 
-  
   def __init__(self, semester, Course, enrollment = 0):
     self.course = Course
     self.enrollment = enrollment
     self.prereg_predicted_enrollment = [-1, -1, -1, -1]
-    self.professors = Set()
+    self.professors = set()
     self.semester = semester
+    self.semester_ordinal = semester_ordinal(semester)
 
   def __str__(self):
     return self.course.title + ": " + self.semester
 
   def add_professor(self, professor):
-    if not self.professors:
-      self.professors.add(professor)
-    else: 
-      if professor not in self.professors:
-        self.professors.add(professor)
+    self.professors.add(professor)
 
   def total_prereg_enrollment(self):
     total_prereg_enrollment = 0
@@ -1,4 +1,6 @@
-class Professor:
+class Professor(object):
+
+  __slots__ = ('name',)
 
   def __init__(self, name):
     self.name = name
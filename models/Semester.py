@@ -0,0 +1,27 @@
+# Semesters are strings like '1314SP' in the data. Everywhere that semesters get ordered or compared, the
+# semester ordinal is used instead: twice the year the academic year starts in, plus one for spring, so
+# '1314FA' -> 26 and '1314SP' -> 27. Consecutive semesters have consecutive ordinals, and there is no end
+# year to keep up to date (unlike a dict of all the semesters between two years).
+
+# stands for "no end semester", it comes after every real semester
+END_SEMESTER = '9999'
+END_SEMESTER_ORDINAL = 2 * 100
+
+def semester_ordinal(semester):
+  """
+  Integer ordinal of a semester string, e.g. semester_ordinal('1314SP') == 27
+  """
+  if semester == END_SEMESTER:
+    return END_SEMESTER_ORDINAL
+  return int(semester[:2]) * 2 + (semester[4:6] == 'SP')
+
+def semester_from_ordinal(ordinal):
+  """
+  Semester string of a semester ordinal, e.g. semester_from_ordinal(27) == '1314SP'
+  """
+  if ordinal >= END_SEMESTER_ORDINAL:
+    return END_SEMESTER
+  year = ordinal // 2
+  if ordinal % 2:
+    return '%02d%02dSP' % (year, (year + 1) % 100)
+  return '%02d%02dFA' % (year, (year + 1) % 100)
@@ -1,17 +1,25 @@
 # Sarah is ID# 721 in the old data, #493 in the updated data
 # Berit is ID# 572
 
-class Student:
+from Semester import *
+
+class Student(object):
+
+  # slots instead of a __dict__ per student, there are tens of thousands of them
+  __slots__ = ('academic_status', 'concentration', 'final_semester', 'first_semester',
+               'first_semester_ordinal', 'gender', 'graduating_class',
+               'ID', 'list_of_course_offerings', 'major', 'major_history', 'semesters_present')
 
   def __init__(self, ID, gender, graduating_class, major, concentration, academic_status):
     self.academic_status = academic_status
     self.concentration = concentration
     self.final_semester = None # (int) 0-7, last academic semester in student's career
     self.first_semester = None # string representing the year semester since Olin's inception, e.g. "1011FA"
+    self.first_semester_ordinal = None # semester_ordinal of first_semester
     self.gender = gender
     self.graduating_class = graduating_class  # "2013" or "0" if the student hasn't graduated
     self.ID = ID
-    self.list_of_course_offerings = x = [[] for i in range(8)]
+    self.list_of_course_offerings = [[] for i in range(8)]
     self.major = major
     self.major_history = {}
     self.semesters_present = []
@@ -33,18 +41,13 @@ class Student:
         max_semester = i
     self.final_semester = max_semester
 
-  def set_first_semester(self, semester_list, semesters):
-    min_semester_index = 100
-    for semester in semester_list:
-      if semesters[semester] < min_semester_index:
-        min_semester_index = semesters[semester]
-
-    min_semester_string = ''
-    for sem_str in semesters:
-      if semesters[sem_str] == min_semester_index:
-        min_semester_string = sem_str
-
-    self.first_semester = min_semester_string
+  def set_first_semester(self, semester_list):
+    if semester_list:
+      self.first_semester = min(semester_list, key=semester_ordinal)
+      self.first_semester_ordinal = semester_ordinal(self.first_semester)
+    else:
+      self.first_semester_ordinal = None
+      self.first_semester = ''
 
   def set_major_history(self):
     semesters = {'FF':0, 'FR':1, 'SO1':2, 'SO2':3, 'JR1':4, 'JR2':5, 'SR1':6, 'SR2':7}
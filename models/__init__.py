@@ -3,4 +3,5 @@ from Course_Offering import *
 from Graduating_Class import *
 from Major import *
 from Professor import *
+from Semester import *
 from Student import *
\ No newline at end of file
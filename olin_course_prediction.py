@@ -1,23 +1,106 @@
 from controllers import *
+import os
+from multiprocessing import Pool, cpu_count
 from sklearn import linear_model
 
-def initialize_input_data(enrollment_history_filepath='../course_enrollments_2002-2014spring_anonymized.csv', prereg_data_filepath="../pre_reg_survey_data/*"):
+# The dataset and settings of the running backtest. They are set before the worker processes are started, so
+# the workers inherit them (on fork) instead of getting them pickled with every job.
+_backtest_data = None
+
+# the counters of the caches and stores of the backtest settings, which the worker processes send back
+BACKTEST_COUNTERS = {'train_test_cache': ['hits', 'misses', 'spill_hits', 'evictions'],
+                     'model_store': ['hits', 'misses', 'disk_hits', 'prediction_hits', 'prediction_misses', 'evictions'],
+                     'warm_starts': ['warm_fits', 'cold_fits', 'warm_iterations', 'cold_iterations', 'fit_seconds']}
+
+def initialize_input_data(enrollment_history_filepath='../course_enrollments_2002-2014spring_anonymized.csv', prereg_data_filepath="../pre_reg_survey_data/*", columnar=True, snapshot_dir=None, return_enrollment_index=False, added_enrollment_filepaths=[], match_cache_filepath=None, return_prereg_report=False, processes=1, prereg_cache_filepath=None, added_prereg_filepaths=[]):
     """
     Parse course data to create students, courses, professors, and all_courses_list
+    columnar: use get_course_data_columnar (much faster on big exports) instead of the row by row get_course_data.
+      Exports bigger than MAX_IN_MEMORY_EXPORT_BYTES are parsed with stream_course_data either way, so that
+      their rows don't all have to be in memory at once.
+    snapshot_dir: if set, the parsed data is saved to a snapshot in this directory and loaded from there on
+      later runs, as long as the enrollment history and prereg files haven't changed
+    return_enrollment_index: also return the enrollment index (see make_enrollment_index) of the students
+      and courses, it is built once here and stored in the snapshot with the rest of the data
+    added_enrollment_filepaths: (optional) course data files of the semesters that came in after the
+      enrollment history, in order, which are merged in with add_course_data (see load_input_dataset)
+    match_cache_filepath: (optional) where enter_prereg_data caches the courses matched to every prereg survey
+      column, so that later runs only match the new columns
+    return_prereg_report: also return the report of enter_prereg_data, with the survey columns that didn't
+      match any course or matched more than one
+    processes, prereg_cache_filepath: the number of prereg survey files parsed at the same time, and where the
+      parsed result of every file is cached for later runs (see get_prereg_data)
+    added_prereg_filepaths: (optional) the prereg survey file (or glob, or None) of each added enrollment file,
+      which is merged in with it. These files can be matched by prereg_data_filepath as well, they are
+      left out of the base data then (see get_base_prereg_filepaths)
     return values:
       students: dict mapping student id number to Student object
       courses: dict mapping course number to Course object
       all_courses_list: list of tuples (course number, course title)
+      enrollment_index: (only if return_enrollment_index is set) dict from make_enrollment_index
+      prereg_report: (only if return_prereg_report is set) dict from enter_prereg_data
+    """
+    dataset = load_input_dataset(enrollment_history_filepath, prereg_data_filepath, columnar, snapshot_dir, added_enrollment_filepaths, match_cache_filepath, processes, prereg_cache_filepath, added_prereg_filepaths)
+    input_data = [dataset['students'], dataset['courses'], dataset['all_courses_list']]
+    if return_enrollment_index:
+        input_data.append(dataset['enrollment_index'])
+    if return_prereg_report:
+        input_data.append(dataset['prereg_report'])
+    return tuple(input_data)
+
+def load_input_dataset(enrollment_history_filepath, prereg_data_filepath, columnar, snapshot_dir, added_enrollment_filepaths, match_cache_filepath=None, processes=1, prereg_cache_filepath=None, added_prereg_filepaths=[]):
+    """
+    The dict of the students, courses, professors, all_courses_list, enrollment_index and prereg_report of
+    initialize_input_data, from the snapshot of the input files in snapshot_dir if there is one.
+    With added_enrollment_filepaths, the data of the files before the last one comes from here too (from its
+    snapshot, after the last run) and only the last file is parsed and merged in with add_course_data, along
+    with its prereg survey from added_prereg_filepaths. The snapshot of the base data is keyed by the prereg
+    surveys it has entered (get_base_prereg_filepaths), so a new term's survey doesn't make it miss. The
+    enrollment index is then updated for the students of the new rows (update_enrollment_index) instead of
+    built again, so adding a semester costs about as much as the new semester.
+    Everything else derived from the data has to be refreshed by the caller: make_cohort_index of the new
+    data (it is built from the enrollment index with a few numpy operations), and the train/test cache needs
+    a namespace of the new data (hash_input_files with the same added_enrollment_filepaths and
+    added_prereg_filepaths). The model store is keyed by the training data of the models, so it is right as
+    it is, and the online models know the students they have been trained on by student id, so they are only
+    updated with the new students.
     """
-    [students, courses, professors] = get_course_data(enrollment_history_filepath)
-    prereg_data = get_prereg_data(prereg_data_filepath)
-    enter_prereg_data(courses, prereg_data)
+    added_prereg_filepaths = list(added_prereg_filepaths) + [None] * (len(added_enrollment_filepaths) - len(added_prereg_filepaths))
+    # the surveys of the base data leave out all of the added ones, also for the data before the last file
+    prereg_data_filepath = get_base_prereg_filepaths(prereg_data_filepath, added_prereg_filepaths)
+    if snapshot_dir is not None:
+        input_hash = hash_input_files(enrollment_history_filepath, prereg_data_filepath, added_enrollment_filepaths, added_prereg_filepaths)
+        snapshot = load_snapshot(snapshot_dir, input_hash)
+        if snapshot is not None:
+            return snapshot
+
+    if added_enrollment_filepaths:
+        dataset = load_input_dataset(enrollment_history_filepath, prereg_data_filepath, columnar, snapshot_dir, added_enrollment_filepaths[:-1], match_cache_filepath, processes, prereg_cache_filepath, added_prereg_filepaths[:-1])
+        [affected_students, prereg_report] = add_course_data(dataset['students'], dataset['courses'], dataset['professors'], added_enrollment_filepaths[-1], prereg_data_filepath=added_prereg_filepaths[-1],
+                                                             all_courses_list=dataset['all_courses_list'], match_cache_filepath=match_cache_filepath, return_prereg_report=True)
+        for name in ['unmatched', 'ambiguous']:
+            dataset['prereg_report'][name].extend(prereg_report[name])
+        dataset['enrollment_index'] = update_enrollment_index(dataset['enrollment_index'], dataset['students'], dataset['courses'], affected_students)
+    else:
+        if os.path.getsize(enrollment_history_filepath) > MAX_IN_MEMORY_EXPORT_BYTES:
+            [students, courses, professors] = make_models_from_aggregates(stream_course_data(enrollment_history_filepath, keep_course_history=True))
+        elif columnar:
+            [students, courses, professors] = get_course_data_columnar(enrollment_history_filepath)
+        else:
+            [students, courses, professors] = get_course_data(enrollment_history_filepath)
+        prereg_data = get_prereg_data(prereg_data_filepath, processes, prereg_cache_filepath)
+        prereg_report = enter_prereg_data(courses, prereg_data, match_cache_filepath)
 
-    all_courses_list = []
-    for course in courses: 
-        all_courses_list.append([courses[course].course_number, courses[course].title])
+        all_courses_list = []
+        for course in courses: 
+            all_courses_list.append([courses[course].course_number, courses[course].title])
+        enrollment_index = make_enrollment_index(students, courses)
+        dataset = {'students': students, 'courses': courses, 'professors': professors, 'all_courses_list': all_courses_list, 'enrollment_index': enrollment_index,
+                   'prereg_report': prereg_report}
 
-    return students, courses, all_courses_list
+    if snapshot_dir is not None:
+        save_snapshot(snapshot_dir, input_hash, dataset)
+    return dataset
 
 def add_dummy_student(x_list, y_list):
     """
@@ -48,104 +131,671 @@ def make_random_train_test(students, courses, all_courses_list, desired_course,
       x_test, y_test = add_dummy_student(x_test, y_test)
     return [x_train, y_train, x_test, y_test]
 
-def make_semester_specific_train_test(situation, students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data):
+def make_semester_specific_train_test(situation, students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, cohort_index=None, enrollment_index=None):
     """
     Create training and testing data using "current" students as the test data se and all 
     past students as trainin data
+    The dummy students of add_dummy_data are only added to the training data, so the predicted enrollment
+    of the testing data is that of the real students (like the forecasts of forecast_catalog)
+    cohort_index: (optional) make_cohort_index of students, to find the current and past students with
+    enrollment_index: (optional) make_enrollment_index of students, if it is given the data is built by
+      make_student_feature_base and comes back as numpy arrays / sparse matrices instead of lists
     """
-    current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester)
+    if enrollment_index is not None:
+      train_base, test_base = make_semester_specific_feature_bases(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, enrollment_index, cohort_index, [situation])
+      return get_situation_features(train_base, situation) + get_situation_features(test_base, situation)
+
+    current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
     [x_train, y_train] = make_student_feature_data(situation, False, past_students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data)
     [x_test, y_test] = make_student_feature_data(situation, True, current_students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data)
     if add_dummy_data: 
       x_train, y_train = add_dummy_student(x_train, y_train)
-      x_test, y_test = add_dummy_student(x_test, y_test)
     return [x_train, y_train, x_test, y_test]
 
+def make_semester_specific_feature_bases(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, enrollment_index, cohort_index=None, situations=range(5)):
+    """
+    The make_student_feature_base of the past students (training data) and of the current students (testing
+    data), with the dummy students already added to the training data if add_dummy_data is set (see
+    make_semester_specific_train_test). The training and testing data of
+    every situation in situations come from them with get_situation_features, so the students are only
+    split and their features only built once for all of the situations.
+    """
+    current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+    train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, situations, add_dummy_data)
+    test_base = make_student_feature_base(True, current_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, situations, False)
+    return train_base, test_base
 
-def make_logistic(x_train, y_train, c_value=1e5):
+def make_logistic(x_train, y_train, c_value=1e-1):
   """ Takes as input x vectors and their corresponding y values as well as the test size, makes 
       all of the training and testing data and makes a linear regression logistic
+      c_value: the inverse regularization strength C (see choose_c_values)
+      Designs with few distinct rows (the baseline, gender and prereg models) are fitted on their distinct
+      rows weighted by their counts instead (get_compressed_problem and fit_counted_liblinear), which gives
+      the same model
   """
-  c_value = 1e-1
+  compressed_problem = get_compressed_problem(x_train, y_train)
+  if compressed_problem is not None:
+    [x_unique, y_unique, counts] = compressed_problem
+    return fit_counted_liblinear(x_unique, y_unique, counts, c_value)
   logistic = linear_model.LogisticRegression(C=c_value)
   logistic.fit(x_train, y_train)
   return logistic
 
-def predict_enrollment_for_one_course(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models):
+def get_all_train_test_data(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models, cohort_index=None, enrollment_index=None, train_test_cache=None):
   """
-  predict enrollment for a given course and student semester for each model
+  The [x_train, y_train, x_test, y_test] of every model for a given course and student semester, see
+  predict_enrollment_for_one_course for the parameters
   """
+  cached_train_test_data = [None] * number_of_models
+  if train_test_cache is not None:
+    train_test_keys = [get_train_test_key(i, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data) for i in range(number_of_models)]
+    cached_train_test_data = [lookup_train_test(train_test_cache, key) for key in train_test_keys]
+
   all_train_test_data = []
+  if enrollment_index is not None and None in cached_train_test_data:
+    train_base, test_base = make_semester_specific_feature_bases(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, enrollment_index, cohort_index, range(number_of_models))
   for i in range(number_of_models):
-    train_test_data = make_semester_specific_train_test(i, students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data)
+    if cached_train_test_data[i] is not None:
+      train_test_data = cached_train_test_data[i]
+    else:
+      if enrollment_index is not None:
+        train_test_data = get_situation_features(train_base, i) + get_situation_features(test_base, i)
+      else:
+        train_test_data = make_semester_specific_train_test(i, students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, cohort_index)
+      if train_test_cache is not None:
+        store_train_test(train_test_cache, train_test_keys[i], train_test_data)
     all_train_test_data.append(train_test_data)
-    # If everyone has taken the class already 
-  if len(train_test_data[2]) == 0:
+  return all_train_test_data
+
+def get_predicted_enrollment(logistic, x_test):
+  return sum(predict_enrollment(logistic, x_test))
+
+def has_model_data(train_test_data):
+  """
+  Whether a model has training and testing students, the models without either (e.g. without prereg data
+  for the semester) aren't fitted and predict 0. Every solver raises the ValueError of make_logistic for
+  the models with students of one class only (check_training_classes).
+  """
+  return np.shape(train_test_data[0])[0] > 0 and np.shape(train_test_data[2])[0] > 0
+
+def predict_enrollment_for_one_course(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models, cohort_index=None, enrollment_index=None, train_test_cache=None, warm_starts=None, c_store=None, model_store=None):
+  """
+  predict enrollment for a given course and student semester for each model
+  cohort_index: (optional) make_cohort_index of students, shared by every call on the same students
+  enrollment_index: (optional) make_enrollment_index of students, to build the features of all the models
+    from one feature base
+  train_test_cache: (optional) make_train_test_cache, the train/test data of every model is looked up there
+    first and only built (and then stored there) if it isn't in it
+  warm_starts: (optional) make_warm_starts, the models with few columns (up to MAX_EXACT_NEWTON_COEFS
+    coefficients) are fitted with fit_warm_started_logistic starting from the coefficients of the last fit
+    of the same course, student semester and model (e.g. in the last window of the backtest) instead of with
+    make_logistic. liblinear can't start from given coefficients, and the course history models are faster
+    to fit from zero with it than from a warm start with the batched solver, so they still use make_logistic.
+  c_store: (optional) make_c_store, every model is fitted with the C chosen for it by choose_c_values
+    (get_c_value), DEFAULT_C_VALUE without it
+  model_store: (optional) make_model_store, the models and their predicted enrollments are looked up there
+    first (by their training data and C) and only fitted / predicted (and then stored there) if they
+    aren't in it. It isn't used for the warm started models.
+  If the last model has no testing students, every model predicts 0. Otherwise the models without training
+  or testing students predict 0 (has_model_data).
+  """
+  all_train_test_data = get_all_train_test_data(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models, cohort_index, enrollment_index, train_test_cache)
+    # If everyone has taken the class already
+  if np.shape(all_train_test_data[-1][2])[0] == 0:
     return [0]*number_of_models
-  else: 
-    all_predicted_enrollments = []
-    for j, train_test_data in enumerate(all_train_test_data):
-      # train_test_data = [x_train, y_train, x_test, y_test]
-      x_train = train_test_data[0]
-      y_train = train_test_data[1]
-      x_test = train_test_data[2]
-      logistic = make_logistic(x_train, y_train, 1e2)
-
-      all_features_list = []
-
-      # 0 - No prereg data (just average course enrollment)
-      # all_features_list is all set
-
-      # 1 - Spring/Fall semester specificty
-      if j == 1:
-        all_features_list.append("Gender")
-      # 2 - Prereg data + Spring/Fall (Berit)
-      elif j == 2:
-        all_features_list.append("Prereg data")
-        all_features_list.append("Prereg data presence (boolean)")
-        all_features_list.append("Fall/Spring (boolean)")
-      # 3 - Course history + Spring/Fall
-      elif j == 3:
-        all_features_list = [x[1] for x in all_courses_list]
-        all_features_list.append("Major: Undeclared")
-        all_features_list.append("Major: MechE")
-        all_features_list.append("Major: ECE")
-        all_features_list.append("Major: General E")
-        all_features_list.append("Gender")
-        all_features_list.append("Fall/Spring (boolean)")
-      # 4 - Prereg data + course history + Spring/Fall
-      elif j == 4:
-        all_features_list = [x[1] for x in all_courses_list]
-        all_features_list.append("Major: Undeclared")
-        all_features_list.append("Major: MechE")
-        all_features_list.append("Major: ECE")
-        all_features_list.append("Major: General E")
-        all_features_list.append("Gender")
-        all_features_list.append("Prereg data")
-        all_features_list.append("Prereg data presence (boolean)")
-        all_features_list.append("Fall/Spring (boolean)")
-
-      # Examine weights
-      # print print_highest_weighted_courses(logistic, all_features_list, 10)
-
-      predicted_enrollment = sum(predict_enrollment(logistic, x_test))
-      all_predicted_enrollments.append(predicted_enrollment)
-    return all_predicted_enrollments
+
+  all_predicted_enrollments = []
+  for j, train_test_data in enumerate(all_train_test_data):
+    # train_test_data = [x_train, y_train, x_test, y_test]
+    x_train = train_test_data[0]
+    y_train = train_test_data[1]
+    x_test = train_test_data[2]
+    if not has_model_data(train_test_data):
+      all_predicted_enrollments.append(0)
+      continue
+    check_training_classes(y_train)
+    c_value = get_c_value(c_store, desired_course, j)
+    model_key = None
+    if warm_starts is not None and np.shape(x_train)[1] + 1 <= MAX_EXACT_NEWTON_COEFS:
+      logistic = fit_warm_started_logistic(warm_starts, [get_warm_start_key(desired_course, current_semester, j)], [x_train], [y_train], c_value)[0]
+    elif model_store is not None:
+      [logistic, model_key] = get_stored_model(model_store, x_train, y_train, j, c_value, 'make_logistic', lambda: make_logistic(x_train, y_train, c_value))
+    else:
+      logistic = make_logistic(x_train, y_train, c_value)
+
+    all_features_list = []
+
+    # 0 - No prereg data (just average course enrollment)
+    # all_features_list is all set
+
+    # 1 - Spring/Fall semester specificty
+    if j == 1:
+      all_features_list.append("Gender")
+    # 2 - Prereg data + Spring/Fall (Berit)
+    elif j == 2:
+      all_features_list.append("Prereg data")
+      all_features_list.append("Prereg data presence (boolean)")
+      all_features_list.append("Fall/Spring (boolean)")
+    # 3 - Course history + Spring/Fall
+    elif j == 3:
+      all_features_list = [x[1] for x in all_courses_list]
+      all_features_list.append("Major: Undeclared")
+      all_features_list.append("Major: MechE")
+      all_features_list.append("Major: ECE")
+      all_features_list.append("Major: General E")
+      all_features_list.append("Gender")
+      all_features_list.append("Fall/Spring (boolean)")
+    # 4 - Prereg data + course history + Spring/Fall
+    elif j == 4:
+      all_features_list = [x[1] for x in all_courses_list]
+      all_features_list.append("Major: Undeclared")
+      all_features_list.append("Major: MechE")
+      all_features_list.append("Major: ECE")
+      all_features_list.append("Major: General E")
+      all_features_list.append("Gender")
+      all_features_list.append("Prereg data")
+      all_features_list.append("Prereg data presence (boolean)")
+      all_features_list.append("Fall/Spring (boolean)")
+
+    # Examine weights
+    # print print_highest_weighted_courses(logistic, all_features_list, 10)
+
+    if model_key is not None:
+      predicted_enrollment = get_stored_prediction(model_store, model_key, logistic, x_test, get_predicted_enrollment)
+    else:
+      predicted_enrollment = get_predicted_enrollment(logistic, x_test)
+    all_predicted_enrollments.append(predicted_enrollment)
+  return all_predicted_enrollments
+
+def predict_enrollment_for_one_course_online(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models, online_models, enrollment_index, cohort_index=None, c_store=None):
+  """
+  predict_enrollment_for_one_course with the online models of online_models (make_online_model_store)
+  instead of models fitted from scratch: the model of every situation is the one kept in online_models for
+  the course and student semester, updated with the students that came in since it was last trained
+  (update_online_model). It needs the enrollment_index, for the students of the training rows.
+  """
+  train_base, test_base = make_semester_specific_feature_bases(students, courses, all_courses_list, desired_course, current_semester, desired_semester, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, enrollment_index, cohort_index, range(number_of_models))
+    # If everyone has taken the class already
+  if np.shape(get_situation_features(test_base, number_of_models - 1)[0])[0] == 0:
+    return [0]*number_of_models
+
+  all_predicted_enrollments = []
+  for j in range(number_of_models):
+    [x_train, y_train] = get_situation_features(train_base, j)
+    [x_test, y_test] = get_situation_features(test_base, j)
+    if not has_model_data([x_train, y_train, x_test, y_test]):
+      all_predicted_enrollments.append(0)
+      continue
+    student_ids = get_online_student_ids(enrollment_index, train_base['student_codes'][:np.shape(x_train)[0]])
+    c_value = get_c_value(c_store, desired_course, j)
+    logistic = update_online_model(online_models, get_online_model_key(desired_course, current_semester, j, add_dummy_data, c_value), x_train, y_train, student_ids, c_value)
+    all_predicted_enrollments.append(sum(predict_enrollment(logistic, x_test)))
+  return all_predicted_enrollments
+
+def predict_enrollment_for_jobs(students, courses, all_courses_list, jobs, add_dummy_data, number_of_models, cohort_index=None, enrollment_index=None, train_test_cache=None, c_value=1e-1, warm_starts=None, c_store=None, model_store=None):
+  """
+  predict_enrollment_for_one_course for every (desired_course, current_semester, starting_semester,
+  ending_semester, predicting_for_semester) job of jobs (with desired_semester = current_semester + 1),
+  but the logistic regressions of all the jobs are fitted together with fit_compressed_logistic, one batch
+  per model, instead of one sklearn fit at a time. The models of a batch share their columns, so any jobs can
+  go together. The predictions agree with the sklearn ones to the tolerance of liblinear.
+  Only the models with few columns (up to MAX_EXACT_NEWTON_COEFS coefficients) are batched, the course
+  history models are still fitted one at a time with make_logistic: liblinear is faster on those than the
+  batched conjugate gradients.
+  warm_starts: (optional) make_warm_starts, the batched models are fitted with fit_warm_started_logistic,
+    and the jobs of each window are fitted after the jobs of the window before, so that they start from its
+    coefficients. The course history models are still fitted with make_logistic.
+  c_store: (optional) make_c_store, every model is fitted with the C chosen for its course and situation
+    instead of c_value
+  model_store: (optional) make_model_store, only the models that aren't in it are fitted (and then stored),
+    the predicted enrollments are looked up there too
+  return values:
+    list with the predicted enrollment of every model for every job
+  """
+  all_job_data = []
+  for desired_course, current_semester, starting_semester, ending_semester, predicting_for_semester in jobs:
+    all_job_data.append(get_all_train_test_data(students, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, number_of_models, cohort_index, enrollment_index, train_test_cache))
+  return predict_enrollment_for_job_data(jobs, all_job_data, number_of_models, c_value, warm_starts, c_store, model_store)
+
+def predict_enrollment_for_job_data(jobs, all_job_data, number_of_models, c_value=1e-1, warm_starts=None, c_store=None, model_store=None, fitted_jobs=None, return_probabilities=False):
+  """
+  The fitting and predicting half of predict_enrollment_for_jobs, for jobs whose train/test data is already
+  built: all_job_data has the get_all_train_test_data of every job
+  fitted_jobs: (optional) the numbers of the jobs to fit, the others predict 0, by default the jobs with
+    testing data for the last model (like predict_enrollment_for_one_course). The models of the fitted jobs
+    without training or testing students predict 0 too (has_model_data).
+  return_probabilities: also return the probabilities of every testing student (predict_enrollment), as a
+    list with a numpy array for every model of every job (empty for the models that predict 0)
+  """
+  all_predicted_enrollments = [[0] * number_of_models for job in jobs]
+  all_probabilities = [[np.zeros(0)] * number_of_models for job in jobs]
+  # If everyone has taken the class already, the job isn't fitted
+  if fitted_jobs is None:
+    fitted_jobs = [job_no for job_no in range(len(jobs)) if np.shape(all_job_data[job_no][-1][2])[0] > 0]
+  if warm_starts is None:
+    stages = [fitted_jobs]
+  else:
+    # one stage per window (starting, ending and predicting_for semester), in the order of the jobs
+    windows = []
+    for job_no in fitted_jobs:
+      if jobs[job_no][2:] not in windows:
+        windows.append(jobs[job_no][2:])
+    stages = [[job_no for job_no in fitted_jobs if jobs[job_no][2:] == window] for window in windows]
+
+  for stage_jobs in stages:
+    for j in range(number_of_models):
+      # the models with no training or testing students (no prereg data for the semester) predict 0
+      model_jobs = [job_no for job_no in stage_jobs if has_model_data(all_job_data[job_no][j])]
+      x_list = [all_job_data[job_no][j][0] for job_no in model_jobs]
+      y_list = [all_job_data[job_no][j][1] for job_no in model_jobs]
+      for y_train in y_list:
+        check_training_classes(y_train)
+      if c_store is not None:
+        c_values = [get_c_value(c_store, jobs[job_no][0], j) for job_no in model_jobs]
+      else:
+        c_values = [c_value] * len(model_jobs)
+      with_make_logistic = x_list and np.shape(x_list[0])[1] + 1 > MAX_EXACT_NEWTON_COEFS
+
+      models = [None] * len(model_jobs)
+      if model_store is not None:
+        # the batched fits all converge to the same optimum, only make_logistic's liblinear fits differ
+        model_keys = [get_model_key(x_train, y_train, j, problem_c_value, 'make_logistic' if with_make_logistic else 'newton') for x_train, y_train, problem_c_value in zip(x_list, y_list, c_values)]
+        models = [lookup_model(model_store, model_key) for model_key in model_keys]
+      unfitted = [problem for problem in range(len(model_jobs)) if models[problem] is None]
+      unfitted_x_list = [x_list[problem] for problem in unfitted]
+      unfitted_y_list = [y_list[problem] for problem in unfitted]
+      unfitted_c_values = [c_values[problem] for problem in unfitted]
+      if with_make_logistic:
+        fitted_models = [make_logistic(x_train, y_train, problem_c_value) for x_train, y_train, problem_c_value in zip(unfitted_x_list, unfitted_y_list, unfitted_c_values)]
+      elif warm_starts is not None:
+        keys = [get_warm_start_key(jobs[model_jobs[problem]][0], jobs[model_jobs[problem]][1], j) for problem in unfitted]
+        fitted_models = fit_warm_started_logistic(warm_starts, keys, unfitted_x_list, unfitted_y_list, unfitted_c_values)
+      else:
+        fitted_models = fit_compressed_logistic(unfitted_x_list, unfitted_y_list, unfitted_c_values)
+      for problem, logistic in zip(unfitted, fitted_models):
+        models[problem] = logistic
+        if model_store is not None:
+          store_model(model_store, model_keys[problem], logistic)
+
+      for problem, job_no in enumerate(model_jobs):
+        x_test = all_job_data[job_no][j][2]
+        if model_store is not None:
+          all_predicted_enrollments[job_no][j] = get_stored_prediction(model_store, model_keys[problem], models[problem], x_test, get_predicted_enrollment)
+        else:
+          all_predicted_enrollments[job_no][j] = get_predicted_enrollment(models[problem], x_test)
+        if return_probabilities:
+          all_probabilities[job_no][j] = np.array(predict_enrollment(models[problem], x_test))
+  if return_probabilities:
+    return [all_predicted_enrollments, all_probabilities]
+  return all_predicted_enrollments
+
+def forecast_catalog(students, courses, all_courses_list, predicting_for_semester, add_dummy_data, number_of_models, enrollment_index, cohort_index=None, course_list=None, max_semesters_since_offered=RECENT_OFFERING_SEMESTERS, c_store=None, model_store=None, shared_design=True, return_probabilities=False):
+  """
+  Forecasts the enrollment of every course of the catalog in predicting_for_semester, from the window of the
+  8 semesters before it (like the last window of the backtest), in one call.
+  The cohorts are shared by all the courses: the current and past students of every student semester are
+  only found once, and so are their majors and enrollments (make_cohort_feature_base), only the labels, the
+  drops and the features that depend on the course are built per course. The models of all the courses are
+  then fitted together, one batch per student semester and model (predict_enrollment_for_job_data).
+  Unlike the backtest, where every model of a course and student semester predicts 0 when the last model has
+  no testing students, every model is fitted if it has training and testing students of its own
+  (has_model_data) and predicts 0 otherwise, so that a course without prereg data still gets the forecasts
+  of the models without prereg data.
+  The dummy students of add_dummy_data are only added to the training data: the forecasts (and their
+  probabilities) are of the real students, like the predicted enrollments of the backtest.
+  course_list: (optional) the course numbers to forecast, by default the courses of all_courses_list that
+    were offered recently (get_recently_offered_courses), the others are left out before anything is built
+  shared_design: the course history models (situations 3 and 4) of all the courses are fitted on one design
+    per cohort (make_shared_design and fit_shared_design_logistic) instead of building and fitting the
+    features of every course, so they cost about as much as one cohort and not one cohort per course.
+    These fits aren't looked up in (or stored in) the model_store.
+  return_probabilities: also return the probabilities of the students behind every forecast, for the
+    enrollment distributions (get_enrollment_distributions)
+  return values:
+    [course_list, forecasts] or [course_list, forecasts, probabilities] with return_probabilities
+      course_list: the course numbers that were forecast
+      forecasts: numpy array (number of courses x 7 student semesters x number_of_models) of the expected
+        enrollment of every course from the students of every student semester 0-6 for every model
+      probabilities: probabilities[i][k][j] is the numpy array of the probabilities of the students of
+        student semester k taking course i for model j, which add up to forecasts[i, k, j]
+  """
+  predicting_ordinal = semester_ordinal(predicting_for_semester)
+  starting_semester = semester_from_ordinal(predicting_ordinal - 9)
+  ending_semester = semester_from_ordinal(predicting_ordinal - 1)
+  if course_list is None:
+    course_list = get_recently_offered_courses(courses, all_courses_list, predicting_for_semester, max_semesters_since_offered)
+  situations = range(number_of_models)
+  # the situations built per course, the others (a suffix of situations) come from the shared designs
+  course_situations = [j for j in situations if j < 3 or not shared_design]
+
+  forecasts = np.zeros((len(course_list), 7, number_of_models))
+  probabilities = [[[np.zeros(0)] * number_of_models for current_semester in range(7)] for desired_course in course_list]
+  for current_semester in range(7):
+    current_students, past_students = get_current_and_past_students(students, ending_semester, current_semester, cohort_index)
+    train_cohort = make_cohort_feature_base(False, past_students, enrollment_index, all_courses_list, current_semester, current_semester + 1, starting_semester, situations)
+    test_cohort = make_cohort_feature_base(True, current_students, enrollment_index, all_courses_list, current_semester, current_semester + 1, starting_semester, situations)
+    for j in situations[len(course_situations):]:
+      train_design = make_shared_design(False, train_cohort, enrollment_index, courses, all_courses_list, course_list, current_semester, current_semester + 1, ending_semester, predicting_for_semester, add_dummy_data, j)
+      test_design = make_shared_design(True, test_cohort, enrollment_index, courses, all_courses_list, course_list, current_semester, current_semester + 1, ending_semester, predicting_for_semester, add_dummy_data, j)
+      problems = np.flatnonzero(train_design['has_students'] & test_design['has_students'])
+      train_columns = test_columns = None
+      if j == 4:
+        train_columns = train_design['problem_columns'][problems]
+        test_columns = test_design['problem_columns'][problems]
+      c_values = [get_c_value(c_store, course_list[problem], j) for problem in problems]
+      models = fit_shared_design_logistic(train_design['x_shared'], train_design['y_matrix'][:, problems], train_design['weight_matrix'][:, problems], c_values,
+                                          train_columns, train_design['problem_column_rows'], train_design['column_masks'][problems])
+      shared_probabilities = get_shared_design_probabilities(models, test_design['x_shared'], test_columns, test_design['problem_column_rows'])
+      # the testing rows of the real students, the dummy students (the rows without prereg data columns)
+      # aren't forecast
+      test_weights = test_design['weight_matrix'] * test_design['problem_column_rows'][:, np.newaxis]
+      forecasts[problems, current_semester, j] = (shared_probabilities * test_weights[:, problems]).sum(axis=0)
+      if return_probabilities:
+        for column, problem in enumerate(problems):
+          probabilities[problem][current_semester][j] = shared_probabilities[test_weights[:, problem] > 0, column]
+
+    if course_situations:
+      jobs = []
+      all_job_data = []
+      for desired_course in course_list:
+        train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, course_situations, add_dummy_data, train_cohort)
+        test_base = make_student_feature_base(True, current_students, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, add_dummy_data, course_situations, False, test_cohort)
+        jobs.append((desired_course, current_semester, starting_semester, ending_semester, predicting_for_semester))
+        all_job_data.append([get_situation_features(train_base, j) + get_situation_features(test_base, j) for j in course_situations])
+      [predicted_enrollments, job_probabilities] = predict_enrollment_for_job_data(jobs, all_job_data, len(course_situations), c_store=c_store, model_store=model_store, fitted_jobs=range(len(jobs)), return_probabilities=True)
+      forecasts[:, current_semester, :len(course_situations)] = predicted_enrollments
+      for problem in range(len(course_list)):
+        probabilities[problem][current_semester][:len(course_situations)] = job_probabilities[problem]
+  if return_probabilities:
+    return [course_list, forecasts, probabilities]
+  return [course_list, forecasts]
+
+def run_backtest_job(job):
+  """
+  Runs one (course, window, student semester) job of the backtest on _backtest_data, returns the predicted
+  enrollment of every model
+  """
+  desired_course, current_semester, starting_semester, ending_semester, predicting_for_semester = job
+  data = _backtest_data
+  if data['online_models'] is not None:
+    return predict_enrollment_for_one_course_online(data['students'], data['courses'], data['all_courses_list'], desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, data['add_dummy_data'], data['number_of_models'], data['online_models'], data['enrollment_index'], data['cohort_index'], data['c_store'])
+  return predict_enrollment_for_one_course(data['students'], data['courses'], data['all_courses_list'], desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, data['add_dummy_data'], data['number_of_models'], data['cohort_index'], data['enrollment_index'], data['train_test_cache'], data['warm_starts'], data['c_store'], data['model_store'])
+
+def run_backtest_job_group(jobs):
+  """
+  Runs a group of jobs of the backtest on _backtest_data, with predict_enrollment_for_jobs if the solver is
+  'batch' or there are warm_starts, and with run_backtest_job otherwise
+  """
+  data = _backtest_data
+  if data['online_models'] is None and (data['solver'] == 'batch' or data['warm_starts'] is not None):
+    return predict_enrollment_for_jobs(data['students'], data['courses'], data['all_courses_list'], jobs, data['add_dummy_data'], data['number_of_models'], data['cohort_index'], data['enrollment_index'], data['train_test_cache'], warm_starts=data['warm_starts'], c_store=data['c_store'], model_store=data['model_store'])
+  return map(run_backtest_job, jobs)
+
+def run_c_selection_job_group(jobs):
+  """
+  Scores the C values of _backtest_data['c_values'] for every model of the jobs (all of one course) of
+  _backtest_data: the training data of every job is fitted for every C (fit_regularization_path) and
+  validated on the testing data of the job, the students of the semester after its window.
+  return values:
+    list with the validation scores (see get_path_scores) of every model, None for the models with no
+      training or validation data
+  """
+  data = _backtest_data
+  all_job_data = []
+  for desired_course, current_semester, starting_semester, ending_semester, predicting_for_semester in jobs:
+    all_job_data.append(get_all_train_test_data(data['students'], data['courses'], data['all_courses_list'], desired_course, current_semester, current_semester + 1, starting_semester, ending_semester, predicting_for_semester, data['add_dummy_data'], data['number_of_models'], data['cohort_index'], data['enrollment_index'], data['train_test_cache']))
+
+  all_scores = []
+  for j in range(data['number_of_models']):
+    # train_test_data = [x_train, y_train, x_test, y_test], the jobs with no training or testing students don't count
+    all_train_test_data = [job_data[j] for job_data in all_job_data if has_model_data(job_data[j])]
+    x_list = [train_test_data[0] for train_test_data in all_train_test_data]
+    y_list = [train_test_data[1] for train_test_data in all_train_test_data]
+    validation_x_list = [train_test_data[2] for train_test_data in all_train_test_data]
+    validation_y_list = [train_test_data[3] for train_test_data in all_train_test_data]
+    if x_list:
+      all_scores.append(get_path_scores(x_list, y_list, validation_x_list, validation_y_list, data['c_values']))
+    else:
+      all_scores.append(None)
+  return all_scores
+
+def attach_backtest_data(shared_dataset_dir, settings):
+  """
+  Pool initializer for map_backtest_job_groups with a shared_dataset_dir: sets _backtest_data of the worker
+  from the attached dataset and the settings of the run (add_dummy_data, number_of_models, solver,
+  train_test_cache, warm_starts...)
+  """
+  global _backtest_data
+  dataset = attach_dataset(shared_dataset_dir)
+  _backtest_data = dict(settings, students=dataset['students'], courses=dataset['courses'],
+                        all_courses_list=get_shared_all_courses_list(dataset), cohort_index=get_shared_cohort_index(dataset),
+                        enrollment_index=get_shared_enrollment_index(dataset))
+
+def get_backtest_jobs(course_list, ending_semesters, predicting_semesters):
+  """
+  The jobs of the backtest in the order of the serial loop: every course, every window of 8 semesters of
+  ending_semesters and every student semester 0-6
+  """
+  jobs = []
+  for desired_course in course_list:
+    for j in range(len(ending_semesters) - 8):
+      for k in range(7):
+        jobs.append((desired_course, k, ending_semesters[j], ending_semesters[j + 8], predicting_semesters[j]))
+  return jobs
+
+def get_backtest_counters(backtest_data):
+  """
+  The BACKTEST_COUNTERS of the caches and stores in backtest_data, as a dict of dicts
+  """
+  return dict((name, dict((counter, backtest_data[name][counter]) for counter in counters)) for name, counters in BACKTEST_COUNTERS.items() if backtest_data.get(name) is not None)
+
+def run_worker_job_group(group_function_and_jobs):
+  """
+  Runs group_function on jobs in a worker process of map_backtest_job_groups. The entries that the
+  train_test_cache of the worker still has in memory are then spilled to its spill_dir (the models of the
+  model_store are already in its store_dir), where the other workers and later runs find them.
+  return values:
+    [the result of group_function, what the caches and stores of the worker counted for the group (see
+      get_backtest_counters)]
+  """
+  group_function, jobs = group_function_and_jobs
+  data = _backtest_data
+  counters_before = get_backtest_counters(data)
+  result = group_function(jobs)
+  if data.get('train_test_cache') is not None:
+    flush_train_test_cache(data['train_test_cache'])
+  counters = get_backtest_counters(data)
+  for name in counters:
+    for counter in counters[name]:
+      counters[name][counter] -= counters_before[name][counter]
+  return [result, counters]
+
+def map_backtest_job_groups(group_function, job_groups, backtest_data, processes=1, shared_dataset_dir=None):
+  """
+  Sets _backtest_data to backtest_data (the students, courses, all_courses_list, cohort_index and
+  enrollment_index and the settings of the run) and returns map(group_function, job_groups), run on a
+  pool of processes worker processes if processes > 1.
+  With processes > 1 every worker uses its own copy of the train_test_cache, warm_starts and model_store of
+  the settings. The workers spill their train/test data to the spill_dir of the cache as they go (see
+  run_worker_job_group), and what their copies counted is added to the counters of the ones in
+  backtest_data, so the counters are those of the whole run whatever processes is.
+  shared_dataset_dir: (optional) publish_dataset of the students and courses, with processes > 1 the workers
+    attach to it (and share its pages) instead of inheriting the dataset from this process
+  """
+  global _backtest_data
+  _backtest_data = backtest_data
+  try:
+    if processes > 1 and shared_dataset_dir is not None:
+      settings = dict((name, value) for name, value in backtest_data.items() if name not in ['students', 'courses', 'all_courses_list', 'cohort_index', 'enrollment_index'])
+      if settings.get('train_test_cache') is not None:
+        # an empty cache with the same limits, not a pickled copy of the entries
+        train_test_cache = settings['train_test_cache']
+        settings['train_test_cache'] = make_train_test_cache(train_test_cache['max_entries'], train_test_cache['max_bytes'], train_test_cache['spill_dir'], train_test_cache['namespace'])
+      if settings.get('warm_starts') is not None:
+        settings['warm_starts'] = make_warm_starts()
+      if settings.get('model_store') is not None:
+        # an empty store on the same directory, the workers find each other's models there
+        model_store = settings['model_store']
+        settings['model_store'] = make_model_store(model_store['store_dir'], model_store['max_bytes'], model_store['max_disk_bytes'])
+      pool = Pool(processes, attach_backtest_data, (shared_dataset_dir, settings))
+    elif processes > 1:
+      pool = Pool(processes)
+    if processes > 1:
+      try:
+        # small chunks, the jobs take very different amounts of time
+        worker_results = pool.map(run_worker_job_group, [(group_function, jobs) for jobs in job_groups], chunksize=1)
+      finally:
+        pool.close()
+        pool.join()
+      for result, counters in worker_results:
+        for name in counters:
+          for counter in counters[name]:
+            backtest_data[name][counter] += counters[name][counter]
+      return [result for result, counters in worker_results]
+    else:
+      return map(group_function, job_groups)
+  finally:
+    _backtest_data = None
+
+def run_backtest(students, courses, all_courses_list, course_list, ending_semesters, predicting_semesters, add_dummy_data, number_of_models, processes=1, cohort_index=None, enrollment_index=None, train_test_cache=None, shared_dataset_dir=None, solver='sklearn', warm_starts=None, c_store=None, online_models=None, model_store=None):
+  """
+  Runs predict_enrollment_for_one_course for every job of get_backtest_jobs, on a pool of processes worker
+  processes if processes > 1, and adds up the predictions of the student semesters of every window.
+  The jobs are independent, and the results are put together in the order of the jobs (and added up in the
+  same order as a serial run), so the result doesn't depend on the number of processes.
+  With processes > 1 every worker uses its own copy of train_test_cache, only the entries spilled to its
+  spill_dir are shared (the workers spill theirs as they go).
+  shared_dataset_dir: (optional) publish_dataset of the students and courses, with processes > 1 the workers
+    attach to it (and share its pages) instead of inheriting the students and courses from this process.
+    It needs the enrollment index (the workers use make_student_feature_base).
+  solver: 'sklearn' fits every model with make_logistic, 'batch' fits the models of all the jobs of a
+    course together with predict_enrollment_for_jobs
+  warm_starts: (optional) make_warm_starts, to start the fits of the models with few columns of every window
+    from the coefficients of the window before (see predict_enrollment_for_jobs, whatever the solver). The jobs of a course then run in
+    one group, so that its windows are fitted in order. Like train_test_cache, with processes > 1 every
+    worker has its own.
+  c_store: (optional) make_c_store, the models are fitted with the C values chosen by choose_c_values
+  online_models: (optional) make_online_model_store, the models are the online models of the store, which
+    are updated with the new students of every window (see predict_enrollment_for_one_course_online)
+    instead of fitted from scratch. The updates have to go in the order of the windows into the one store,
+    so the backtest then runs in this process whatever processes is. They aren't the models of the other
+    solvers: they keep every student they have been trained on, and SGD only gets close to the optimum of
+    liblinear, so their predictions differ (see online_update_benchmark).
+  model_store: (optional) make_model_store, the fits and predictions are looked up there first, so a rerun of
+    an unchanged backtest fits nothing. Like train_test_cache, with processes > 1 every worker has its own
+    copy (only the entries in its store_dir are shared).
+  return values:
+    predicted_data: list with a dict for every model, mapping each course in course_list to the list of its
+      predicted enrollments, one per window
+  """
+  backtest_data = {'students': students, 'courses': courses, 'all_courses_list': all_courses_list,
+                   'add_dummy_data': add_dummy_data, 'number_of_models': number_of_models, 'cohort_index': cohort_index,
+                   'enrollment_index': enrollment_index, 'train_test_cache': train_test_cache, 'solver': solver,
+                   'warm_starts': warm_starts, 'c_store': c_store, 'online_models': online_models,
+                   'model_store': model_store}
+  if online_models is not None:
+    processes = 1
+  jobs = get_backtest_jobs(course_list, ending_semesters, predicting_semesters)
+  if solver == 'batch' or warm_starts is not None:
+    # all the jobs of a course in one group
+    jobs_per_group = max(7 * (len(ending_semesters) - 8), 1)
+  else:
+    jobs_per_group = 1
+  job_groups = [jobs[i:i + jobs_per_group] for i in range(0, len(jobs), jobs_per_group)]
+  group_results = map_backtest_job_groups(run_backtest_job_group, job_groups, backtest_data, processes, shared_dataset_dir)
+  results = [result for group_result in group_results for result in group_result]
+
+  predicted_data = [{} for x in range(number_of_models)]
+  num_windows = len(ending_semesters) - 8
+  for i, desired_course in enumerate(course_list):
+    all_semesters_predicted_enrollments = [[] for x in range(number_of_models)]
+    for j in range(num_windows):
+      total_course_enrollments = [0] * number_of_models
+      for k in range(7):
+        all_predicted_enrollments_for_one_course = results[(i * num_windows + j) * 7 + k]
+        for x in range(number_of_models):
+          total_course_enrollments[x] += all_predicted_enrollments_for_one_course[x]
+      for x in range(number_of_models):
+        all_semesters_predicted_enrollments[x].append(total_course_enrollments[x])
+    for x in range(number_of_models):
+      predicted_data[x][desired_course] = all_semesters_predicted_enrollments[x]
+  return predicted_data
+
+def choose_c_values(students, courses, all_courses_list, course_list, ending_semesters, predicting_semesters, add_dummy_data, number_of_models, c_store, processes=1, cohort_index=None, enrollment_index=None, train_test_cache=None, shared_dataset_dir=None, c_values=C_VALUE_CANDIDATES):
+  """
+  Chooses the C of every model of every course in course_list, by forward chaining over the windows of
+  ending_semesters: for every window (and student semester, as in run_backtest) every C of c_values is fitted
+  on the students before the end of the window and scored on the students of the semester after it, and the
+  C with the lowest validation log loss over all the windows is stored in c_store (and saved). Pass windows
+  that come before the ones the C values are used for, so that none of them is chosen on its own data.
+  The courses that already have a C for every model in c_store are skipped, so the C values are only chosen
+  once and a later run just reuses them. The courses are scored in parallel on processes worker processes
+  (see map_backtest_job_groups).
+  return values:
+    c_store
+  """
+  course_list = [desired_course for desired_course in course_list if [j for j in range(number_of_models) if (desired_course, j) not in c_store['c_values']]]
+  if not course_list:
+    return c_store
+  backtest_data = {'students': students, 'courses': courses, 'all_courses_list': all_courses_list,
+                   'add_dummy_data': add_dummy_data, 'number_of_models': number_of_models, 'cohort_index': cohort_index,
+                   'enrollment_index': enrollment_index, 'train_test_cache': train_test_cache, 'c_values': c_values}
+  jobs = get_backtest_jobs(course_list, ending_semesters, predicting_semesters)
+  jobs_per_group = max(7 * (len(ending_semesters) - 8), 1)
+  job_groups = [jobs[i:i + jobs_per_group] for i in range(0, len(jobs), jobs_per_group)]
+  group_results = map_backtest_job_groups(run_c_selection_job_group, job_groups, backtest_data, processes, shared_dataset_dir)
+  for desired_course, all_scores in zip(course_list, group_results):
+    for j, scores in enumerate(all_scores):
+      store_c_scores(c_store, desired_course, j, scores, c_values)
+  save_c_store(c_store)
+  return c_store
 
 if __name__ == '__main__':
 
     enrollment_history_filepath = '../course_enrollments_2002-2014spring_anonymized.csv'
     prereg_data_filepath = "../pre_reg_survey_data/*"
-    students, courses, all_courses_list = initialize_input_data(enrollment_history_filepath, prereg_data_filepath)
+    # the exports of the semesters that came in since the enrollment history, in order, they are merged into
+    # the snapshot of the data before them instead of parsing everything again
+    added_enrollment_filepaths = []
+    # the prereg survey (or None) that came in with each of them, it can be in the prereg directory too
+    added_prereg_filepaths = []
+    snapshot_dir = 'cache/snapshots'
+    # worker processes for the prereg surveys and the backtest
+    processes = cpu_count()
+    students, courses, all_courses_list, enrollment_index, prereg_report = initialize_input_data(enrollment_history_filepath, prereg_data_filepath, snapshot_dir=snapshot_dir, return_enrollment_index=True, added_enrollment_filepaths=added_enrollment_filepaths,
+                                                                                                 match_cache_filepath='cache/prereg_matches.pickle', return_prereg_report=True,
+                                                                                                 processes=processes, prereg_cache_filepath='cache/prereg_files.pickle', added_prereg_filepaths=added_prereg_filepaths)
+    # the survey columns whose prereg counts didn't go to exactly one course
+    print "Prereg data: %d survey columns matched no course, %d matched more than one" % (len(prereg_report['unmatched']), len(prereg_report['ambiguous']))
+    for semester, column_title in prereg_report['unmatched']:
+      print "  %s %r: no course" % (semester, column_title)
+    for semester, column_title, course_nos in prereg_report['ambiguous']:
+      print "  %s %r: %s" % (semester, column_title, ', '.join(course_nos))
+    # the backtest asks for the same few cohorts over and over
+    cohort_index = make_cohort_index(students, enrollment_index)
+    # and reruns of the backtest need the same train/test data as the last run
+    input_hash = hash_input_files(enrollment_history_filepath, prereg_data_filepath, added_enrollment_filepaths, added_prereg_filepaths)
+    train_test_cache = make_train_test_cache(max_bytes=1 << 30, spill_dir='cache/train_test', namespace=input_hash)
+    # and the same models, which are stored by their training data so a rerun doesn't fit any of them again
+    model_store = make_model_store('cache/models', max_bytes=256 << 20, max_disk_bytes=1 << 30)
+    bulk_load_model_store(model_store)
 
     number_of_models = 5
 
+    # the backtest workers attach to the dataset published here
+    shared_dataset_dir = os.path.join('cache/shared_dataset', input_hash)
+    if processes > 1:
+      publish_dataset(shared_dataset_dir, students, courses, enrollment_index)
+    # make_warm_starts() to start the fits of every window from the coefficients of the window before
+    warm_starts = None
     add_dummy_data = True # the Sarah's computer flag
 
-    ending_semesters = ['0506SP', '0607FA','0607SP', '0708FA','0708SP', '0809FA', '0809SP', '0910FA', '0910SP', '1011FA', '1011SP', '1112FA', '1112SP', '1213FA', '1213SP', '1314FA', '1314SP']
+    # every semester from 0506SP up to the last one in the enrollment data, and we predict one semester past that
+    first_semester_ordinal, last_semester_ordinal = get_enrollment_semester_range(students)
+    ending_semesters = [semester_from_ordinal(ordinal) for ordinal in range(semester_ordinal('0506SP'), last_semester_ordinal + 1)]
     # ending_semesters = ['0910SP', '1011FA', '1011SP', '1112FA', '1112SP', '1213FA', '1213SP', '1314FA', '1314SP']
     predicting_semesters = ending_semesters[9:]
-    predicting_semesters.append('1415FA')
+    predicting_semesters.append(semester_from_ordinal(last_semester_ordinal + 1))
 
     
     course_list = ["SCI1210", "ENGR2210", "SCI1410", "MTH2130", "ENGR2510", "SCI1130", "ENGR2410", "MTH2110", "ENGR3410", 
@@ -154,24 +804,36 @@ if __name__ == '__main__':
     # course_list = ["SCI1210", "ENGR2210", "SCI1410"]
     # course_list = ["ENGR2210"]
 
-    predicted_data = [{} for x in range(number_of_models)]
-    for i in range(len(course_list)):
-      print course_list[i]
-      all_semesters_predicted_enrollments = [[] for x in range(number_of_models)]
-
-      for j in range(len(ending_semesters) - 8):
-        total_course_enrollments = [0]*number_of_models
-        for k in range(7):
-          all_predicted_enrollments_for_one_course = predict_enrollment_for_one_course(students, courses, all_courses_list, course_list[i], k, k+1, ending_semesters[j], ending_semesters[j + 8], predicting_semesters[j], add_dummy_data, number_of_models)
-          for x in range(number_of_models):
-            total_course_enrollments[x] += all_predicted_enrollments_for_one_course[x]
-        
-        for x in range(number_of_models):
-          all_semesters_predicted_enrollments[x].append(total_course_enrollments[x])
+    # set choose_c to choose the C of every model (instead of DEFAULT_C_VALUE for all of them) on the 4 windows
+    # before the first one of the backtest, the chosen C values are stored and reused by later runs
+    choose_c = False
+    c_store = None
+    if choose_c:
+      c_store = make_c_store(os.path.join('cache/c_values', input_hash + '.pickle'))
+      c_selection_ending_semesters = [semester_from_ordinal(ordinal) for ordinal in range(semester_ordinal(ending_semesters[0]) - 4, semester_ordinal(ending_semesters[0]) + 8)]
+      choose_c_values(students, courses, all_courses_list, course_list, c_selection_ending_semesters, c_selection_ending_semesters[9:] + ending_semesters[8:9], add_dummy_data, number_of_models, c_store, processes, cohort_index, enrollment_index, train_test_cache, shared_dataset_dir)
 
-      for x in range(number_of_models):
-        predicted_data[x][course_list[i]] = all_semesters_predicted_enrollments[x]\
+    predicted_data = run_backtest(students, courses, all_courses_list, course_list, ending_semesters, predicting_semesters, add_dummy_data, number_of_models, processes, cohort_index, enrollment_index, train_test_cache, shared_dataset_dir, warm_starts=warm_starts, c_store=c_store, model_store=model_store)
+
+    # and the forecast of every course of the catalog for the semester after the enrollment data
+    forecast_course_list, forecasts, forecast_probabilities = forecast_catalog(students, courses, all_courses_list, predicting_semesters[-1], add_dummy_data, number_of_models, enrollment_index, cohort_index, c_store=c_store, model_store=model_store, return_probabilities=True)
+    # with the distribution of the enrollment of every course (from the last model's students of all seven
+    # student semesters) and how likely it is to go over the largest enrollment the course has had so far
+    forecast_pmfs = get_enrollment_distributions([[semester_probabilities[-1] for semester_probabilities in course_probabilities] for course_probabilities in forecast_probabilities])
+    forecast_quantiles = get_enrollment_quantiles(forecast_pmfs, [0.05, 0.95])
+    largest_enrollments = [max([offering.enrollment for semester, offering in courses[course_no].course_offerings.items() if semester_ordinal(semester) < semester_ordinal(predicting_semesters[-1])] + [0]) for course_no in forecast_course_list]
+    forecast_exceedances = get_exceedance_probabilities(forecast_pmfs, largest_enrollments)
+    print "Forecast for %s: %d of %d courses offered recently" % (predicting_semesters[-1], len(forecast_course_list), len(all_courses_list))
+    for i in np.argsort(-forecasts[:, :, -1].sum(axis=1))[:10]:
+      print "  %-10s %6.1f students (90%% between %.0f and %.0f), P(more than %d) = %.2f" % (forecast_course_list[i], forecasts[i, :, -1].sum(), forecast_quantiles[i, 0], forecast_quantiles[i, 1], largest_enrollments[i], forecast_exceedances[i])
 
+    flush_train_test_cache(train_test_cache)
+    prune_model_store(model_store)
+    # with the counts of the worker processes added in (see map_backtest_job_groups)
+    print "Train/test cache: %d hits (%d from disk), %d misses, %d evictions" % (train_test_cache['hits'], train_test_cache['spill_hits'], train_test_cache['misses'], train_test_cache['evictions'])
+    print "Model store: %d hits (%d from disk), %d misses, %d prediction hits, %d prediction misses" % (model_store['hits'], model_store['disk_hits'], model_store['misses'], model_store['prediction_hits'], model_store['prediction_misses'])
+    if warm_starts is not None:
+      print "Warm starts: %d warm fits (%d iterations), %d cold fits (%d iterations), %.1f s fitting" % (warm_starts['warm_fits'], warm_starts['warm_iterations'], warm_starts['cold_fits'], warm_starts['cold_iterations'], warm_starts['fit_seconds'])
     model_names, course_names, total_model_errors = calculate_error_for_each_model(course_list, courses, predicting_semesters, predicted_data, True)
     make_excel_for_models(model_names, course_names, total_model_errors)
     store_simulation_data(course_list, courses, predicting_semesters, predicted_data)
@@ -0,0 +1,11 @@
+from benchmarks import *
+
+if __name__ == '__main__':
+  model_memory_benchmark()
+  feature_matrix_benchmark()
+  sparse_training_benchmark()
+  batch_logistic_benchmark()
+  compressed_logistic_benchmark()
+  warm_start_benchmark()
+  online_update_benchmark()
+  catalog_features_benchmark()
@@ -1,4 +1,19 @@
 from tests import *
 
 if __name__ == '__main__':
-  get_course_data_test()
\ No newline at end of file
+  get_course_data_test()
+  get_course_data_columnar_test()
+  add_course_data_test()
+  make_student_feature_matrix_test()
+  shared_dataset_test()
+  warm_start_test()
+  c_selection_test()
+  model_store_test()
+  shared_design_test()
+  enrollment_distribution_test()
+  backtest_test()
+  batch_logistic_test()
+  make_logistic_test()
+  online_models_test()
+  forecast_catalog_test()
+  load_input_dataset_test()
@@ -1 +1,14 @@
-from parse_course_data_test import *
\ No newline at end of file
+from make_train_test_data_test import *
+from parse_course_data_test import *
+from shared_dataset_test import *
+from warm_start_test import *
+from c_selection_test import *
+from model_store_test import *
+from shared_design_test import *
+from enrollment_distribution_test import *
+from backtest_test import *
+from batch_logistic_test import *
+from make_logistic_test import *
+from online_models_test import *
+from forecast_catalog_test import *
+from load_input_dataset_test import *
@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+from olin_course_prediction import *
+from synthetic_data import make_synthetic_fixture
+
+def backtest_test():
+  """ Test 12 - a backtest on worker processes gives the same predictions and cache and store counts as a serial
+      one, and leaves its train/test data in the spill directory for the next run """
+  test12_pass = True
+  test12_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=500, num_courses=40, num_desired_courses=2, seed=12)
+  # two windows, with prereg data for every model
+  ending_semesters = [semester_from_ordinal(ordinal) for ordinal in range(semester_ordinal('0607FA'), semester_ordinal('1011SP') + 1)]
+  predicting_semesters = ending_semesters[9:] + ['1112FA']
+  for desired_course in desired_courses:
+    for semester in ending_semesters + predicting_semesters:
+      courses[desired_course].add_course_offering(semester).prereg_predicted_enrollment = [5, 10, 20, 0]
+
+  cache_dir = tempfile.mkdtemp()
+  try:
+    runs = []
+    for processes, spill_dir, store_dir in [(1, 'serial_train_test', 'serial_models'), (2, 'train_test', 'models'), (2, 'train_test', 'models')]:
+      train_test_cache = make_train_test_cache(spill_dir=os.path.join(cache_dir, spill_dir))
+      model_store = make_model_store(os.path.join(cache_dir, store_dir))
+      shared_dataset_dir = None
+      if processes > 1:
+        shared_dataset_dir = os.path.join(cache_dir, 'dataset')
+        publish_dataset(shared_dataset_dir, students, courses, enrollment_index)
+      predicted_data = run_backtest(students, courses, all_courses_list, desired_courses, ending_semesters, predicting_semesters, True, 5, processes, cohort_index, enrollment_index, train_test_cache, shared_dataset_dir, solver='batch', model_store=model_store)
+      runs.append((predicted_data, train_test_cache, model_store))
+    [(serial_data, serial_cache, serial_store), (parallel_data, parallel_cache, parallel_store), (rerun_data, rerun_cache, rerun_store)] = runs
+
+    if parallel_data != serial_data or rerun_data != serial_data:
+      test12_pass = False
+      test12_error += "Different predictions on worker processes. "
+    if serial_cache['misses'] == 0 or (parallel_cache['misses'], parallel_cache['hits']) != (serial_cache['misses'], serial_cache['hits']):
+      test12_pass = False
+      test12_error += "Counted %d train/test misses on worker processes, not %d. " % (parallel_cache['misses'], serial_cache['misses'])
+    if (parallel_store['misses'], parallel_store['prediction_misses']) != (serial_store['misses'], serial_store['prediction_misses']):
+      test12_pass = False
+      test12_error += "Counted %d model misses on worker processes, not %d. " % (parallel_store['misses'], serial_store['misses'])
+    if len(os.listdir(os.path.join(cache_dir, 'train_test'))) != serial_cache['misses']:
+      test12_pass = False
+      test12_error += "The worker processes didn't spill their train/test data. "
+    if rerun_cache['misses'] != 0 or rerun_cache['spill_hits'] != serial_cache['misses'] or rerun_store['misses'] != 0:
+      test12_pass = False
+      test12_error += "The rerun had %d train/test misses and %d model misses. " % (rerun_cache['misses'], rerun_store['misses'])
+  finally:
+    shutil.rmtree(cache_dir)
+
+  if test12_pass == False:
+    print "Test 12 FAIL: " + test12_error
+  else:
+    print "PASS: all tests for run_backtest() on worker processes"
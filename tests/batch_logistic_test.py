@@ -0,0 +1,43 @@
+import numpy as np
+import scipy.sparse
+from sklearn import linear_model
+from controllers import *
+
+def batch_logistic_test():
+  """ Test 13 - fit_batch_logistic fits the same models as sklearn's LogisticRegression, both with the exact
+      Newton steps of the small problems and with the conjugate gradient steps of the big ones """
+  test13_pass = True
+  test13_error = ""
+
+  random_state = np.random.RandomState(13)
+  # few enough coefficients for the exact Newton steps, and too many for them (sparse, like the course
+  # history features)
+  for num_features, sparse in [(MAX_EXACT_NEWTON_COEFS - 1, False), (40, True)]:
+    x_list = []
+    y_list = []
+    for num_rows in [50, 300, 1000]:
+      x_train = (random_state.rand(num_rows, num_features) < 0.3).astype(float)
+      true_coef = random_state.randn(num_features)
+      y_train = (random_state.rand(num_rows) < 1 / (1 + np.exp(-(np.dot(x_train, true_coef) - 1)))).astype(int)
+      x_list.append(scipy.sparse.csr_matrix(x_train) if sparse else x_train)
+      y_list.append(y_train)
+    c_values = [1e-1, 1.0, 10.0]
+    if ('dense_rows' in make_batch_design(x_list, True)) != (not sparse):
+      test13_pass = False
+      test13_error += "%d features didn't take the %s steps. " % (num_features, 'exact Newton' if not sparse else 'conjugate gradient')
+
+    models = fit_batch_logistic(x_list, y_list, c_values, tol=1e-10)
+    for x_train, y_train, c_value, logistic in zip(x_list, y_list, c_values, models):
+      sklearn_logistic = linear_model.LogisticRegression(C=c_value, solver='liblinear', tol=1e-12, max_iter=1000)
+      sklearn_logistic.fit(x_train, y_train)
+      if not np.allclose(logistic.coef_, sklearn_logistic.coef_, rtol=0, atol=1e-6) or not np.allclose(logistic.intercept_, sklearn_logistic.intercept_, rtol=0, atol=1e-6):
+        test13_pass = False
+        test13_error += "Different coefficients for %d features and C = %g. " % (num_features, c_value)
+      if not np.allclose(logistic.predict_proba(x_train), sklearn_logistic.predict_proba(x_train), rtol=0, atol=1e-7):
+        test13_pass = False
+        test13_error += "Different probabilities for %d features and C = %g. " % (num_features, c_value)
+
+  if test13_pass == False:
+    print "Test 13 FAIL: " + test13_error
+  else:
+    print "PASS: all tests for fit_batch_logistic()"
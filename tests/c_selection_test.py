@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+from controllers import *
+from synthetic_data import make_synthetic_fixture
+
+def c_selection_test():
+  """ Test 07 - the warm started regularization path gives the same fits as fitting every C from zero, and the chosen C values are stored """
+  test07_pass = True
+  test07_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=1000, num_courses=40, num_desired_courses=3, seed=7)
+  x_list = []
+  y_list = []
+  for desired_course in desired_courses:
+    current_students, past_students = get_current_and_past_students(students, '0910SP', 2, cohort_index)
+    train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, 2, 3, '0506SP', '0910SP', '0910FA', True, [1], True)
+    [x_train, y_train] = get_situation_features(train_base, 1)
+    x_list.append(x_train)
+    y_list.append(y_train)
+
+  path = fit_regularization_path(x_list, y_list)
+  for c_no, c_value in enumerate(C_VALUE_CANDIDATES):
+    cold_models = fit_batch_logistic(x_list, y_list, c_value)
+    for problem, (path_model, cold_model) in enumerate(zip(path[c_no], cold_models)):
+      difference = np.abs(path_model.predict_proba(x_list[problem]) - cold_model.predict_proba(x_list[problem])).max()
+      if difference > 1e-5:
+        test07_pass = False
+        test07_error += "Probabilities differ by %g for C = %g. " % (difference, c_value)
+
+  store_dir = tempfile.mkdtemp()
+  try:
+    c_store = make_c_store(store_dir + '/c_values.pickle')
+    store_c_scores(c_store, desired_courses[0], 1, get_path_scores(x_list[:2], y_list[:2], x_list[1:], y_list[1:]))
+    store_c_scores(c_store, desired_courses[0], 2, None)
+    save_c_store(c_store)
+    loaded_c_store = make_c_store(store_dir + '/c_values.pickle')
+    if loaded_c_store['c_values'] != c_store['c_values']:
+      test07_pass = False
+      test07_error += "Stored C values not loaded back. "
+    if get_c_value(loaded_c_store, desired_courses[0], 1) != C_VALUE_CANDIDATES[int(np.argmin(c_store['scores'][(desired_courses[0], 1)]))]:
+      test07_pass = False
+      test07_error += "The chosen C doesn't have the best score. "
+    if get_c_value(loaded_c_store, desired_courses[0], 2) != DEFAULT_C_VALUE or get_c_value(None, desired_courses[0], 1) != DEFAULT_C_VALUE:
+      test07_pass = False
+      test07_error += "DEFAULT_C_VALUE not used without scores. "
+  finally:
+    shutil.rmtree(store_dir)
+
+  if test07_pass == False:
+    print "Test 07 FAIL: " + test07_error
+  else:
+    print "PASS: all tests for fit_regularization_path() and the C store"
@@ -0,0 +1,58 @@
+import itertools
+from scipy import stats
+from controllers import *
+
+def enrollment_distribution_test():
+  """ Test 10 - get_enrollment_distributions gives the exact distribution of the enrollment, and its quantiles
+      and exceedance probabilities are those of the distribution, or NaN where they are past max_enrollment """
+  test10_pass = True
+  test10_error = ""
+
+  # courses with a few students in each of a few student semesters, and one with none
+  probability_lists = [[[0.1, 0.5], [0.9], [0.3, 0.3, 0.05]], [[0.7], [], [0.2, 0.6]], [[]]]
+  pmfs = get_enrollment_distributions(probability_lists)
+  for course, probability_list in enumerate(probability_lists):
+    probabilities = [p for semester_probabilities in probability_list for p in semester_probabilities]
+    # every combination of the students that take the course
+    pmf = np.zeros(len(probabilities) + 1)
+    for taking in itertools.product([0, 1], repeat=len(probabilities)):
+      pmf[taking.count(1)] += np.prod([p if took else 1 - p for p, took in zip(probabilities, taking)])
+    padded_pmf = np.zeros(pmfs.shape[1])
+    padded_pmf[:len(pmf)] = pmf
+    if not np.allclose(pmfs[course], padded_pmf, rtol=0, atol=1e-12):
+      test10_pass = False
+      test10_error += "Wrong distribution for course %d. " % course
+
+  # a binomial, with the last column for max_enrollment or more students
+  pmfs = get_enrollment_distributions([[np.full(40, 0.25)], [np.full(30, 0.5)]], max_enrollment=20)
+  binomial = stats.binom(40, 0.25)
+  if not np.allclose(pmfs[0, :-1], binomial.pmf(np.arange(20)), rtol=0, atol=1e-12) or abs(pmfs[0, -1] - binomial.sf(19)) > 1e-12:
+    test10_pass = False
+    test10_error += "Wrong binomial distribution. "
+  quantiles = get_enrollment_quantiles(pmfs, [0.05, 0.5, 0.95])
+  if list(quantiles[0]) != list(binomial.ppf([0.05, 0.5, 0.95]).astype(int)) or list(quantiles[1]) != list(stats.binom(30, 0.5).ppf([0.05, 0.5, 0.95]).astype(int)):
+    test10_pass = False
+    test10_error += "Wrong quantiles %s. " % quantiles.tolist()
+  exceedances = get_exceedance_probabilities(pmfs, [12, 15])
+  if abs(exceedances[0] - binomial.sf(12)) > 1e-12 or abs(exceedances[1] - stats.binom(30, 0.5).sf(15)) > 1e-12:
+    test10_pass = False
+    test10_error += "Wrong exceedance probabilities %s. " % exceedances.tolist()
+
+  # past max_enrollment the quantiles and exceedance probabilities aren't known, with the default
+  # max_enrollment they are
+  tail_quantiles = get_enrollment_quantiles(pmfs, [0.99])
+  tail_exceedances = get_exceedance_probabilities(pmfs, [20, 22])
+  if tail_quantiles[0, 0] != binomial.ppf(0.99) or not np.isnan(tail_quantiles[1, 0]) or not np.isnan(tail_exceedances).all():
+    test10_pass = False
+    test10_error += "Quantiles %s and exceedance probabilities %s past max_enrollment. " % (tail_quantiles.tolist(), tail_exceedances.tolist())
+  pmfs = get_enrollment_distributions([[np.full(30, 0.5)]] * 3)
+  tail_quantiles = get_enrollment_quantiles(pmfs, [0.99])
+  tail_exceedances = get_exceedance_probabilities(pmfs, [20, 22, 40])
+  if list(tail_quantiles[:, 0]) != [21] * 3 or not np.allclose(tail_exceedances, stats.binom(30, 0.5).sf([20, 22, 40]), rtol=0, atol=1e-12):
+    test10_pass = False
+    test10_error += "Quantiles %s and exceedance probabilities %s with the default max_enrollment. " % (tail_quantiles.tolist(), tail_exceedances.tolist())
+
+  if test10_pass == False:
+    print "Test 10 FAIL: " + test10_error
+  else:
+    print "PASS: all tests for get_enrollment_distributions()"
@@ -0,0 +1,54 @@
+from olin_course_prediction import *
+from synthetic_data import make_synthetic_fixture
+
+def forecast_catalog_test():
+  """ Test 16 - forecast_catalog forecasts every course like predict_enrollment_for_job_data does for that
+      course alone (for the real students, like the backtest), including the models that have students when the last model has
+      none, which the backtest doesn't fit, and the enrollment distributions of its probabilities have the
+      forecasts as their means """
+  test16_pass = True
+  test16_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=500, num_courses=40, num_desired_courses=4, seed=16)
+  # prereg data for every semester of the window, but not for the first course
+  for course_no in desired_courses[1:]:
+    for ordinal in range(semester_ordinal('0607SP'), semester_ordinal('1112FA') + 1):
+      courses[course_no].add_course_offering(semester_from_ordinal(ordinal)).prereg_predicted_enrollment = [5, 10, 20, 0]
+
+  # the window of the 8 semesters before 1112FA, every course on its own
+  job_enrollments = np.zeros((len(desired_courses), 7, 5))
+  for problem, course_no in enumerate(desired_courses):
+    jobs = [(course_no, current_semester, '0607SP', '1011SP', '1112FA') for current_semester in range(7)]
+    if course_no == desired_courses[0]:
+      job_enrollments[problem] = predict_enrollment_for_jobs(students, courses, all_courses_list, jobs, True, 5, cohort_index, enrollment_index)
+      # the backtest doesn't fit any model of a course without prereg data
+      if (job_enrollments[problem] != 0).any():
+        test16_pass = False
+        test16_error += "The backtest predicted %s for the course without prereg data. " % job_enrollments[problem].tolist()
+    # every job fitted
+    all_job_data = [get_all_train_test_data(students, courses, all_courses_list, course_no, current_semester, current_semester + 1, '0607SP', '1011SP', '1112FA', True, 5, cohort_index, enrollment_index) for current_semester in range(7)]
+    job_enrollments[problem] = predict_enrollment_for_job_data(jobs, all_job_data, 5, fitted_jobs=range(len(jobs)))
+  if (job_enrollments[0, :, [2, 4]] != 0).any() or not (job_enrollments[0, :, [0, 1, 3]] > 0).any():
+    test16_pass = False
+    test16_error += "The course without prereg data was forecast %s. " % job_enrollments[0].tolist()
+
+  for shared_design in [False, True]:
+    [course_list, forecasts, probabilities] = forecast_catalog(students, courses, all_courses_list, '1112FA', True, 5, enrollment_index, cohort_index, course_list=desired_courses, shared_design=shared_design, return_probabilities=True)
+    if list(course_list) != desired_courses or ((forecasts == 0) != (job_enrollments == 0)).any():
+      test16_pass = False
+      test16_error += "Different models forecast 0 with shared_design = %s. " % shared_design
+    # the shared designs have their own solver, which agrees with liblinear to its tolerance
+    atol = 0.05 if shared_design else 1e-9
+    if not np.allclose(forecasts, job_enrollments, rtol=0, atol=atol):
+      test16_pass = False
+      test16_error += "Different forecasts with shared_design = %s, by up to %g. " % (shared_design, abs(forecasts - job_enrollments).max())
+    for j in range(5):
+      pmfs = get_enrollment_distributions([[semester_probabilities[j] for semester_probabilities in course_probabilities] for course_probabilities in probabilities])
+      if not np.allclose(np.dot(pmfs, np.arange(pmfs.shape[1])), forecasts[:, :, j].sum(axis=1), rtol=0, atol=1e-9):
+        test16_pass = False
+        test16_error += "The distributions of model %d don't have the forecasts as their means with shared_design = %s. " % (j, shared_design)
+
+  if test16_pass == False:
+    print "Test 16 FAIL: " + test16_error
+  else:
+    print "PASS: all tests for forecast_catalog()"
@@ -0,0 +1,91 @@
+import olin_course_prediction
+from olin_course_prediction import *
+from parse_course_data_test import compare_course_data
+from synthetic_data import write_synthetic_course_data
+# after the star import, which brings in numpy's random
+import csv
+import os
+import random
+import shutil
+import tempfile
+
+def write_prereg_survey(filename, course_numbers, seed):
+  """ Writes a prereg survey csv (in the format that parse_prereg_file expects) with made up counts of every
+      year for course_numbers, the first of which has to be an AHS course """
+  rand = random.Random(seed)
+  with open(filename, 'wb') as f:
+    writer = csv.writer(f)
+    writer.writerow(['Class'] + [course_no[:-4] + ' ' + course_no[-4:] for course_no in course_numbers])
+    for year in ['First years', 'Sophomores', 'Juniors', 'Seniors']:
+      writer.writerow([year] + [rand.randint(0, 30) for course_no in course_numbers])
+
+def load_input_dataset_test():
+  """ Test 17 - when a new term's export and prereg survey are added, load_input_dataset gets the data before
+      them from its snapshot (even with the new survey in the prereg directory) instead of parsing the history
+      again, merges the survey in with add_course_data, and gives the same data as parsing all of it """
+  test17_pass = True
+  test17_error = ""
+
+  temp_dir = tempfile.mkdtemp()
+  filename = os.path.join(temp_dir, 'export.csv')
+  head_filename = os.path.join(temp_dir, 'export_head.csv')
+  tail_filename = os.path.join(temp_dir, 'export_tail.csv')
+  prereg_dir = os.path.join(temp_dir, 'prereg')
+  snapshot_dir = os.path.join(temp_dir, 'snapshots')
+  os.mkdir(prereg_dir)
+  os.mkdir(snapshot_dir)
+  parsed_files = []
+  def get_counted_course_data_columnar(filename):
+    parsed_files.append(filename)
+    return get_course_data_columnar(filename)
+  try:
+    write_synthetic_course_data(filename, num_students=300, num_courses=40, seed=17)
+    with open(filename, 'rb') as f:
+      rows = list(csv.reader(f))
+    # the last semester is the new term
+    new_semester = sorted(set(row[3] for row in rows[1:]), key=semester_ordinal)[-1]
+    for split_filename, is_tail in [(head_filename, False), (tail_filename, True)]:
+      with open(split_filename, 'wb') as f:
+        csv.writer(f).writerows(rows[:1] + [row for row in rows[1:] if (row[3] == new_semester) == is_tail])
+
+    [students, courses, professors] = get_course_data(filename)
+    survey_courses = sorted(courses, key=lambda course_no: (not course_no.startswith('AHS'), course_no))[:12]
+    # the survey of the term before is in the base data, the one of the new term comes with its export
+    old_survey_filename = os.path.join(prereg_dir, 'survey_SP%s.csv' % new_semester[:2])
+    new_survey_filename = os.path.join(prereg_dir, 'survey_SP%s.csv' % new_semester[2:4])
+    write_prereg_survey(old_survey_filename, survey_courses, 0)
+    write_prereg_survey(new_survey_filename, survey_courses, 1)
+    expected_report = enter_prereg_data(courses, get_prereg_data(os.path.join(prereg_dir, '*')))
+    os.remove(new_survey_filename)
+
+    olin_course_prediction.get_course_data_columnar = get_counted_course_data_columnar
+    load_input_dataset(head_filename, os.path.join(prereg_dir, '*'), True, snapshot_dir, [])
+    if parsed_files != [head_filename]:
+      test17_error += "Parsed %s for the base data. " % parsed_files
+    del parsed_files[:]
+
+    write_prereg_survey(new_survey_filename, survey_courses, 1)
+    for run in range(2):
+      dataset = load_input_dataset(head_filename, os.path.join(prereg_dir, '*'), True, snapshot_dir, [tail_filename], added_prereg_filepaths=[new_survey_filename])
+      if parsed_files:
+        test17_error += "Parsed %s again on run %d. " % (parsed_files, run)
+  finally:
+    olin_course_prediction.get_course_data_columnar = get_course_data_columnar
+    shutil.rmtree(temp_dir)
+
+  test17_error += compare_course_data([students, courses, professors], [dataset['students'], dataset['courses'], dataset['professors']])
+  for course_no in courses:
+    for semester in courses[course_no].course_offerings:
+      if semester in dataset['courses'][course_no].course_offerings and courses[course_no].course_offerings[semester].prereg_predicted_enrollment != dataset['courses'][course_no].course_offerings[semester].prereg_predicted_enrollment:
+        test17_error += "Wrong prereg data of %s in %s. " % (course_no, semester)
+  if dataset['courses'][survey_courses[0]].course_offerings[new_semester].prereg_predicted_enrollment == [-1, -1, -1, -1]:
+    test17_error += "The survey of the new term wasn't entered. "
+  if sorted(dataset['prereg_report']['unmatched']) != sorted(expected_report['unmatched']) or sorted(dataset['prereg_report']['ambiguous']) != sorted(expected_report['ambiguous']):
+    test17_error += "Wrong prereg report. "
+
+  if test17_error:
+    test17_pass = False
+  if test17_pass == False:
+    print "Test 17 FAIL: " + test17_error
+  else:
+    print "PASS: all tests for load_input_dataset() with added enrollment and prereg files"
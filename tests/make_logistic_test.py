@@ -0,0 +1,78 @@
+import numpy as np
+from sklearn import linear_model
+from olin_course_prediction import *
+
+def make_logistic_test():
+  """ Test 14 - the distinct rows of get_compressed_problem and their counts have the loss of all of the rows,
+      make_logistic fits the same models on them as sklearn on all of the rows, and both solvers skip the
+      models without students and refuse the ones with a single class """
+  test14_pass = True
+  test14_error = ""
+
+  random_state = np.random.RandomState(14)
+  # a gender-like column and a prereg-like column with a handful of values
+  x_train = np.column_stack([random_state.randint(0, 2, 5000), random_state.randint(0, 5, 5000) * 2.5]).astype(float)
+  y_train = (random_state.rand(5000) < 0.05 + 0.1 * x_train[:, 0] + 0.04 * x_train[:, 1]).astype(int)
+  [x_unique, y_unique, counts] = get_compressed_problem(x_train, y_train)
+  rows = np.column_stack([x_train, y_train])
+  row_counts = [(rows == np.append(x_unique[row], y_unique[row])).all(1).sum() for row in range(len(counts))]
+  if counts.sum() != len(x_train) or len(counts) != len(set(map(tuple, rows))) or list(counts) != row_counts:
+    test14_pass = False
+    test14_error += "Wrong counts of the distinct rows. "
+  coefs = random_state.randn(2)
+  losses = np.logaddexp(0, -(y_train * 2 - 1) * (np.dot(x_train, coefs) + 0.3))
+  unique_losses = np.logaddexp(0, -(y_unique * 2 - 1) * (np.dot(x_unique, coefs) + 0.3))
+  if abs(losses.sum() - np.dot(counts, unique_losses)) > 1e-8 * losses.sum():
+    test14_pass = False
+    test14_error += "The distinct rows have a different loss. "
+  if get_compressed_problem(x_train, y_train, max_unique_rows=len(counts) - 1) is not None or get_compressed_problem(random_state.rand(100, MAX_EXACT_NEWTON_COEFS), y_train[:100]) is not None:
+    test14_pass = False
+    test14_error += "Compressed a problem with too many distinct rows or coefficients. "
+
+  for c_value in [1e-1, 1.0]:
+    sklearn_logistic = linear_model.LogisticRegression(C=c_value, solver='liblinear').fit(x_train, y_train)
+    logistic = make_logistic(x_train, y_train, c_value)
+    if abs(get_predicted_enrollment(logistic, x_train) - get_predicted_enrollment(sklearn_logistic, x_train)) > 1e-8 or not np.allclose(logistic.coef_, sklearn_logistic.coef_, rtol=0, atol=1e-10):
+      test14_pass = False
+      test14_error += "make_logistic isn't sklearn's fit for C = %g. " % c_value
+    compressed_logistic = fit_compressed_logistic([x_train], [y_train], c_value)[0]
+    batch_logistic = fit_batch_logistic([x_train], [y_train], c_value)[0]
+    if not np.allclose(compressed_logistic.coef_, batch_logistic.coef_, rtol=0, atol=1e-6):
+      test14_pass = False
+      test14_error += "fit_compressed_logistic isn't fit_batch_logistic for C = %g. " % c_value
+
+  # the train/test data of three models of one job, the second without training students, then with a
+  # single class, then the last one without testing students
+  x_test = x_train[:300]
+  all_train_test_data = [[x_train[:, :1], y_train, x_test[:, :1], None], [np.zeros((0, 2)), np.zeros(0), x_test, None], [x_train, y_train, x_test, None]]
+  single_class_data = [all_train_test_data[0], [x_train, np.zeros(len(x_train), int), x_test, None], all_train_test_data[2]]
+  no_testing_data = all_train_test_data[:2] + [[x_train, y_train, x_test[:0], None]]
+  job = ('ENGR1234', 2, '0506FA', '1011SP', '1112FA')
+  for name, train_test_data in [('no training students', all_train_test_data), ('a single class', single_class_data), ('no testing students for the last model', no_testing_data)]:
+    train_test_cache = make_train_test_cache()
+    for situation, data in enumerate(train_test_data):
+      store_train_test(train_test_cache, get_train_test_key(situation, job[0], job[1], job[1] + 1, job[2], job[3], job[4], True), data)
+    predictions = []
+    for predict in [lambda: predict_enrollment_for_one_course({}, {}, [], job[0], job[1], job[1] + 1, job[2], job[3], job[4], True, 3, train_test_cache=train_test_cache),
+                    lambda: predict_enrollment_for_job_data([job], [train_test_data], 3)[0]]:
+      try:
+        predictions.append(predict())
+      except ValueError:
+        predictions.append(None)
+    if name == 'no training students':
+      if None in predictions or [prediction[1] for prediction in predictions] != [0, 0] or not np.allclose(predictions[0], predictions[1], rtol=0, atol=1e-2) or 0 in predictions[0][::2]:
+        test14_pass = False
+        test14_error += "The solvers predict %s for a model with %s. " % (predictions, name)
+    elif name == 'no testing students for the last model':
+      # like everyone having taken the class already, none of the models are fitted
+      if predictions != [[0, 0, 0], [0, 0, 0]]:
+        test14_pass = False
+        test14_error += "The solvers predict %s with %s. " % (predictions, name)
+    elif predictions != [None, None]:
+      test14_pass = False
+      test14_error += "The solvers predict %s for a model with %s. " % (predictions, name)
+
+  if test14_pass == False:
+    print "Test 14 FAIL: " + test14_error
+  else:
+    print "PASS: all tests for make_logistic() and get_compressed_problem()"
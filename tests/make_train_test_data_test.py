@@ -0,0 +1,28 @@
+from controllers import *
+from synthetic_data import make_synthetic_fixture
+
+def make_student_feature_matrix_test():
+  """ Test 04 - make_student_feature_matrix builds the same features as make_student_feature_data """
+  test04_pass = True
+  test04_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=500, num_courses=60, num_desired_courses=3, seed=4)
+
+  for desired_course in desired_courses:
+    for current_semester in range(7):
+      current_students, past_students = get_current_and_past_students(students, '1011SP', current_semester, cohort_index)
+      for situation in range(5):
+        for is_current_student, group in [(False, past_students), (True, current_students)]:
+          add_dummy_data = current_semester % 2 == 0
+          [x_vectors, y_values] = make_student_feature_data(situation, is_current_student, group, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', add_dummy_data)
+          [x_matrix, y_array] = make_student_feature_matrix(situation, is_current_student, group, enrollment_index, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', '1011SP', '1112FA', add_dummy_data)
+          if hasattr(x_matrix, 'toarray'):
+            x_matrix = x_matrix.toarray()
+          if list(y_array) != y_values or x_matrix.tolist() != [map(float, x_vector) for x_vector in x_vectors]:
+            test04_pass = False
+            test04_error += "Different features for %s, semester %d, situation %d. " % (desired_course, current_semester, situation)
+
+  if test04_pass == False:
+    print "Test 04 FAIL: " + test04_error
+  else:
+    print "PASS: all tests for make_student_feature_matrix()"
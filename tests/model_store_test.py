@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+import scipy.sparse
+from controllers import *
+
+def model_store_test():
+  """ Test 08 - the model store gives back the stored models and predictions, under keys that change with the training data and C """
+  test08_pass = True
+  test08_error = ""
+
+  x_train = scipy.sparse.csr_matrix(np.array([[1, 0, 1], [0, 1, 0], [1, 1, 0], [0, 0, 1]], float))
+  y_train = np.array([1, 0, 1, 0])
+  x_test = np.array([[1, 0, 0], [0, 1, 1]], float)
+  store_dir = tempfile.mkdtemp()
+  try:
+    model_store = make_model_store(store_dir)
+    key = get_model_key(x_train, y_train, 3, 1e-1, 'newton')
+    if key == get_model_key(x_train, np.array([1, 1, 1, 0]), 3, 1e-1, 'newton') or key == get_model_key(x_train, y_train, 3, 1e0, 'newton') or key == get_model_key(x_train.toarray() + 1, y_train, 3, 1e-1, 'newton'):
+      test08_pass = False
+      test08_error += "Same key for different training data or C. "
+    if key != get_model_key(scipy.sparse.csr_matrix(x_train.toarray()), list(y_train), 3, 1e-1, 'newton'):
+      test08_pass = False
+      test08_error += "Different keys for the same training data. "
+
+    [logistic, key] = get_stored_model(model_store, x_train, y_train, 3, 1e-1, 'newton', lambda: fit_batch_logistic([x_train], [y_train], 1e-1)[0])
+    prediction = get_stored_prediction(model_store, key, logistic, x_test, lambda logistic, x_test: logistic.predict_proba(x_test)[:, 1].sum())
+
+    # a new store on the same directory, like the next run
+    model_store = make_model_store(store_dir)
+    [stored_logistic, stored_key] = get_stored_model(model_store, x_train, y_train, 3, 1e-1, 'newton', lambda: None)
+    if stored_logistic is None or not np.allclose(stored_logistic.coef_, logistic.coef_) or not np.allclose(stored_logistic.intercept_, logistic.intercept_):
+      test08_pass = False
+      test08_error += "Model not loaded back. "
+    elif get_stored_prediction(model_store, stored_key, stored_logistic, x_test, lambda logistic, x_test: None) != prediction:
+      test08_pass = False
+      test08_error += "Prediction not loaded back. "
+    if model_store['disk_hits'] != 1 or model_store['prediction_hits'] != 1:
+      test08_pass = False
+      test08_error += "Counted %d disk hits and %d prediction hits. " % (model_store['disk_hits'], model_store['prediction_hits'])
+
+    model_store = make_model_store(store_dir, max_disk_bytes=0)
+    if bulk_load_model_store(model_store) != 1 or prune_model_store(model_store) != 1 or bulk_load_model_store(make_model_store(store_dir)) != 0:
+      test08_pass = False
+      test08_error += "Bulk load or pruning failed. "
+  finally:
+    shutil.rmtree(store_dir)
+
+  if test08_pass == False:
+    print "Test 08 FAIL: " + test08_error
+  else:
+    print "PASS: all tests for the model store"
@@ -0,0 +1,71 @@
+import csv
+import os
+import tempfile
+from olin_course_prediction import *
+from synthetic_data import write_synthetic_course_data
+
+def online_models_test():
+  """ Test 15 - after every semester that is appended and the enrollment index built again (with new codes for
+      the students), the online models of a saved store are only updated with the students they haven't seen """
+  test15_pass = True
+  test15_error = ""
+
+  fd, filename = tempfile.mkstemp(suffix='.csv')
+  os.close(fd)
+  export_filename = filename + '.export'
+  store_filepath = filename + '.pickle'
+  try:
+    write_synthetic_course_data(filename, num_students=1500, num_courses=40, seed=15)
+    with open(filename, 'rb') as f:
+      rows = list(csv.reader(f))
+
+    # the exports up to 1011FA, 1011SP and 1112FA, every one is parsed and indexed from scratch. The students
+    # only start in the fall, so the models of a student semester only have testing students every other
+    # semester, and the third window updates the models of the first one.
+    windows = []
+    for predicting_for_semester in ['1011SP', '1112FA', '1112SP']:
+      with open(export_filename, 'wb') as f:
+        csv.writer(f).writerows(rows[:1] + [row for row in rows[1:] if semester_ordinal(row[3]) < semester_ordinal(predicting_for_semester)])
+      [students, courses, professors] = get_course_data_columnar(export_filename)
+      all_courses_list = [[courses[course_no].course_number, courses[course_no].title] for course_no in sorted(courses)]
+      enrollment_index = make_enrollment_index(students, courses)
+      ending_semester = semester_from_ordinal(semester_ordinal(predicting_for_semester) - 1)
+      windows.append((students, courses, all_courses_list, enrollment_index, make_cohort_index(students, enrollment_index), ending_semester, predicting_for_semester))
+    if windows[0][3]['student_ids'] == windows[2][3]['student_ids'][:len(windows[0][3]['student_ids'])]:
+      test15_pass = False
+      test15_error += "The students kept their codes, the test doesn't test anything. "
+
+    desired_course = sorted(windows[1][1], key=lambda course_no: -windows[1][1][course_no].total_number_of_students)[0]
+    seen_student_ids = {}
+    expected_update_rows = 0
+    for window, (students, courses, all_courses_list, enrollment_index, cohort_index, ending_semester, predicting_for_semester) in enumerate(windows):
+      # saved after every window, like the main run
+      online_models = make_online_model_store(store_filepath)
+      for current_semester in range(7):
+        predict_enrollment_for_one_course_online(students, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', ending_semester, predicting_for_semester, True, 2, online_models, enrollment_index, cohort_index)
+        train_base, test_base = make_semester_specific_feature_bases(students, courses, all_courses_list, desired_course, current_semester, current_semester + 1, '0506FA', ending_semester, predicting_for_semester, True, enrollment_index, cohort_index, range(2))
+        if np.shape(get_situation_features(test_base, 1)[0])[0] == 0:
+          continue
+        for situation in range(2):
+          num_rows = np.shape(get_situation_features(train_base, situation)[0])[0]
+          student_ids = [enrollment_index['student_ids'][code] for code in train_base['student_codes'][:num_rows]]
+          key = get_online_model_key(desired_course, current_semester, situation, True, DEFAULT_C_VALUE)
+          if window > 0 and key in seen_student_ids:
+            expected_update_rows += len([stud_id for stud_id in student_ids if stud_id not in seen_student_ids[key]])
+          seen_student_ids[key] = seen_student_ids.get(key, set()) | set(student_ids)
+          if key not in online_models['models'] or set(online_models['models'][key]['student_ids']) != seen_student_ids[key]:
+            test15_pass = False
+            test15_error += "Wrong students of the model of %s after window %d. " % (key, window)
+      save_online_model_store(online_models)
+    if expected_update_rows == 0 or online_models['update_rows'] != expected_update_rows:
+      test15_pass = False
+      test15_error += "Updated with %d rows, not the %d rows of the new students. " % (online_models['update_rows'], expected_update_rows)
+  finally:
+    for temp_filename in [filename, export_filename, store_filepath]:
+      if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+
+  if test15_pass == False:
+    print "Test 15 FAIL: " + test15_error
+  else:
+    print "PASS: all tests for update_online_model() with a new semester"
@@ -1,4 +1,9 @@
 from controllers import *
+from synthetic_data import write_synthetic_course_data
+# after the star import, which brings in numpy's random
+import csv
+import os
+import tempfile
 
 def get_course_data_students_test(students):
   """ Test 01 - contents of students """
@@ -71,10 +76,46 @@ def get_course_data_courses_test(courses):
 
   return test02_pass, test02_error
 
+def compare_course_data(course_data, other_course_data):
+  """ The differences between two [students, courses, professors] of the same course data, as an error message
+      ("" if they're the same) """
+  [students, courses, professors] = course_data
+  [other_students, other_courses, other_professors] = other_course_data
+  error = ""
+  if sorted(students) != sorted(other_students) or sorted(courses) != sorted(other_courses) or sorted(professors) != sorted(other_professors):
+    error += "Different students, courses or professors reported. "
+  else:
+    for student_no in students:
+      student = students[student_no]
+      other_student = other_students[student_no]
+      if str(student) != str(other_student) or student.first_semester != other_student.first_semester or student.final_semester != other_student.final_semester:
+        error += "Incorrect student " + student_no + ". "
+      elif student.major_history != other_student.major_history or student.semesters_present != other_student.semesters_present:
+        error += "Incorrect major history or semesters present for student " + student_no + ". "
+      elif [[str(c) for c in sem] for sem in student.list_of_course_offerings] != [[str(c) for c in sem] for sem in other_student.list_of_course_offerings]:
+        error += "Incorrect course offerings for student " + student_no + ". "
+    for course_no in courses:
+      offerings = courses[course_no].course_offerings
+      other_offerings = other_courses[course_no].course_offerings
+      offerings_match = sorted(offerings) == sorted(other_offerings)
+      for semester in offerings:
+        if offerings_match and semester in other_offerings:
+          offerings_match = offerings[semester].enrollment == other_offerings[semester].enrollment and \
+            sorted(p.name for p in offerings[semester].professors) == sorted(p.name for p in other_offerings[semester].professors)
+      if not offerings_match or courses[course_no].title != other_courses[course_no].title or courses[course_no].total_number_of_students != other_courses[course_no].total_number_of_students:
+        error += "Incorrect course " + course_no + ". "
+
+  return error
+
 def get_course_data_test():
   
   all_tests_pass = True
 
+  # the test export isn't in the repository, so only run these tests where it has been put in place
+  if not os.path.exists("input_data/test_course_data01.csv"):
+    print "SKIP: tests for get_course_data(), input_data/test_course_data01.csv is missing"
+    return
+
   """ Run the function under test (FUT) """
   [students, courses, professors] = get_course_data("input_data/test_course_data01.csv")
 
@@ -95,12 +136,123 @@ def get_course_data_test():
   if all_tests_pass == True:
     print "PASS: all tests for get_course_data()"
 
+def get_course_data_columnar_test():
+  """ Test 03 - get_course_data_columnar and stream_course_data (with the course histories) build the same data
+      as get_course_data, on a synthetic export """
+  test03_pass = True
+  test03_error = ""
+
+  fd, filename = tempfile.mkstemp(suffix='.csv')
+  os.close(fd)
+  try:
+    write_synthetic_course_data(filename, num_students=300, num_courses=40, seed=3)
+    [students, courses, professors] = get_course_data(filename)
+    [columnar_students, columnar_courses, columnar_professors] = get_course_data_columnar(filename)
+    streamed_course_data = make_models_from_aggregates(stream_course_data(filename, chunk_size=1000, keep_course_history=True))
+    # without the course histories, which are off by default, there is nothing to build the students from
+    aggregates = stream_course_data(filename)
+    if [student for student in aggregates['students'].values() if student[7] is not None]:
+      test03_error += "Kept the course histories by default. "
+    try:
+      make_models_from_aggregates(aggregates)
+      test03_error += "Built the students without their course histories. "
+    except ValueError:
+      pass
+    with open(filename, 'rb') as f:
+      header = f.readline()
+    # an empty file and a file with just the header have no data either way
+    empty_data = []
+    for contents in ['', header]:
+      with open(filename, 'wb') as f:
+        f.write(contents)
+      empty_data.append((get_course_data(filename), get_course_data_columnar(filename)))
+  finally:
+    os.remove(filename)
 
+  test03_error += compare_course_data([students, courses, professors], [columnar_students, columnar_courses, columnar_professors])
+  test03_error += compare_course_data([students, courses, professors], streamed_course_data)
+  for course_data, columnar_course_data in empty_data:
+    if course_data != [{}, {}, {}] or columnar_course_data != [{}, {}, {}]:
+      test03_error += "Data %s and %s from a file without rows. " % (course_data, columnar_course_data)
+  if test03_error:
+    test03_pass = False
 
+  if test03_pass == False:
+    print "Test 03 FAIL: " + test03_error
+  else:
+    print "PASS: all tests for get_course_data_columnar()"
 
+def add_course_data_test():
+  """ Test 11 - parsing the first semesters of an export and adding the last one with add_course_data gives the
+      same data as parsing all of it, and update_enrollment_index gives the same index as building it again """
+  test11_pass = True
+  test11_error = ""
 
+  fd, filename = tempfile.mkstemp(suffix='.csv')
+  os.close(fd)
+  head_filename = filename + '.head'
+  tail_filename = filename + '.tail'
+  try:
+    write_synthetic_course_data(filename, num_students=300, num_courses=40, seed=11)
+    with open(filename, 'rb') as f:
+      rows = list(csv.reader(f))
+    # the last two semesters are added, the students of the first one of them are new
+    added_semesters = sorted(set(row[3] for row in rows[1:]), key=semester_ordinal)[-2:]
+    for split_filename, is_tail in [(head_filename, False), (tail_filename, True)]:
+      with open(split_filename, 'wb') as f:
+        csv.writer(f).writerows(rows[:1] + [row for row in rows[1:] if (row[3] in added_semesters) == is_tail])
 
+    [students, courses, professors] = get_course_data(filename)
+    [added_students, added_courses, added_professors] = get_course_data(head_filename)
+    all_courses_list = [[added_courses[course_no].course_number, added_courses[course_no].title] for course_no in added_courses]
+    head_enrollment_index = make_enrollment_index(added_students, added_courses)
+    affected_students = add_course_data(added_students, added_courses, added_professors, tail_filename, all_courses_list=all_courses_list)
+  finally:
+    for temp_filename in [filename, head_filename, tail_filename]:
+      if os.path.exists(temp_filename):
+        os.remove(temp_filename)
 
+  test11_error += compare_course_data([students, courses, professors], [added_students, added_courses, added_professors])
+  if sorted(course_no for course_no, course_title in all_courses_list) != sorted(courses):
+    test11_error += "Wrong all_courses_list. "
+  if sorted(affected_students) != sorted(stud_id for stud_id in students if set(added_semesters) & set(students[stud_id].semesters_present)):
+    test11_error += "Wrong affected students. "
 
+  # the codes of the updated index are different, compare the students and courses behind them
+  enrollment_index = make_enrollment_index(students, courses)
+  updated_index = update_enrollment_index(head_enrollment_index, added_students, added_courses, affected_students)
+  if updated_index['student_ids'][:len(head_enrollment_index['student_ids'])] != head_enrollment_index['student_ids']:
+    test11_error += "The codes of the old students changed. "
+  for stud_id, code in enrollment_index['student_codes'].items():
+    updated_code = updated_index['student_codes'][stud_id]
+    for name in ['first_semester_ordinals', 'final_semesters', 'is_female']:
+      if enrollment_index[name][code] != updated_index[name][updated_code]:
+        test11_error += "Wrong %s of student %s. " % (name, stud_id)
+    if [enrollment_index['major_names'][major] for major in enrollment_index['major_history'][code] if major >= 0] != [updated_index['major_names'][major] for major in updated_index['major_history'][updated_code] if major >= 0]:
+      test11_error += "Wrong major history of student %s. " % stud_id
+    for index, index_code in [(enrollment_index, code), (updated_index, updated_code)]:
+      start, end = index['enrollment_indptr'][index_code * 8], index['enrollment_indptr'][index_code * 8 + 8]
+      rows = np.repeat(np.arange(8), np.diff(index['enrollment_indptr'][index_code * 8:index_code * 8 + 9]))
+      entries = zip(rows, [index['course_numbers'][course_code] for course_code in index['enrollment_courses'][start:end]], index['enrollment_semesters'][start:end])
+      if index is enrollment_index:
+        expected_entries = entries
+      elif entries != expected_entries:
+        test11_error += "Wrong enrollments of student %s. " % stud_id
+  if [enrollment_index['course_totals'][enrollment_index['course_codes'][course_no]] for course_no in courses] != [updated_index['course_totals'][updated_index['course_codes'][course_no]] for course_no in courses]:
+    test11_error += "Wrong course totals. "
 
+  # and the cohort index built from it
+  cohort_index = make_cohort_index(students, enrollment_index)
+  updated_cohort_index = make_cohort_index(added_students, updated_index)
+  for current_semester in range(7):
+    current_students, past_students = get_current_and_past_students(students, added_semesters[-1], current_semester, cohort_index)
+    updated_current_students, updated_past_students = get_current_and_past_students(added_students, added_semesters[-1], current_semester, updated_cohort_index)
+    if sorted(current_students) != sorted(updated_current_students) or sorted(past_students) != sorted(updated_past_students):
+      test11_error += "Wrong cohorts of student semester %d. " % current_semester
 
+  if test11_error:
+    test11_pass = False
+  if test11_pass == False:
+    print "Test 11 FAIL: " + test11_error
+  else:
+    print "PASS: all tests for add_course_data() and update_enrollment_index()"
@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+from controllers import *
+from synthetic_data import make_synthetic_fixture
+
+def shared_dataset_test():
+  """ Test 05 - attach_dataset gives back the students, courses and indexes that publish_dataset was given """
+  test05_pass = True
+  test05_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=300, num_courses=40, seed=5)
+  # parsed prereg counts are floats, whole or not
+  prereg_course = courses[sorted(courses)[0]]
+  prereg_offering = prereg_course.course_offerings.values()[0]
+  prereg_offering.prereg_predicted_enrollment = [12.0, 3.5, 0.0, 7.0]
+  dataset_dir = tempfile.mkdtemp()
+  try:
+    publish_dataset(dataset_dir + '/dataset', students, courses, enrollment_index)
+    dataset = attach_dataset(dataset_dir + '/dataset')
+
+    def offering_data(course_offering):
+      return (course_offering.course.course_number, course_offering.semester, course_offering.enrollment,
+              course_offering.prereg_predicted_enrollment, sorted(professor.name for professor in course_offering.professors))
+
+    if list(dataset['students']) != list(students) or list(dataset['courses']) != list(courses):
+      test05_pass = False
+      test05_error += "Students or courses in a different order. "
+    for course_no in courses:
+      course = dataset['courses'][course_no]
+      if (course.title, course.total_number_of_students) != (courses[course_no].title, courses[course_no].total_number_of_students):
+        test05_pass = False
+        test05_error += "Different course %s. " % course_no
+      if sorted(map(offering_data, course.course_offerings.values())) != sorted(map(offering_data, courses[course_no].course_offerings.values())):
+        test05_pass = False
+        test05_error += "Different offerings of %s. " % course_no
+    for stud_id in students:
+      student = dataset['students'][stud_id]
+      for attribute in ['ID', 'gender', 'graduating_class', 'major', 'first_semester', 'final_semester', 'major_history', 'semesters_present']:
+        if getattr(student, attribute) != getattr(students[stud_id], attribute):
+          test05_pass = False
+          test05_error += "Different %s of student %s. " % (attribute, stud_id)
+      if [map(offering_data, offerings) for offerings in student.list_of_course_offerings] != [map(offering_data, offerings) for offerings in students[stud_id].list_of_course_offerings]:
+        test05_pass = False
+        test05_error += "Different course offerings of student %s. " % stud_id
+    shared_prereg = dataset['courses'][prereg_course.course_number].course_offerings[prereg_offering.semester].prereg_predicted_enrollment
+    if shared_prereg != [12.0, 3.5, 0.0, 7.0] or [type(value) for value in shared_prereg] != [float] * 4:
+      test05_pass = False
+      test05_error += "Prereg counts %r aren't the floats of the parsed data. " % (shared_prereg,)
+
+    shared_enrollment_index = get_shared_enrollment_index(dataset)
+    for name in enrollment_index:
+      if not np.array_equal(shared_enrollment_index[name], enrollment_index[name]):
+        test05_pass = False
+        test05_error += "Different %s in the enrollment index. " % name
+    shared_cohort_index = get_shared_cohort_index(dataset)
+    for current_semester in range(7):
+      current_students, past_students = get_current_and_past_students(students, '1011SP', current_semester, cohort_index)
+      shared_current_students, shared_past_students = get_current_and_past_students(dataset['students'], '1011SP', current_semester, shared_cohort_index)
+      if list(shared_current_students) != list(current_students) or list(shared_past_students) != list(past_students):
+        test05_pass = False
+        test05_error += "Different cohorts for semester %d. " % current_semester
+  finally:
+    shutil.rmtree(dataset_dir)
+
+  if test05_pass == False:
+    print "Test 05 FAIL: " + test05_error
+  else:
+    print "PASS: all tests for publish_dataset() and attach_dataset()"
@@ -0,0 +1,56 @@
+from controllers import *
+from synthetic_data import make_synthetic_fixture
+
+def shared_design_test():
+  """ Test 09 - make_shared_design has the features of make_student_feature_base for every course, and
+      fit_shared_design_logistic fits the same models as fitting every course on its own """
+  test09_pass = True
+  test09_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=500, num_courses=60, num_desired_courses=6, seed=9)
+  num_history_columns = len(all_courses_list) + len(MAJOR_DICT) + 1
+  # prereg data for all but one of the courses, so that situation 4 has courses with and without students
+  for course_no in desired_courses[1:]:
+    courses[course_no].add_course_offering('1112FA').prereg_predicted_enrollment = [5, 10, 20, 0]
+
+  current_students, past_students = get_current_and_past_students(students, '1011SP', 2, cohort_index)
+  cohort_base = make_cohort_feature_base(False, past_students, enrollment_index, all_courses_list, 2, 3, '0506FA', [3, 4])
+  for situation in [3, 4]:
+    design = make_shared_design(False, cohort_base, enrollment_index, courses, all_courses_list, desired_courses, 2, 3, '1011SP', '1112FA', True, situation)
+    x_list = []
+    y_list = []
+    for problem, desired_course in enumerate(desired_courses):
+      feature_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, 2, 3, '0506FA', '1011SP', '1112FA', True, [3, 4], True)
+      [x_matrix, y_values] = get_situation_features(feature_base, situation)
+      x_matrix = x_matrix.toarray() if hasattr(x_matrix, 'toarray') else x_matrix
+      rows = design['weight_matrix'][:, problem] > 0
+      shared_rows = design['x_shared'][rows].toarray()
+      if situation == 4:
+        # the prereg data columns go after the gender, like in situation 4
+        prereg_columns = np.outer(design['problem_column_rows'][rows], design['problem_columns'][problem])
+        shared_rows = np.hstack([shared_rows[:, :num_history_columns], prereg_columns, shared_rows[:, num_history_columns:]])
+      if x_matrix.shape != shared_rows.shape or not np.array_equal(x_matrix, shared_rows) or not np.array_equal(y_values, design['y_matrix'][rows, problem]):
+        test09_pass = False
+        test09_error += "Different features for %s, situation %d. " % (desired_course, situation)
+      x_list.append(x_matrix)
+      y_list.append(y_values)
+
+    if list(design['has_students']) != [situation == 3] + [True] * (len(desired_courses) - 1):
+      test09_pass = False
+      test09_error += "Wrong courses with students for situation %d. " % situation
+    problems = np.flatnonzero(design['has_students'])
+    problem_columns = None if situation == 3 else design['problem_columns'][problems]
+    models = fit_shared_design_logistic(design['x_shared'], design['y_matrix'][:, problems], design['weight_matrix'][:, problems], 1e-1, problem_columns, design['problem_column_rows'], design['column_masks'][problems], tol=1e-8)
+    separate_models = fit_batch_logistic([x_list[problem] for problem in problems], [y_list[problem] for problem in problems], 1e-1)
+    for problem, logistic, separate_logistic in zip(problems, models, separate_models):
+      coef = logistic.coef_[0]
+      if situation == 4:
+        coef = np.concatenate([coef[:num_history_columns], coef[-2:], coef[num_history_columns:-2]])
+      if not np.allclose(coef, separate_logistic.coef_[0], atol=1e-5) or not np.allclose(logistic.intercept_, separate_logistic.intercept_, atol=1e-5):
+        test09_pass = False
+        test09_error += "Different model for %s, situation %d. " % (desired_courses[problem], situation)
+
+  if test09_pass == False:
+    print "Test 09 FAIL: " + test09_error
+  else:
+    print "PASS: all tests for make_shared_design() and fit_shared_design_logistic()"
@@ -0,0 +1,104 @@
+from controllers import *
+# after the star import, which brings in numpy's random
+import csv
+import os
+import random
+import tempfile
+
+COURSE_DATA_HEADER = ['Academic Status Code', 'Degree Grant Year', 'Student ID Number', 'AcadYr_Session', 'Gender Code',
+                      'Session Classification Code', 'Session Major 1 Description', 'Concentration 1 Description',
+                      'Course Work Course Number', 'Section Number', 'Course Work Course Title', 'Section Title (Actual)',
+                      'Faculty Full Name (Last, First)']
+
+SYNTHETIC_MAJORS = ['Mechanical Engineering', "Electr'l & Computer Engr", 'Engineering', 'Undeclared']
+SYNTHETIC_CLASSIFICATIONS = ['FF', 'FR', 'SO', 'SO', 'JR', 'JR', 'SR', 'SR']
+
+def get_synthetic_semesters(start_year, end_year):
+  """
+  List of the semester strings from the fall of start_year up to the spring of end_year, in order
+  """
+  semesters = []
+  for year in range(start_year - 2000, end_year - 2000):
+    semesters.append('%02d%02dFA' % (year, year + 1))
+    semesters.append('%02d%02dSP' % (year, year + 1))
+  return semesters
+
+def write_synthetic_course_data(filename, num_students=20000, num_courses=600, courses_per_semester=4,
+                                start_year=2002, end_year=2014, seed=0):
+  """
+  Writes a course data csv (in the format that get_course_data expects) for num_students made up students
+  spread evenly over the years between start_year and end_year. Every student takes courses_per_semester
+  courses for each of their (up to 8) semesters, drawn from num_courses courses where the lower numbered
+  courses are the popular ones. Returns the number of rows written.
+  """
+  rand = random.Random(seed)
+  semesters = get_synthetic_semesters(start_year, end_year)
+  course_numbers = ['%s%d' % (rand.choice(['ENGR', 'MTH', 'SCI', 'AHSE']), 1000 + i) for i in range(num_courses)]
+  course_titles = ['Synthetic Course %d' % i for i in range(num_courses)]
+  course_professors = ['Professor %d, %d' % (i % (num_courses // 3 + 1), i % 7) for i in range(num_courses)]
+
+  num_rows = 0
+  with open(filename, 'wb') as f:
+    writer = csv.writer(f)
+    writer.writerow(COURSE_DATA_HEADER)
+    for student_no in range(num_students):
+      stud_id = str(1000 + student_no)
+      gender = rand.choice('MF')
+      first_semester_index = rand.randrange(0, len(semesters) - 1, 2)
+      num_semesters = min(8, len(semesters) - first_semester_index)
+      if rand.random() < 0.1:
+        num_semesters = rand.randint(1, num_semesters)
+      graduating_class = '0'
+      if num_semesters == 8:
+        graduating_class = str(2000 + int(semesters[first_semester_index + 7][2:4]))
+      major = 'Undeclared'
+      for student_semester_no in range(num_semesters):
+        if student_semester_no == 3 and major == 'Undeclared':
+          major = rand.choice(SYNTHETIC_MAJORS)
+        chosen_courses = set()
+        while len(chosen_courses) < courses_per_semester:
+          chosen_courses.add(min(int(rand.expovariate(8.0 / num_courses)), num_courses - 1))
+        for course_index in chosen_courses:
+          writer.writerow(['AC', graduating_class, stud_id, semesters[first_semester_index + student_semester_no], gender,
+                           SYNTHETIC_CLASSIFICATIONS[student_semester_no], major, '', course_numbers[course_index], '1',
+                           course_titles[course_index], '', course_professors[course_index]])
+          num_rows += 1
+  return num_rows
+
+def make_synthetic_dataset(num_students=20000, num_courses=600, courses_per_semester=4, seed=0):
+  """
+  Writes a synthetic course data csv to a temporary file and parses it, returns [students, courses,
+  professors] like get_course_data
+  """
+  fd, filename = tempfile.mkstemp(suffix='.csv')
+  os.close(fd)
+  try:
+    write_synthetic_course_data(filename, num_students, num_courses, courses_per_semester, seed=seed)
+    return get_course_data_columnar(filename)
+  finally:
+    os.remove(filename)
+
+def make_synthetic_fixture(num_students=20000, num_courses=600, num_desired_courses=0, seed=0):
+  """
+  The synthetic data that the tests and benchmarks run on: make_synthetic_dataset and the indexes built from
+  it. desired_courses are the num_desired_courses courses with the most students.
+  return values:
+    [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses]
+  """
+  [students, courses, professors] = make_synthetic_dataset(num_students, num_courses, seed=seed)
+  all_courses_list = [[courses[course_no].course_number, courses[course_no].title] for course_no in courses]
+  enrollment_index = make_enrollment_index(students, courses)
+  cohort_index = make_cohort_index(students, enrollment_index)
+  desired_courses = sorted(courses, key=lambda course_no: -courses[course_no].total_number_of_students)[:num_desired_courses]
+  return [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses]
+
+def add_synthetic_prereg_data(courses, course_numbers, starting_semester, predicting_for_semester, seed=0):
+  """
+  The synthetic exports have no prereg data: gives every offering of course_numbers from starting_semester
+  to predicting_for_semester made up prereg survey counts (one per student year, like enter_prereg_data), so
+  that the prereg models (situations 2 and 4) have students
+  """
+  rand = random.Random(seed)
+  for course_no in course_numbers:
+    for ordinal in range(semester_ordinal(starting_semester), semester_ordinal(predicting_for_semester) + 1):
+      courses[course_no].add_course_offering(semester_from_ordinal(ordinal)).prereg_predicted_enrollment = [rand.randint(0, 30) for year in range(4)]
@@ -0,0 +1,45 @@
+from controllers import *
+from synthetic_data import make_synthetic_fixture
+
+def warm_start_test():
+  """ Test 06 - fits started from the coefficients of the window before give the same probabilities as fits from zero """
+  test06_pass = True
+  test06_error = ""
+
+  [students, courses, all_courses_list, enrollment_index, cohort_index, desired_courses] = make_synthetic_fixture(num_students=1000, num_courses=40, num_desired_courses=1, seed=6)
+  desired_course = desired_courses[0]
+  first_window = semester_ordinal('0506FA')
+
+  warm_starts = make_warm_starts()
+  # Newton iterations of the fits that had coefficients to start from, and of the same fits from zero
+  cold_iterations = 0
+  for window in range(4):
+    starting_semester = semester_from_ordinal(first_window + window)
+    ending_semester = semester_from_ordinal(first_window + window + 8)
+    predicting_for_semester = semester_from_ordinal(first_window + window + 9)
+    current_students, past_students = get_current_and_past_students(students, ending_semester, 2, cohort_index)
+    train_base = make_student_feature_base(False, past_students, enrollment_index, courses, all_courses_list, desired_course, 2, 3, starting_semester, ending_semester, predicting_for_semester, True, [0, 1, 3], True)
+    for situation in [0, 1, 3]:
+      [x_train, y_train] = get_situation_features(train_base, situation)
+      key = get_warm_start_key(desired_course, 2, situation)
+      had_coefs = key in warm_starts['coefs']
+      cold_model = fit_batch_logistic([x_train], [y_train], 1e-1)[0]
+      warm_model = fit_warm_started_logistic(warm_starts, [key], [x_train], [y_train], 1e-1)[0]
+      difference = np.abs(cold_model.predict_proba(x_train) - warm_model.predict_proba(x_train)).max()
+      if difference > 1e-5:
+        test06_pass = False
+        test06_error += "Probabilities differ by %g for situation %d in window %d. " % (difference, situation, window)
+      if had_coefs:
+        cold_iterations += cold_model.n_iter_[0]
+
+  if warm_starts['warm_fits'] != 9 or warm_starts['cold_fits'] != 3:
+    test06_pass = False
+    test06_error += "Counted %d warm and %d cold fits. " % (warm_starts['warm_fits'], warm_starts['cold_fits'])
+  if warm_starts['warm_iterations'] >= cold_iterations:
+    test06_pass = False
+    test06_error += "%d iterations from the warm starts, %d from zero. " % (warm_starts['warm_iterations'], cold_iterations)
+
+  if test06_pass == False:
+    print "Test 06 FAIL: " + test06_error
+  else:
+    print "PASS: all tests for fit_warm_started_logistic()"